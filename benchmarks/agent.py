@@ -0,0 +1,216 @@
+"""
+Loopback SNMPv1/v2c agent simulator for benchmarks. Serves a synthetic device (system group,
+ifTable/ifXTable, ipAddrTable, ipAddressTable, neighbor tables and entPhysicalTable sized as asked) or a recorded
+`snmpwalk -On` dump, with optional response latency and packet loss.
+"""
+import os
+import re
+import sys
+import random
+import socket
+import asyncio
+import bisect
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from poller.utils import BERUtils, OIDUtils
+
+def build(interfaces=48, addresses=None, object_id='1.3.6.1.4.1.9.1.1208', descr='Cisco IOS Software, C2960X Software', neighbors=0):
+    """
+    {oid arcs: (tag, value)} for a synthetic device with interfaces rows in ifTable/ifXTable,
+    addresses (default one per ten interfaces) v4 and v6 addresses and, with neighbors set,
+    that many ARP (v4 and v6), FDB and LLDP neighbor entries
+    """
+    table = {}
+    def put(name, tag, value):
+        table[OIDUtils.resolve(name)] = (tag, value)
+    put('sysDescr.0', BERUtils.OCTET_STRING, descr.encode())
+    put('sysObjectID.0', BERUtils.OBJECT_IDENTIFIER, OIDUtils.resolve(object_id))
+    put('sysUpTime.0', BERUtils.TIMETICKS, 8640000)
+    put('sysContact.0', BERUtils.OCTET_STRING, b'noc@example.net')
+    put('sysName.0', BERUtils.OCTET_STRING, b'bench-device')
+    put('sysLocation.0', BERUtils.OCTET_STRING, b'loopback')
+    put('ifNumber.0', BERUtils.INTEGER, interfaces)
+    put('ifTableLastChange.0', BERUtils.TIMETICKS, 100)
+    put('ipAddressSpinLock.0', BERUtils.INTEGER, 1)
+    for index in range(1, interfaces + 1):
+        put(f'ifIndex.{index}', BERUtils.INTEGER, index)
+        put(f'ifDescr.{index}', BERUtils.OCTET_STRING, f'GigabitEthernet{index // 48}/0/{index % 48}'.encode())
+        put(f'ifType.{index}', BERUtils.INTEGER, 6)
+        put(f'ifMtu.{index}', BERUtils.INTEGER, 1500)
+        put(f'ifSpeed.{index}', BERUtils.GAUGE32, 1000000000)
+        put(f'ifAdminStatus.{index}', BERUtils.INTEGER, 1)
+        put(f'ifOperStatus.{index}', BERUtils.INTEGER, 1 if index % 4 else 2)
+        put(f'ifLastChange.{index}', BERUtils.TIMETICKS, 100)
+        put(f'ifInOctets.{index}', BERUtils.COUNTER32, index * 1000 & 0xffffffff)
+        put(f'ifInDiscards.{index}', BERUtils.COUNTER32, 0)
+        put(f'ifInErrors.{index}', BERUtils.COUNTER32, index % 7)
+        put(f'ifOutOctets.{index}', BERUtils.COUNTER32, index * 2000 & 0xffffffff)
+        put(f'ifOutDiscards.{index}', BERUtils.COUNTER32, 0)
+        put(f'ifOutErrors.{index}', BERUtils.COUNTER32, 0)
+        put(f'ifName.{index}', BERUtils.OCTET_STRING, f'Gi{index // 48}/0/{index % 48}'.encode())
+        put(f'ifHCInOctets.{index}', BERUtils.COUNTER64, index * 10 ** 9)
+        put(f'ifHCOutOctets.{index}', BERUtils.COUNTER64, index * 2 * 10 ** 9)
+        put(f'ifHighSpeed.{index}', BERUtils.GAUGE32, 1000)
+        put(f'ifAlias.{index}', BERUtils.OCTET_STRING, b'')
+    addresses = max(interfaces // 10, 1) if addresses is None else addresses
+    for count in range(addresses):
+        index = count % interfaces + 1
+        v4 = (10, (count >> 16) & 0xff, (count >> 8) & 0xff, count & 0xff)
+        v6 = (0x20, 0x01, 0x0d, 0xb8) + (0,) * 8 + tuple(count.to_bytes(4, 'big'))
+        put('ipAdEntIfIndex.' + '.'.join(map(str, v4)), BERUtils.INTEGER, index)
+        put('ipAdEntNetMask.' + '.'.join(map(str, v4)), BERUtils.IPADDRESS, bytes((255, 255, 255, 0)))
+        put('ipAddressIfIndex.1.4.' + '.'.join(map(str, v4)), BERUtils.INTEGER, index)
+        put('ipAddressIfIndex.2.16.' + '.'.join(map(str, v6)), BERUtils.INTEGER, index)
+    for port in range(1, interfaces + 1 if neighbors else 1):
+        put(f'dot1dBasePortIfIndex.{port}', BERUtils.INTEGER, port)
+        put(f'lldpLocPortId.{port}', BERUtils.OCTET_STRING, f'Gi{port // 48}/0/{port % 48}'.encode())
+        put(f'lldpLocPortDesc.{port}', BERUtils.OCTET_STRING, b'')
+    for count in range(neighbors):
+        index = count % interfaces + 1
+        mac = (0x02, 0x00) + tuple(count.to_bytes(4, 'big'))
+        v4 = (10, 128 | (count >> 16) & 0x7f, (count >> 8) & 0xff, count & 0xff)
+        v6 = (0x20, 0x01, 0x0d, 0xb8, 0, 1) + (0,) * 6 + tuple(count.to_bytes(4, 'big'))
+        for address in ((1, 4) + v4, (2, 16) + v6):
+            row = '.'.join(map(str, (index,) + address))
+            put(f'ipNetToPhysicalPhysAddress.{row}', BERUtils.OCTET_STRING, bytes(mac))
+            put(f'ipNetToPhysicalType.{row}', BERUtils.INTEGER, 3)
+        row = '.'.join(map(str, (1 + count % 16,) + mac))
+        put(f'dot1qTpFdbPort.{row}', BERUtils.INTEGER, index)
+        put(f'dot1qTpFdbStatus.{row}', BERUtils.INTEGER, 3)
+        if count < interfaces:
+            row = f'0.{index}.1'
+            put(f'lldpRemChassisIdSubtype.{row}', BERUtils.INTEGER, 4)
+            put(f'lldpRemChassisId.{row}', BERUtils.OCTET_STRING, bytes(mac))
+            put(f'lldpRemPortIdSubtype.{row}', BERUtils.INTEGER, 5)
+            put(f'lldpRemPortId.{row}', BERUtils.OCTET_STRING, f'Gi0/0/{count % 48}'.encode())
+            put(f'lldpRemPortDesc.{row}', BERUtils.OCTET_STRING, b'uplink')
+            put(f'lldpRemSysName.{row}', BERUtils.OCTET_STRING, f'peer-{count}'.encode())
+            put(f'lldpRemSysDesc.{row}', BERUtils.OCTET_STRING, descr.encode())
+            put(f'lldpRemSysCapEnabled.{row}', BERUtils.OCTET_STRING, bytes((0x28,)))
+            put(f'lldpRemManAddrIfSubtype.{row}.1.4.' + '.'.join(map(str, v4)), BERUtils.INTEGER, 2)
+    put('entPhysicalDescr.1', BERUtils.OCTET_STRING, b'Chassis')
+    put('entPhysicalClass.1', BERUtils.INTEGER, 3)
+    put('entPhysicalSerialNum.1', BERUtils.OCTET_STRING, b'FOC0000X000')
+    return table
+
+_walk_regex = re.compile(r'^\.?([\d.]+) = (?:([\w-]+): )?(.*)$')
+
+def load_walk(path):
+    """
+    Reads a recorded `snmpwalk -On` dump into {oid arcs: (tag, value)}
+    """
+    table = {}
+    with open(path, 'r') as walk:
+        for line in walk:
+            found = _walk_regex.match(line.strip())
+            if not found:
+                continue
+            oid, kind, text = found.groups()
+            parsed = _parse_value(kind, text)
+            if parsed:
+                table[OIDUtils.resolve(oid)] = parsed
+    return table
+
+def _parse_value(kind, text):
+    number = re.search(r'-?\d+', text)
+    if kind in ('INTEGER',):
+        return (BERUtils.INTEGER, int(number.group(0))) if number else None
+    if kind in ('Counter32', 'Gauge32', 'Counter64', 'Timeticks'):
+        tags = {'Counter32': BERUtils.COUNTER32, 'Gauge32': BERUtils.GAUGE32, 'Counter64': BERUtils.COUNTER64, 'Timeticks': BERUtils.TIMETICKS}
+        value = re.search(r'\((\d+)\)', text) if kind == 'Timeticks' else number
+        return (tags[kind], int(value.group(1 if kind == 'Timeticks' else 0))) if value else None
+    if kind == 'OID':
+        return BERUtils.OBJECT_IDENTIFIER, OIDUtils.resolve(text)
+    if kind == 'IpAddress':
+        return BERUtils.IPADDRESS, bytes(int(octet) for octet in text.split('.'))
+    if kind == 'Hex-STRING':
+        return BERUtils.OCTET_STRING, bytes.fromhex(text.replace(' ', ''))
+    return BERUtils.OCTET_STRING, text.strip('"').encode()
+
+class Agent(asyncio.DatagramProtocol):
+    """
+    Answers GET, GETNEXT and GETBULK from a sorted oid table
+    """
+    def __init__(self, table, latency=0, loss=0, max_varbinds=2000):
+        self.table = table
+        self.keys = sorted(table)
+        self.latency = latency
+        self.loss = loss
+        self.max_varbinds = max_varbinds
+        self.requests = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+        try:
+            transport.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16 * 1024 * 1024)
+        except OSError:
+            pass
+
+    def _next(self, oid):
+        position = bisect.bisect_right(self.keys, oid)
+        if position >= len(self.keys):
+            return oid, BERUtils.ENDOFMIBVIEW, None
+        key = self.keys[position]
+        tag, value = self.table[key]
+        return key, tag, value
+
+    def datagram_received(self, data, address):
+        if self.loss and random.random() < self.loss:
+            return
+        try:
+            version, community, pdu_type, request_id, non_repeaters, max_repetitions, varbinds = BERUtils.decode_message(data)
+        except (BERUtils.DecodeError, ValueError):
+            return
+        self.requests += 1
+        oids = [oid for oid, _, _ in varbinds]
+        if pdu_type == BERUtils.GET_REQUEST:
+            response = [(oid,) + self.table.get(oid, (BERUtils.NOSUCHINSTANCE, None)) for oid in oids]
+        elif pdu_type == BERUtils.GET_NEXT_REQUEST:
+            response = [self._next(oid) for oid in oids]
+        elif pdu_type == BERUtils.GET_BULK_REQUEST:
+            response = [self._next(oid) for oid in oids[:non_repeaters]]
+            cursors = oids[non_repeaters:]
+            for _ in range(max_repetitions):
+                if not cursors or len(response) + len(cursors) > self.max_varbinds:
+                    break
+                row = [self._next(oid) for oid in cursors]
+                response += row
+                cursors = [oid for oid, _, _ in row]
+                if all(tag == BERUtils.ENDOFMIBVIEW for _, tag, _ in row):
+                    break
+        else:
+            return
+        message = BERUtils.encode_message(version, community, BERUtils.GET_RESPONSE, request_id, response)
+        if len(message) > 65000:
+            message = BERUtils.encode_message(version, community, BERUtils.GET_RESPONSE, request_id, [], 1, 0)
+        if self.latency:
+            asyncio.get_event_loop().call_later(self.latency, self.transport.sendto, message, address)
+        else:
+            self.transport.sendto(message, address)
+
+async def serve(table, ports=(16100,), host='127.0.0.1', **kwargs):
+    """
+    Starts one Agent per port over the same table, returning the protocols
+    """
+    loop = asyncio.get_event_loop()
+    agents = []
+    for port in ports:
+        _, agent = await loop.create_datagram_endpoint(lambda: Agent(table, **kwargs), local_addr=(host, port))
+        agents.append(agent)
+    return agents
+
+def run(table, ports=(16100,), ready=None, **kwargs):
+    """
+    Serves until killed, setting the multiprocessing event ready once listening
+    """
+    async def main():
+        await serve(table, ports, **kwargs)
+        if ready is not None:
+            ready.set()
+        await asyncio.Event().wait()
+    asyncio.run(main())
+
+if __name__ == "__main__":
+    interfaces = int(sys.argv[1]) if len(sys.argv) > 1 else 48
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 16100
+    run(build(interfaces), (port,))
@@ -0,0 +1,233 @@
+"""
+Throughput, latency and memory benchmarks for the Poller helpers, run against the loopback
+agent simulator in benchmarks/agent.py. Every (case, concurrency) pair runs in a fresh process
+so peak RSS is its own, and results can be saved and compared against an earlier run.
+
+    python benchmarks/bench.py -n 2000 -c 10,100,1000 -i 48 -l 0.002 -o after.json -b before.json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import resource
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import agent
+from poller import Poller, Fleet
+
+COMMUNITY = 'public'
+
+#name: (runs on the event loop, call(host))
+CASES = {
+    'poll': (False, lambda host: Poller.poll(['sysName.0', 'sysUpTime.0'], host, COMMUNITY)),
+    'async_poll': (True, lambda host: Poller.async_poll(['sysName.0', 'sysUpTime.0'], host, COMMUNITY)),
+    'poll_bulk': (False, lambda host: Poller.poll_bulk(['ifDescr'], host, COMMUNITY)),
+    'async_poll_bulk': (True, lambda host: Poller.async_poll_bulk(['ifDescr'], host, COMMUNITY)),
+    'walk': (False, lambda host: Poller.walk('ifDescr', host, COMMUNITY)),
+    'async_walk': (True, lambda host: Poller.async_walk('ifDescr', host, COMMUNITY)),
+    'poll_interfaces': (False, lambda host: Poller.poll_interfaces(host, COMMUNITY)),
+    'async_poll_interfaces': (True, lambda host: Poller.async_poll_interfaces(host, COMMUNITY)),
+    'poll_make_series_model': (False, lambda host: Poller.poll_make_series_model(host, COMMUNITY)),
+    'async_poll_make_series_model': (True, lambda host: Poller.async_poll_make_series_model(host, COMMUNITY)),
+    'poll_arp': (False, lambda host: Poller.poll_arp(host, COMMUNITY)),
+    'async_poll_arp': (True, lambda host: Poller.async_poll_arp(host, COMMUNITY)),
+    'poll_fdb': (False, lambda host: Poller.poll_fdb(host, COMMUNITY)),
+    'async_poll_fdb': (True, lambda host: Poller.async_poll_fdb(host, COMMUNITY)),
+    'poll_lldp_neighbors': (False, lambda host: Poller.poll_lldp_neighbors(host, COMMUNITY)),
+    'async_poll_lldp_neighbors': (True, lambda host: Poller.async_poll_lldp_neighbors(host, COMMUNITY)),
+    'poll_entity_inventory': (False, lambda host: Poller.poll_entity_inventory(host, COMMUNITY)),
+    'async_poll_entity_inventory': (True, lambda host: Poller.async_poll_entity_inventory(host, COMMUNITY)),
+}
+
+def parse_params():
+    params = {
+        'hosts': 1000,
+        'concurrency': [10, 100, 1000],
+        'interfaces': 48,
+        'addresses': None,
+        'neighbors': 0,
+        'walk': None,
+        'latency': 0.001,
+        'loss': 0,
+        'ports': 8,
+        'base_port': 16100,
+        'cases': list(CASES),
+        'output': None,
+        'baseline': None,
+    }
+    for i, arg in enumerate(sys.argv):
+        if arg in ('-n', '--hosts'):
+            params['hosts'] = int(sys.argv[i+1])
+        elif arg in ('-c', '--concurrency'):
+            params['concurrency'] = [int(level) for level in sys.argv[i+1].split(',')]
+        elif arg in ('-i', '--interfaces'):
+            params['interfaces'] = int(sys.argv[i+1])
+        elif arg in ('-a', '--addresses'):
+            params['addresses'] = int(sys.argv[i+1])
+        elif arg in ('-N', '--neighbors'):
+            params['neighbors'] = int(sys.argv[i+1])
+        elif arg in ('-w', '--walk'):
+            params['walk'] = sys.argv[i+1]
+        elif arg in ('-l', '--latency'):
+            params['latency'] = float(sys.argv[i+1])
+        elif arg in ('-L', '--loss'):
+            params['loss'] = float(sys.argv[i+1])
+        elif arg in ('-p', '--ports'):
+            params['ports'] = int(sys.argv[i+1])
+        elif arg in ('-P', '--base-port'):
+            params['base_port'] = int(sys.argv[i+1])
+        elif arg in ('-k', '--cases'):
+            params['cases'] = sys.argv[i+1].split(',')
+        elif arg in ('-o', '--output'):
+            params['output'] = sys.argv[i+1]
+        elif arg in ('-b', '--baseline'):
+            params['baseline'] = sys.argv[i+1]
+    unknown = [case for case in params['cases'] if case not in CASES]
+    if unknown:
+        print(f'Unknown cases: {", ".join(unknown)} (have {", ".join(CASES)})')
+        return
+    return params
+
+def _serve(params, ports, ready):
+    table = agent.load_walk(params['walk']) if params['walk'] else agent.build(params['interfaces'], params['addresses'], neighbors=params['neighbors'])
+    agent.run(table, ports, ready, latency=params['latency'], loss=params['loss'])
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def _timed_sync(call):
+    def timed(host):
+        started = time.perf_counter()
+        result = call(host)
+        return time.perf_counter() - started, result
+    return timed
+
+def _timed_async(call):
+    async def timed(host):
+        started = time.perf_counter()
+        result = await call(host)
+        return time.perf_counter() - started, result
+    return timed
+
+def _run_case(name, concurrency, hosts, connection):
+    """
+    Body of one case process: polls every host once and sends back its figures
+    """
+    on_loop, call = CASES[name]
+    latencies = []
+    answered = 0
+    started = time.perf_counter()
+    try:
+        if on_loop:
+            async def main():
+                async for _, outcome in Fleet.run(_timed_async(call), hosts, concurrency=concurrency):
+                    yield outcome
+            async def collect():
+                return [outcome async for outcome in main()]
+            outcomes = asyncio.run(collect())
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                outcomes = list(executor.map(_timed_sync(call), hosts))
+    except Exception as err:
+        connection.send({'case': name, 'concurrency': concurrency, 'error': repr(err)})
+        return
+    elapsed = time.perf_counter() - started
+    for outcome in outcomes:
+        if outcome is None:
+            continue
+        latency, result = outcome
+        latencies.append(latency)
+        answered += bool(result)
+    latencies.sort()
+    connection.send({
+        'case': name,
+        'concurrency': concurrency,
+        'hosts': len(hosts),
+        'answered': answered,
+        'seconds': elapsed,
+        'hosts_per_second': len(hosts) / elapsed if elapsed else None,
+        'p50_ms': _percentile(latencies, 0.5) * 1000 if latencies else None,
+        'p99_ms': _percentile(latencies, 0.99) * 1000 if latencies else None,
+        #ru_maxrss is KiB on Linux and bytes on macOS
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024),
+    })
+
+def run_case(context, name, concurrency, hosts):
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_case, args=(name, concurrency, hosts, sender))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {'case': name, 'concurrency': concurrency, 'error': f'exited with {process.exitcode}'}
+    process.join()
+    return result
+
+def _number(value, spec):
+    return format(value, spec) if value is not None else '-'
+
+def report(results, baseline=None):
+    previous = {(result['case'], result['concurrency']): result for result in baseline or []}
+    header = f'{"case":<30}{"conc":>6}{"hosts/s":>10}{"p50 ms":>9}{"p99 ms":>9}{"ok %":>7}{"rss MB":>8}'
+    if baseline is not None:
+        header += f'{"hosts/s Δ":>11}{"p99 Δ":>9}{"rss Δ":>8}'
+    print(header)
+    for result in results:
+        line = f'{result["case"]:<30}{result["concurrency"]:>6}'
+        if 'error' in result:
+            print(f'{line}  error: {result["error"]}')
+            continue
+        line += (f'{_number(result["hosts_per_second"], ".0f"):>10}{_number(result["p50_ms"], ".1f"):>9}{_number(result["p99_ms"], ".1f"):>9}'
+                f'{result["answered"] / result["hosts"] * 100:>7.1f}{result["peak_rss_mb"]:>8.1f}')
+        before = previous.get((result['case'], result['concurrency']))
+        if baseline is not None and before and 'error' not in before:
+            line += f'{_change(before["hosts_per_second"], result["hosts_per_second"]):>11}'
+            line += f'{_change(before["p99_ms"], result["p99_ms"]):>9}'
+            line += f'{_change(before["peak_rss_mb"], result["peak_rss_mb"]):>8}'
+        print(line)
+
+def _change(before, after):
+    if not before or after is None:
+        return '-'
+    return f'{(after - before) / before * 100:+.0f}%'
+
+if __name__ == "__main__":
+    params = parse_params()
+    if not params:
+        exit()
+    context = multiprocessing.get_context('spawn')
+    ports = tuple(range(params['base_port'], params['base_port'] + params['ports']))
+    ready = context.Event()
+    server = context.Process(target=_serve, args=(params, ports, ready), daemon=True)
+    server.start()
+    if not ready.wait(30):
+        print('Agent simulator did not start')
+        exit(1)
+    #Spread over the agent ports so no single socket takes the whole load
+    hosts = [f'127.0.0.1:{ports[count % len(ports)]}' for count in range(params['hosts'])]
+    results = []
+    try:
+        for name in params['cases']:
+            for concurrency in params['concurrency']:
+                result = run_case(context, name, concurrency, hosts)
+                results.append(result)
+                report([result])
+    finally:
+        server.terminate()
+        server.join()
+    baseline = None
+    if params['baseline']:
+        with open(params['baseline'], 'r') as saved:
+            baseline = json.load(saved)['results']
+    print()
+    report(results, baseline)
+    if params['output']:
+        with open(params['output'], 'w') as output:
+            json.dump({'params': params, 'results': results}, output, indent=2)
@@ -0,0 +1,118 @@
+"""
+On-disk TTL cache for slow-changing per-host attributes, shared between processes through SQLite
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+
+DEFAULT_TTLS = {'name': 86400,
+        'contact': 86400,
+        'location': 86400,
+        'fingerprint': 86400,
+        'make_series_model': 7 * 86400,
+        'serial_number': 7 * 86400}
+
+#Attributes worth a sysUpTime/sysObjectID check before trusting the cached value,
+#because refetching them costs several requests
+VALIDATED = ('make_series_model', 'serial_number')
+
+#Seconds of sysUpTime drift tolerated before a device counts as rebooted
+REBOOT_SLACK = 300
+
+class Entry:
+    __slots__ = ('value', 'fetched', 'uptime', 'object_id')
+
+    def __init__(self, value, fetched, uptime, object_id):
+        self.value = value
+        self.fetched = fetched
+        self.uptime = uptime
+        self.object_id = object_id
+
+class AttributeCache:
+    """
+    Values are keyed by (host, attribute) and expire after ttls[attribute] seconds.
+    Every thread gets its own connection and the database runs in WAL mode, so
+    concurrent pollers on one box can read and write the same file.
+    """
+    def __init__(self, path=None, ttls=None, state_ttl=60, timeout=30):
+        self.path = path or os.path.join(os.path.expanduser('~'), '.poller_cache.sqlite')
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.state_ttl = state_ttl
+        self.timeout = timeout
+        self._local = threading.local()
+        self._states = {}
+        self._connection().execute('''CREATE TABLE IF NOT EXISTS attributes (
+                host TEXT NOT NULL,
+                attribute TEXT NOT NULL,
+                value TEXT,
+                fetched REAL NOT NULL,
+                expires REAL NOT NULL,
+                uptime INTEGER,
+                object_id TEXT,
+                PRIMARY KEY (host, attribute))''')
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def ttl(self, attribute):
+        return self.ttls.get(attribute.split(':')[0], 3600)
+
+    def lookup(self, host, attribute):
+        """
+        Returns the unexpired Entry for host and attribute, or None
+        """
+        row = self._connection().execute('SELECT value, fetched, uptime, object_id FROM attributes WHERE host = ? AND attribute = ? AND expires > ?',
+                (host, attribute, time.time())).fetchone()
+        if not row:
+            return
+        value = json.loads(row[0])
+        return Entry(tuple(value) if isinstance(value, list) else value, row[1], row[2], row[3])
+
+    def store(self, host, attribute, value, uptime=None, object_id=None):
+        now = time.time()
+        self._connection().execute('INSERT OR REPLACE INTO attributes VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (host, attribute, json.dumps(value), now, now + self.ttl(attribute), uptime, object_id))
+
+    def invalidate(self, host, attribute=None):
+        if attribute:
+            self._connection().execute('DELETE FROM attributes WHERE host = ? AND attribute = ?', (host, attribute))
+        else:
+            self._connection().execute('DELETE FROM attributes WHERE host = ?', (host,))
+        self._states.pop(host, None)
+
+    def purge(self):
+        """
+        Drops expired rows
+        """
+        self._connection().execute('DELETE FROM attributes WHERE expires <= ?', (time.time(),))
+
+    def remember_state(self, host, uptime, object_id):
+        self._states[host] = (time.monotonic(), uptime, object_id)
+
+    def recent_state(self, host):
+        """
+        (uptime, object_id) seen for host within the last state_ttl seconds, so one
+        check covers every validated attribute polled in a run
+        """
+        state = self._states.get(host)
+        if state and time.monotonic() - state[0] < self.state_ttl:
+            return state[1:]
+
+    def unchanged(self, entry, uptime, object_id):
+        """
+        True unless the device rebooted or changed sysObjectID since entry was stored
+        """
+        if entry.object_id and object_id and entry.object_id != object_id:
+            return False
+        if entry.uptime is None or uptime is None:
+            return True
+        expected = entry.uptime + (time.time() - entry.fetched) * 100
+        return uptime >= expected - REBOOT_SLACK * 100
@@ -0,0 +1,88 @@
+"""
+Command line shared by the poll scripts: argv parsing, one host printed straight away or a host
+file run through Fleet (sharded over processes with -P) into an Output sink
+"""
+import sys
+import asyncio
+from functools import partial
+
+from poller import Fleet, Output
+
+def parse_params(argv=None, oid=False):
+    """
+    Options from argv (sys.argv by default), prompting for community, oid (when the helper
+    takes one) and hosts when they were not given. None when something is still missing
+    """
+    argv = sys.argv if argv is None else argv
+    params = {'community': None, 'ip': None, 'ip_list': None, 'oid': None, 'concurrency': 1000, 'per_subnet': None,
+            'ping': False, 'processes': 1, 'output': {'path': None, 'format': None, 'compress': None, 'rotate_bytes': None}}
+    output = params['output']
+    for i, arg in enumerate(argv):
+        if arg in ('-c', '--community'):
+            params['community'] = argv[i+1]
+        elif arg in ('-i', '--ip'):
+            params['ip'] = argv[i+1]
+        elif arg in ('-f', '--file'):
+            params['ip_list'] = argv[i+1]
+        elif arg in ('-n', '--concurrency'):
+            params['concurrency'] = int(argv[i+1])
+        elif arg in ('-s', '--per-subnet'):
+            params['per_subnet'] = int(argv[i+1])
+        elif arg in ('-p', '--ping'):
+            params['ping'] = True
+        elif arg in ('-P', '--processes'):
+            params['processes'] = int(argv[i+1])
+        elif arg in ('-O', '--output'):
+            output['path'] = argv[i+1]
+        elif arg in ('-F', '--format'):
+            output['format'] = argv[i+1]
+        elif arg in ('-z', '--gzip'):
+            output['compress'] = True
+        elif arg in ('-R', '--rotate'):
+            output['rotate_bytes'] = int(float(argv[i+1]) * 1024 * 1024)
+        elif oid and arg in ('-o', '--oid'):
+            params['oid'] = argv[i+1]
+    params['community'] = params['community'] or input('SNMP Community String: ')
+    if oid:
+        params['oid'] = params['oid'] or input('OID to poll: ')
+    if not params['ip'] and not params['ip_list']:
+        params['ip'] = input('IP to poll: ')
+    if not params['ip'] and not params['ip_list']:
+        params['ip_list'] = input('File of IPs to poll: ')
+    if not params['community'] or oid and not params['oid'] or not (params['ip'] or params['ip_list']):
+        print('Please supply community, ip address and oid' if oid else 'Please supply community and ip address')
+        return
+    return params
+
+async def _poller(func, params, sink):
+    async for host, result in Fleet.run(func, Fleet.read_hosts(params['ip_list']), concurrency=params['concurrency'],
+            per_group=params['per_subnet'], ping=params['ping']):
+        sink.write(host, result)
+
+def _sharded(func, params, sink):
+    sink.write_all(Fleet.run_sharded(func, Fleet.read_hosts(params['ip_list']), processes=params['processes'],
+            concurrency=params['concurrency'], per_group=params['per_subnet'], ping=params['ping']))
+
+def main(call, async_call, oid=False, argv=None):
+    """
+    Runs a script: call(host, community) (call(oid, host, community) with oid set) for -i,
+    async_call the same way over every host of -f, results going to the -O sink
+    """
+    try:
+        params = parse_params(argv, oid)
+    except (IndexError, ValueError, EOFError, KeyboardInterrupt):
+        params = None
+    if not params:
+        return
+    args = (params['oid'],) if oid else ()
+    if params['ip'] and not params['ip_list']:
+        print(call(*args, params['ip'], params['community']))
+        return
+    #partial of a module level coroutine function, so run_sharded can pickle it
+    func = partial(async_call, *args, community=params['community'])
+    with Output.open_sink(**params['output']) as sink:
+        if params['processes'] > 1:
+            _sharded(func, params, sink)
+        else:
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(_poller(func, params, sink))
@@ -0,0 +1,206 @@
+"""
+Interface counter samples and rate computation over whole columns at once.
+Uses numpy when it is installed and falls back to the array module otherwise
+"""
+import math
+import time
+import threading
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+COUNTER_COLUMNS = ('ifHCInOctets', 'ifHCOutOctets', 'ifInErrors', 'ifOutErrors', 'ifInDiscards', 'ifOutDiscards')
+
+_MASKS = {32: 0xffffffff, 64: 0xffffffffffffffff}
+
+def width(column):
+    """
+    Counter width in bits, 64 for the ifHC* columns and 32 for the rest
+    """
+    return 64 if column.startswith('ifHC') else 32
+
+def _number(value):
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    return int(value) if value.isdigit() else None
+
+class Sample:
+    """
+    One poll of a host's counters: sysUpTime in ticks, the row indexes and, per column,
+    values and a validity mask parallel to them
+    """
+    __slots__ = ('uptime', 'taken', 'indexes', 'values', 'valid')
+
+    def __init__(self, uptime, indexes, values, valid, taken=None):
+        self.uptime = uptime
+        self.taken = taken or time.monotonic()
+        self.indexes = indexes
+        self.values = values
+        self.valid = valid
+
+    @classmethod
+    def from_table(cls, table, uptime, columns=COUNTER_COLUMNS):
+        values = {}
+        valid = {}
+        for column in columns:
+            raw = [_number(value) for value in table.raw_column(column)]
+            present = [value is not None for value in raw]
+            raw = [value if value is not None else 0 for value in raw]
+            if numpy is not None:
+                values[column] = numpy.array(raw, dtype=numpy.uint64)
+                valid[column] = numpy.array(present, dtype=bool)
+            else:
+                values[column] = array('Q', raw)
+                valid[column] = present
+        return cls(uptime, list(table.indexes), values, valid)
+
+    def __len__(self):
+        return len(self.indexes)
+
+class Rates:
+    """
+    Per-second rates over an interval, one float column per counter with NaN where no rate
+    could be computed (missing values, new rows, 64-bit counters going backwards)
+    """
+    __slots__ = ('indexes', 'columns', 'interval', '_positions')
+
+    def __init__(self, indexes, columns, interval):
+        self.indexes = indexes
+        self.columns = columns
+        self.interval = interval
+        self._positions = None
+
+    def column(self, column):
+        return self.columns[column]
+
+    def get(self, index, column, default=None):
+        if self._positions is None:
+            self._positions = {index: position for position, index in enumerate(self.indexes)}
+        position = self._positions.get(index)
+        if position is None or column not in self.columns:
+            return default
+        rate = float(self.columns[column][position])
+        return default if math.isnan(rate) else rate
+
+    def rows(self):
+        """
+        Yields (index, {column: rate}) leaving out NaN rates
+        """
+        columns = {column: list(values) for column, values in self.columns.items()}
+        for position, index in enumerate(self.indexes):
+            yield index, {column: values[position] for column, values in columns.items() if not math.isnan(values[position])}
+
+    def to_dict(self):
+        return dict(self.rows())
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __repr__(self):
+        return f'<Rates columns={list(self.columns)} rows={len(self.indexes)} interval={self.interval}>'
+
+def _interval(previous, current):
+    """
+    Seconds between samples from sysUpTime, or None if the device rebooted (or sysUpTime wrapped)
+    """
+    if previous.uptime is None or current.uptime is None:
+        return current.taken - previous.taken or None
+    if current.uptime <= previous.uptime:
+        return None
+    return (current.uptime - previous.uptime) / 100
+
+def _positions(previous, current):
+    """
+    Position of each current row in previous, -1 for new rows, or None when rows line up
+    """
+    if previous.indexes == current.indexes:
+        return None
+    lookup = {index: position for position, index in enumerate(previous.indexes)}
+    return [lookup.get(index, -1) for index in current.indexes]
+
+def _numpy_rates(previous, current, interval, positions):
+    columns = {}
+    if positions is not None:
+        positions = numpy.array(positions, dtype=numpy.int64)
+        known = positions >= 0
+        positions = numpy.where(known, positions, 0)
+    for column, values in current.values.items():
+        if column not in previous.values:
+            continue
+        before = previous.values[column]
+        valid = current.valid[column]
+        if positions is None:
+            before_valid = previous.valid[column]
+        else:
+            before = before[positions]
+            before_valid = previous.valid[column][positions] & known
+        valid = valid & before_valid
+        delta = values - before
+        if width(column) == 32:
+            delta &= numpy.uint64(_MASKS[32])
+        else:
+            valid &= values >= before
+        rate = delta.astype(numpy.float64) / interval
+        rate[~valid] = numpy.nan
+        columns[column] = rate
+    return columns
+
+def _array_rates(previous, current, interval, positions):
+    nan = float('nan')
+    columns = {}
+    for column, values in current.values.items():
+        if column not in previous.values:
+            continue
+        before = previous.values[column]
+        before_valid = previous.valid[column]
+        if positions is not None:
+            before = [before[position] if position >= 0 else 0 for position in positions]
+            before_valid = [position >= 0 and before_valid[position] for position in positions]
+        mask = _MASKS[width(column)]
+        wraps = width(column) == 32
+        columns[column] = array('d', ((((value - old) & mask) / interval if wraps or value >= old else nan) if present and was else nan
+                for value, old, present, was in zip(values, before, current.valid[column], before_valid)))
+    return columns
+
+def rates(previous, current):
+    """
+    Rates between two Samples of one host, None if the device rebooted in between
+    """
+    interval = _interval(previous, current)
+    if not interval or not previous.indexes:
+        return
+    positions = _positions(previous, current)
+    compute = _numpy_rates if numpy is not None else _array_rates
+    return Rates(current.indexes, compute(previous, current, interval, positions), interval)
+
+class CounterStore:
+    """
+    Keeps each host's previous Sample and turns the next one into Rates
+    """
+    def __init__(self):
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def update(self, host, sample):
+        """
+        Stores sample and returns the Rates since the previous one, None for
+        the first sample of a host or after a reboot
+        """
+        with self._lock:
+            previous = self._samples.get(host)
+            self._samples[host] = sample
+        if previous is None:
+            return
+        return rates(previous, sample)
+
+    def discard(self, host):
+        with self._lock:
+            self._samples.pop(host, None)
+
+    def __len__(self):
+        return len(self._samples)
@@ -0,0 +1,462 @@
+"""
+Native asyncio SNMPv1/v2c engine. Requests from every coroutine on a loop share
+one datagram socket per address family, responses are matched back by request-id
+and retries/timeouts are driven by loop timers, so no threads are involved.
+"""
+import socket
+import asyncio
+import weakref
+import ipaddress
+import itertools
+import contextvars
+from functools import partial
+
+from poller import Timing
+from poller import Metrics
+from poller.utils import BERUtils, OIDUtils
+from poller.Table import Table, make_index
+
+SNMP_PORT = 161
+RECEIVE_BUFFER = 8 * 1024 * 1024
+WIRE_VERSIONS = {1: 0, 2: 1, '1': 0, '2': 1, '2c': 1}
+
+class SnmpError(Exception):
+    pass
+
+class SnmpTimeout(SnmpError):
+    pass
+
+class SnmpTooBig(SnmpError):
+    pass
+
+class SnmpCircuitOpen(SnmpTimeout):
+    pass
+
+class SnmpDeadlineExceeded(SnmpTimeout):
+    pass
+
+_OPERATIONS = {BERUtils.GET_REQUEST: 'get', BERUtils.GET_NEXT_REQUEST: 'get_next', BERUtils.GET_BULK_REQUEST: 'get_bulk'}
+
+ERROR_STATUS = {1: 'tooBig', 2: 'noSuchName', 3: 'badValue', 4: 'readOnly', 5: 'genErr',
+        6: 'noAccess', 7: 'wrongType', 8: 'wrongLength', 9: 'wrongEncoding', 10: 'wrongValue',
+        11: 'noCreation', 12: 'inconsistentValue', 13: 'resourceUnavailable', 14: 'commitFailed',
+        15: 'undoFailed', 16: 'authorizationError', 17: 'notWritable', 18: 'inconsistentName'}
+
+class Varbind:
+    """
+    Response variable exposing the same attributes as easysnmp.SNMPVariable,
+    with names and string values worked out only when asked for
+    """
+    __slots__ = ('numeric', 'tag', 'raw', '_name')
+
+    def __init__(self, numeric, tag, raw):
+        self.numeric = numeric
+        self.tag = tag
+        self.raw = raw
+        self._name = None
+
+    def _translate(self):
+        if self._name is None:
+            self._name = OIDUtils.translate(self.numeric)
+        return self._name
+
+    @property
+    def oid(self):
+        return self._translate()[0]
+
+    @property
+    def oid_index(self):
+        return self._translate()[1]
+
+    @property
+    def value(self):
+        return BERUtils.format_value(self.tag, self.raw)
+
+    @property
+    def snmp_type(self):
+        return BERUtils.TYPE_NAMES.get(self.tag, 'OCTETSTR')
+
+    def __repr__(self):
+        return f"<Varbind value='{self.value}' (oid='{self.oid}', oid_index='{self.oid_index}', snmp_type='{self.snmp_type}')>"
+
+class _Pending:
+    __slots__ = ('future', 'payload', 'address', 'transport', 'retries', 'timeout', 'timer', 'sent', 'backoff', 'deadline', 'capped', 'received')
+
+class _Protocol(asyncio.DatagramProtocol):
+    def __init__(self, engine):
+        self.engine = engine
+
+    def datagram_received(self, data, addr):
+        self.engine._received(data, addr)
+
+    def error_received(self, exc):
+        pass
+
+class SnmpEngine:
+    """
+    Keeps every outstanding request of one event loop in a single table keyed by request-id.
+    Round trips and timeouts are reported to hosts, a Timing.HostTracker, which also picks
+    the timeout and turns away hosts with an open circuit for requests made with timeout=None
+    """
+    def __init__(self, loop=None, port=SNMP_PORT, hosts=None):
+        self.loop = loop or asyncio.get_event_loop()
+        self.port = port
+        self.hosts = hosts or Timing.tracker
+        self._pending = {}
+        self._transports = {}
+        self._opening = {}
+        self._addresses = {}
+        self._ids = itertools.count(1)
+
+    def _next_id(self):
+        while True:
+            request_id = next(self._ids) & 0x7fffffff
+            if request_id and request_id not in self._pending:
+                return request_id
+
+    async def _transport(self, family):
+        transport = self._transports.get(family)
+        if transport:
+            return transport
+        if family not in self._opening:
+            local = ('::', 0) if family == socket.AF_INET6 else ('0.0.0.0', 0)
+            self._opening[family] = self.loop.create_task(self.loop.create_datagram_endpoint(partial(_Protocol, self), local_addr=local, family=family))
+        transport, _ = await asyncio.shield(self._opening[family])
+        sock = transport.get_extra_info('socket')
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+        except OSError:
+            pass
+        self._transports[family] = transport
+        return transport
+
+    async def _resolve(self, host):
+        address = self._addresses.get(host)
+        if address:
+            return address
+        name, port = host, self.port
+        if name.startswith('['):
+            name, _, rest = name[1:].partition(']')
+            port = int(rest.lstrip(':')) if rest else port
+        elif name.count(':') == 1:
+            name, port = name.split(':')
+            port = int(port)
+        try:
+            parsed = ipaddress.ip_address(name)
+            family = socket.AF_INET6 if parsed.version == 6 else socket.AF_INET
+            address = (family, (str(parsed), port))
+        except ValueError:
+            #Name lookups go through the loop resolver once per host
+            info = await self.loop.getaddrinfo(name, port, type=socket.SOCK_DGRAM)
+            if not info:
+                raise SnmpError(f'Unable to resolve {host}')
+            address = (info[0][0], info[0][4][:2])
+        self._addresses[host] = address
+        return address
+
+    def _received(self, data, addr):
+        try:
+            request_id = BERUtils.peek_request_id(data)
+        except (BERUtils.DecodeError, ValueError):
+            return
+        pending = self._pending.get(request_id)
+        if not pending or pending.future.done() or addr[0] != pending.address[0]:
+            return
+        try:
+            message = BERUtils.decode_message(data)
+        except (BERUtils.DecodeError, ValueError, IndexError) as err:
+            pending.future.set_exception(SnmpError(f'Undecodable response: {err}'))
+            return
+        pending.received = len(data)
+        pending.future.set_result(message)
+
+    def _expired(self, request_id):
+        pending = self._pending.get(request_id)
+        if not pending or pending.future.done():
+            return
+        remaining = pending.deadline.remaining() if pending.deadline else None
+        if pending.retries > 0 and (remaining is None or remaining > 0):
+            pending.retries -= 1
+            pending.sent = None
+            if pending.backoff:
+                pending.timeout = min(pending.timeout * 2, self.hosts.max_timeout)
+            if remaining is not None and remaining < pending.timeout:
+                pending.timeout = remaining
+                pending.capped = True
+            pending.transport.sendto(pending.payload, pending.address)
+            pending.timer = self.loop.call_later(pending.timeout, self._expired, request_id)
+        elif pending.capped or (pending.retries > 0 and remaining is not None):
+            pending.future.set_exception(SnmpDeadlineExceeded(f'Deadline passed polling {pending.address[0]}'))
+        else:
+            pending.future.set_exception(SnmpTimeout(f'Timeout polling {pending.address[0]}'))
+
+    async def request(self, host, community, pdu_type, oids, version=2, timeout=1, retries=1, non_repeaters=0, max_repetitions=0):
+        """
+        Sends one PDU and returns (error_status, error_index, [(oid, tag, value), ...]).
+        With timeout=None the timeout adapts to the host's measured round trips, doubling
+        on each retry, and hosts whose circuit is open fail straight away. Attempts never
+        outlast the Timing deadline in force. Each request is reported to Metrics hooks if any are set
+        """
+        event = Metrics.start(host, _OPERATIONS.get(pdu_type, 'request'))
+        if event is None:
+            return await self._request(host, community, pdu_type, oids, version, timeout, retries, non_repeaters, max_repetitions)
+        try:
+            result = await self._request(host, community, pdu_type, oids, version, timeout, retries, non_repeaters, max_repetitions, event)
+        except BaseException as err:
+            event.finish(Metrics.classify(err))
+            raise
+        event.finish(Metrics.status_error(result[0]), result[2])
+        return result
+
+    async def _request(self, host, community, pdu_type, oids, version, timeout, retries, non_repeaters, max_repetitions, event=None):
+        wire_version = WIRE_VERSIONS.get(version)
+        if wire_version is None:
+            raise SnmpError(f'Unsupported SNMP version {version}')
+        adaptive = timeout is None
+        if adaptive:
+            if not self.hosts.allow(host):
+                raise SnmpCircuitOpen(f'{host}: not polled, circuit open after repeated timeouts')
+            timeout = self.hosts.timeout(host)
+        deadline = Timing.current()
+        capped = False
+        if deadline is not None:
+            remaining = deadline.remaining()
+            if remaining <= 0:
+                raise SnmpDeadlineExceeded(f'{host}: not polled, deadline passed')
+            if remaining < timeout:
+                timeout = remaining
+                capped = True
+        family, address = await self._resolve(host)
+        transport = await self._transport(family)
+        request_id = self._next_id()
+        pending = _Pending()
+        pending.future = self.loop.create_future()
+        pending.payload = BERUtils.encode_request(wire_version, community, pdu_type, request_id, oids, non_repeaters, max_repetitions)
+        pending.address = address
+        pending.transport = transport
+        pending.retries = retries
+        pending.timeout = timeout
+        pending.backoff = adaptive
+        pending.deadline = deadline
+        pending.capped = capped
+        pending.timer = None
+        pending.received = None
+        self._pending[request_id] = pending
+        try:
+            transport.sendto(pending.payload, address)
+            pending.sent = self.loop.time()
+            pending.timer = self.loop.call_later(timeout, self._expired, request_id)
+            message = await pending.future
+        except SnmpDeadlineExceeded:
+            raise
+        except SnmpTimeout:
+            self.hosts.failure(host)
+            raise
+        finally:
+            self._pending.pop(request_id, None)
+            if pending.timer:
+                pending.timer.cancel()
+            if event is not None:
+                event.retries = retries - pending.retries
+                event.pdus = event.retries + 1
+                event.sent = len(pending.payload) * event.pdus
+                event.received = pending.received
+        #Karn's rule, retransmitted requests say nothing about the round trip
+        if pending.sent is not None:
+            self.hosts.observe(host, self.loop.time() - pending.sent)
+        self.hosts.success(host)
+        _, _, _, _, error_status, error_index, varbinds = message
+        return error_status, error_index, varbinds
+
+    def _check(self, error_status, error_index, host):
+        if error_status == 1:
+            raise SnmpTooBig(f'{host}: tooBig')
+        if error_status:
+            raise SnmpError(f'{host}: {ERROR_STATUS.get(error_status, error_status)} at index {error_index}')
+
+    async def get(self, oids, host, community, **kwargs):
+        oids = [OIDUtils.resolve(oid) for oid in _oid_list(oids)]
+        error_status, error_index, varbinds = await self.request(host, community, BERUtils.GET_REQUEST, oids, **kwargs)
+        self._check(error_status, error_index, host)
+        return [Varbind(*varbind) for varbind in varbinds]
+
+    async def get_next(self, oids, host, community, **kwargs):
+        oids = [OIDUtils.resolve(oid) for oid in _oid_list(oids)]
+        error_status, error_index, varbinds = await self.request(host, community, BERUtils.GET_NEXT_REQUEST, oids, **kwargs)
+        self._check(error_status, error_index, host)
+        return [Varbind(*varbind) for varbind in varbinds]
+
+    async def get_bulk(self, oids, host, community, non_repeaters=0, max_repetitions=10, **kwargs):
+        oids = [OIDUtils.resolve(oid) for oid in _oid_list(oids)]
+        if kwargs.get('version', 2) in (1, '1'):
+            raise SnmpError('GETBULK is not available in SNMPv1')
+        error_status, error_index, varbinds = await self.request(host, community, BERUtils.GET_BULK_REQUEST, oids,
+                non_repeaters=non_repeaters, max_repetitions=max_repetitions, **kwargs)
+        self._check(error_status, error_index, host)
+        return [Varbind(*varbind) for varbind in varbinds]
+
+    async def walk(self, oid, host, community, bulk=False, max_repetitions=25, **kwargs):
+        """
+        Walks the subtree under oid with GETNEXT, or GETBULK when bulk is set on v2c
+        """
+        result = []
+        async for page in self.iter_walk(oid, host, community, bulk=bulk, max_repetitions=max_repetitions, **kwargs):
+            result.extend(page)
+        return result
+
+    async def iter_walk(self, oid, host, community, bulk=True, max_repetitions=25, **kwargs):
+        """
+        Async generator yielding the Varbinds under oid one response at a time,
+        with GETBULK on v2c unless bulk is unset, and GETNEXT on v1
+        """
+        root = OIDUtils.resolve(oid)
+        depth = len(root)
+        current = root
+        use_bulk = bulk and kwargs.get('version', 2) not in (1, '1')
+        while True:
+            if use_bulk:
+                error_status, error_index, varbinds = await self.request(host, community, BERUtils.GET_BULK_REQUEST, [current],
+                        non_repeaters=0, max_repetitions=max_repetitions, **kwargs)
+                if error_status == 1 and max_repetitions > 1:
+                    max_repetitions //= 2
+                    continue
+            else:
+                error_status, error_index, varbinds = await self.request(host, community, BERUtils.GET_NEXT_REQUEST, [current], **kwargs)
+            if error_status == 2:
+                return
+            self._check(error_status, error_index, host)
+            page = []
+            for numeric, tag, raw in varbinds:
+                if tag == BERUtils.ENDOFMIBVIEW or numeric[:depth] != root or numeric <= current:
+                    break
+                page.append(Varbind(numeric, tag, raw))
+                current = numeric
+            if page:
+                yield page
+            if len(page) < len(varbinds) or not varbinds:
+                return
+
+    async def walk_columns(self, columns, host, community, max_repetitions=25, **kwargs):
+        """
+        Async generator walking several table columns side by side in one GETBULK stream,
+        yielding [(column position, Varbind), ...] for each response. Columns drop out of
+        the request as they run off the end of their subtree, and max_repetitions is
+        halved whenever the agent answers tooBig
+        """
+        async for batch, ended in self.column_stream(columns, host, community, max_repetitions, **kwargs):
+            if batch:
+                yield batch
+
+    async def column_stream(self, columns, host, community, max_repetitions=25, **kwargs):
+        """
+        walk_columns yielding (batch, ended) for every response, ended being the positions of the
+        columns that ran off their subtree in it. A column missing from a response cut short by
+        max_repetitions or size is still walking
+        """
+        roots = [OIDUtils.resolve(column) for column in columns]
+        cursors = list(roots)
+        active = list(range(len(roots)))
+        while active:
+            error_status, error_index, varbinds = await self.request(host, community, BERUtils.GET_BULK_REQUEST,
+                    [cursors[position] for position in active], non_repeaters=0, max_repetitions=max_repetitions, **kwargs)
+            if error_status == 1 and max_repetitions > 1:
+                max_repetitions //= 2
+                continue
+            self._check(error_status, error_index, host)
+            if not varbinds:
+                return
+            width = len(active)
+            finished = set()
+            batch = []
+            for offset, (numeric, tag, raw) in enumerate(varbinds):
+                position = active[offset % width]
+                if position in finished:
+                    continue
+                root = roots[position]
+                if tag == BERUtils.ENDOFMIBVIEW or numeric[:len(root)] != root or numeric <= cursors[position]:
+                    finished.add(position)
+                    continue
+                cursors[position] = numeric
+                batch.append((position, Varbind(numeric, tag, raw)))
+            active = [position for position in active if position not in finished]
+            yield batch, finished
+
+    def close(self):
+        for transport in self._transports.values():
+            transport.close()
+        self._transports.clear()
+        self._opening.clear()
+        for pending in self._pending.values():
+            if not pending.future.done():
+                pending.future.cancel()
+
+_engines = weakref.WeakKeyDictionary()
+
+def get_engine(loop=None):
+    """
+    Returns the engine bound to the running (or given) loop, creating it on first use
+    """
+    loop = loop or asyncio.get_event_loop()
+    engine = _engines.get(loop)
+    if engine is None:
+        engine = _engines[loop] = SnmpEngine(loop)
+    return engine
+
+def supports(version, oids=()):
+    """
+    Whether the engine can serve version and oids. Object names OIDUtils does not know are left
+    to pooled easysnmp sessions, which resolve them through net-snmp's loaded MIBs
+    """
+    if isinstance(oids, str) or isinstance(oids, tuple) and oids and isinstance(oids[0], int):
+        oids = [oids]
+    #('ifDescr', '3') pairs and column tuples are checked part by part, a bare index always resolves
+    return version in WIRE_VERSIONS and all(OIDUtils.known(oid) for oid in oids)
+
+def _oid_list(oids):
+    #Accepts the same shapes as easysnmp: 'oid', ('oid', 'index') or a list of either
+    if isinstance(oids, (str, tuple)):
+        oids = [oids]
+    return [".".join(str(part) for part in oid if part != '') if isinstance(oid, tuple) and oid and isinstance(oid[0], str) else oid for oid in oids]
+
+#Coroutine counterparts of the easysnmp module-level helpers
+async def snmp_get(oids, hostname, community, version=2, retries=1, timeout=1, **kwargs):
+    if not supports(version, oids):
+        return await _executor('get', oids, hostname=hostname, community=community, version=version, retries=retries, timeout=timeout, **kwargs)
+    return await get_engine().get(oids, hostname, community, version=version, retries=retries, timeout=timeout)
+
+async def snmp_get_next(oids, hostname, community, version=2, retries=1, timeout=1, **kwargs):
+    if not supports(version, oids):
+        return await _executor('get_next', oids, hostname=hostname, community=community, version=version, retries=retries, timeout=timeout, **kwargs)
+    return await get_engine().get_next(oids, hostname, community, version=version, retries=retries, timeout=timeout)
+
+async def snmp_get_bulk(oids, hostname, community, non_repeaters=0, max_repetitions=10, version=2, retries=1, timeout=1, **kwargs):
+    if not supports(version, oids):
+        return await _executor('get_bulk', oids, non_repeaters, max_repetitions,
+                hostname=hostname, community=community, version=version, retries=retries, timeout=timeout, **kwargs)
+    return await get_engine().get_bulk(oids, hostname, community, non_repeaters=non_repeaters, max_repetitions=max_repetitions,
+            version=version, retries=retries, timeout=timeout)
+
+async def snmp_walk(oid, hostname, community, version=2, retries=1, timeout=1, **kwargs):
+    if not supports(version, oid):
+        return await _executor('walk', oid, hostname=hostname, community=community, version=version, retries=retries, timeout=timeout, **kwargs)
+    return await get_engine().walk(oid, hostname, community, version=version, retries=retries, timeout=timeout)
+
+async def snmp_table(columns, hostname, community, max_repetitions=25, version=2, retries=1, timeout=1):
+    """
+    Collects columns with one GETBULK stream into a Table
+    """
+    depths = [len(OIDUtils.resolve(column)) for column in columns]
+    table = Table(columns)
+    async for batch in get_engine().walk_columns(columns, hostname, community, max_repetitions=max_repetitions, version=version, retries=retries, timeout=timeout):
+        for position, varbind in batch:
+            table.add(columns[position], make_index(varbind.numeric[depths[position]:]), varbind.raw, varbind.tag)
+    return table
+
+async def _executor(method, *args, hostname, community, **kwargs):
+    #SNMPv3 needs net-snmp's USM handling, so it is still served by a pooled easysnmp session in a thread
+    from poller import SessionPool
+    def call():
+        with SessionPool.session(hostname, community, **kwargs) as session:
+            return getattr(session, method)(*args)
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, contextvars.copy_context().run, call)
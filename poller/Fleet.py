@@ -0,0 +1,254 @@
+"""
+Bounded-concurrency runner for polling large host lists
+"""
+import sys
+import time
+import queue
+import asyncio
+import logging
+import itertools
+import threading
+import ipaddress
+import multiprocessing
+
+from poller import Poller
+from poller import SessionPool
+
+def read_hosts(source):
+    """
+    Lazily yields hosts from a file path, '-' for stdin, an open file or any iterable,
+    skipping blank lines and # comments
+    """
+    if isinstance(source, str):
+        if source == '-':
+            yield from read_hosts(sys.stdin)
+            return
+        with open(source, 'r') as hosts:
+            yield from read_hosts(hosts)
+        return
+    for line in source:
+        host = line.split('#', 1)[0].strip()
+        if host:
+            yield host
+
+def subnet_group(host, v4_prefix=24, v6_prefix=64):
+    """
+    Groups IP literal hosts by subnet, anything else is its own group
+    """
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return host
+    prefix = v4_prefix if address.version == 4 else v6_prefix
+    return ipaddress.ip_network((address, prefix), strict=False)
+
+class _GroupLimiter:
+    """
+    Per-group semaphores that only exist while the group has hosts in flight
+    """
+    def __init__(self, limit, key):
+        self.limit = limit
+        self.key = key
+        self._groups = {}
+
+    async def acquire(self, host):
+        group = self.key(host)
+        entry = self._groups.get(group)
+        if entry is None:
+            entry = self._groups[group] = [asyncio.Semaphore(self.limit), 0]
+        entry[1] += 1
+        await entry[0].acquire()
+        return group
+
+    def release(self, group):
+        entry = self._groups[group]
+        entry[0].release()
+        entry[1] -= 1
+        if not entry[1]:
+            del self._groups[group]
+
+class _Unreachable:
+    """
+    Result reported for hosts dropped by the ping stage
+    """
+    __slots__ = ()
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return 'unreachable'
+
+    def __reduce__(self):
+        #Unpickles to the module singleton, so results from run_sharded workers still pass `is UNREACHABLE`
+        return 'UNREACHABLE'
+
+UNREACHABLE = _Unreachable()
+
+async def _live(hosts, results, options):
+    """
+    Passes on hosts that answer ping and reports the rest to results straight away
+    """
+    async for host, rtt in Poller.async_ping_sweep(hosts, **options):
+        if rtt is None:
+            await results.put((host, UNREACHABLE))
+        else:
+            yield host
+
+async def run(func, hosts, concurrency=1000, per_group=None, group=subnet_group, ping=None):
+    """
+    Runs coroutine function func(host) over hosts, yielding (host, result) as each finishes.
+    At most concurrency hosts are in flight overall and at most per_group per group(host),
+    /24 (or /64) by default. Hosts are pulled from the source only as slots free up and
+    results wait in a bounded queue, so memory stays flat however long the host list is.
+    With ping set (True or a dict of Poller.async_ping_sweep options) hosts are swept with
+    fping first and only live ones reach func, the rest yield (host, UNREACHABLE) at once.
+    Errors from func are logged and yield (host, None), but a failing host source or ping
+    stage is raised once the results already in are out.
+    """
+    if isinstance(hosts, str):
+        hosts = read_hosts(hosts)
+    limiter = _GroupLimiter(per_group, group) if per_group else None
+    results = asyncio.Queue(maxsize=concurrency)
+    done = object()
+    if ping:
+        hosts = _live(hosts, results, ping if isinstance(ping, dict) else {})
+    source = hosts.__aiter__() if hasattr(hosts, '__aiter__') else iter(hosts)
+    pulling = asyncio.Lock()
+
+    async def next_host():
+        if hasattr(source, '__anext__'):
+            async with pulling:
+                try:
+                    return await source.__anext__()
+                except StopAsyncIteration:
+                    return done
+        return next(source, done)
+
+    async def worker():
+        while True:
+            host = await next_host()
+            if host is done:
+                return
+            group = await limiter.acquire(host) if limiter else None
+            try:
+                result = await func(host)
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                logging.debug(f'Fleet.run {host}: {err!r}')
+                result = None
+            finally:
+                if limiter:
+                    limiter.release(group)
+            await results.put((host, result))
+
+    async def supervise(workers):
+        outcome = await asyncio.gather(*workers, return_exceptions=True)
+        await results.put(done)
+        return [err for err in outcome if isinstance(err, Exception)]
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+    supervisor = asyncio.ensure_future(supervise(workers))
+    try:
+        while True:
+            item = await results.get()
+            if item is done:
+                break
+            yield item
+        errors = await supervisor
+        if errors:
+            raise errors[0]
+    finally:
+        for task in workers + [supervisor]:
+            task.cancel()
+
+async def collect(func, hosts, **kwargs):
+    """
+    Runs func over hosts and returns {host: result}
+    """
+    return {host: result async for host, result in run(func, hosts, **kwargs)}
+
+def _shard_worker(func, tasks, results, kwargs, batch_size, flush_interval):
+    """
+    Body of one shard process: its own loop, engine and session pool, pulling host chunks
+    from tasks and sending results back in pickled batches
+    """
+    SessionPool.pool.clear()
+
+    async def hosts():
+        loop = asyncio.get_event_loop()
+        while True:
+            chunk = await loop.run_in_executor(None, tasks.get)
+            if chunk is None:
+                return
+            for host in chunk:
+                yield host
+
+    async def main():
+        batch = []
+        flushed = time.monotonic()
+        async for item in run(func, hosts(), **kwargs):
+            batch.append(item)
+            if len(batch) >= batch_size or time.monotonic() - flushed >= flush_interval:
+                results.put(batch)
+                batch = []
+                flushed = time.monotonic()
+        if batch:
+            results.put(batch)
+
+    try:
+        asyncio.run(main())
+    except Exception as err:
+        #Handed back so run_sharded raises it instead of finishing short
+        results.put(err)
+    finally:
+        results.put(None)
+
+def _feed(hosts, tasks, processes, chunk_size):
+    for chunk in iter(lambda: list(itertools.islice(hosts, chunk_size)), []):
+        tasks.put(chunk)
+    for _ in range(processes):
+        tasks.put(None)
+
+def run_sharded(func, hosts, processes=None, chunk_size=256, batch_size=512, flush_interval=0.5, **kwargs):
+    """
+    Spreads hosts over processes worker processes (one per core by default), each running
+    run(func, ..., **kwargs) on its own event loop, and yields (host, result) as batches come
+    back. func has to pickle, so use a module level coroutine function or a partial of one.
+    Hosts go out chunk_size at a time to whichever worker is free. An error that stops a
+    worker, such as a failing ping stage, is raised here.
+    """
+    processes = processes or multiprocessing.cpu_count()
+    if isinstance(hosts, str):
+        hosts = read_hosts(hosts)
+    hosts = iter(hosts)
+    tasks = multiprocessing.Queue(maxsize=processes * 2)
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_shard_worker, args=(func, tasks, results, kwargs, batch_size, flush_interval), daemon=True)
+            for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    feeder = threading.Thread(target=_feed, args=(hosts, tasks, processes, chunk_size), daemon=True)
+    feeder.start()
+    finished = 0
+    try:
+        while finished < processes:
+            try:
+                batch = results.get(timeout=1)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    logging.debug('Fleet.run_sharded: workers exited without finishing')
+                    return
+                continue
+            if batch is None:
+                finished += 1
+                continue
+            if isinstance(batch, Exception):
+                raise batch
+            yield from batch
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
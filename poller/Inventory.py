@@ -0,0 +1,135 @@
+"""
+ENTITY-MIB physical inventory: entPhysicalTable rows decoded into entities and linked into
+their containment tree, with chassis counts and serial numbers read off the tree
+"""
+from poller.Neighbors import octets, text, number
+
+ENTITY_COLUMNS = ('entPhysicalDescr', 'entPhysicalVendorType', 'entPhysicalContainedIn', 'entPhysicalClass',
+        'entPhysicalParentRelPos', 'entPhysicalName', 'entPhysicalHardwareRev', 'entPhysicalFirmwareRev',
+        'entPhysicalSoftwareRev', 'entPhysicalSerialNum', 'entPhysicalMfgName', 'entPhysicalModelName', 'entPhysicalIsFRU')
+
+#PhysicalClass
+CLASSES = {1: 'other', 2: 'unknown', 3: 'chassis', 4: 'backplane', 5: 'container', 6: 'powerSupply',
+        7: 'fan', 8: 'sensor', 9: 'module', 10: 'port', 11: 'stack', 12: 'cpu'}
+
+class Entity:
+    """
+    One entPhysicalTable row. parent is the entPhysicalContainedIn index (0 for none), position
+    its entPhysicalParentRelPos and children the entities contained in it, in position order
+    """
+    __slots__ = ('index', 'parent', 'position', 'entity_class', 'name', 'descr', 'model', 'serial', 'hardware_rev',
+            'firmware_rev', 'software_rev', 'manufacturer', 'vendor_type', 'fru', 'children')
+
+    def __init__(self, index, parent=0, position=None, entity_class=None, name=None, descr=None, model=None, serial=None,
+            hardware_rev=None, firmware_rev=None, software_rev=None, manufacturer=None, vendor_type=None, fru=None):
+        self.index = index
+        self.parent = parent
+        self.position = position
+        self.entity_class = entity_class
+        self.name = name
+        self.descr = descr
+        self.model = model
+        self.serial = serial
+        self.hardware_rev = hardware_rev
+        self.firmware_rev = firmware_rev
+        self.software_rev = software_rev
+        self.manufacturer = manufacturer
+        self.vendor_type = vendor_type
+        self.fru = fru
+        self.children = []
+
+    def walk(self):
+        """
+        This entity and everything inside it, depth first
+        """
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self):
+        """
+        Compact nested form, fields without a value left out
+        """
+        result = {name: getattr(self, name) for name in self.__slots__[:-1] if name != 'parent' and getattr(self, name) not in (None, '')}
+        if self.children:
+            result['children'] = [child.to_dict() for child in self.children]
+        return result
+
+    def __repr__(self):
+        return f'<Entity {self.index} {self.entity_class} {self.name or self.descr} serial={self.serial}>'
+
+class Inventory:
+    """
+    Entities by index and the roots of their containment tree (entities contained in nothing,
+    or in an index the agent did not list)
+    """
+    __slots__ = ('entities', 'roots')
+
+    def __init__(self, entities):
+        self.entities = {entity.index: entity for entity in entities}
+        self.roots = []
+        for entity in self.entities.values():
+            parent = self.entities.get(entity.parent) if entity.parent != entity.index else None
+            (parent.children if parent else self.roots).append(entity)
+        for entity in self.entities.values():
+            entity.children.sort(key=_order)
+        self.roots.sort(key=_order)
+
+    def __len__(self):
+        return len(self.entities)
+
+    def walk(self):
+        for root in self.roots:
+            yield from root.walk()
+
+    def chassis(self):
+        """
+        Chassis entities, stack members included, in tree order
+        """
+        return [entity for entity in self.walk() if entity.entity_class == 'chassis']
+
+    def chassis_count(self):
+        return len(self.chassis())
+
+    def serials(self, entity_class=None):
+        """
+        {index: serial} of entities with a serial number, of entity_class only when given
+        """
+        return {entity.index: entity.serial for entity in self.walk()
+                if entity.serial and (entity_class is None or entity.entity_class == entity_class)}
+
+    def serial_number(self):
+        """
+        Serial of the first chassis that has one, None when none does
+        """
+        return next((entity.serial for entity in self.chassis() if entity.serial), None)
+
+    def to_dict(self):
+        return {'chassis': self.chassis_count(), 'entities': [root.to_dict() for root in self.roots]}
+
+    def __repr__(self):
+        return f'<Inventory entities={len(self.entities)} chassis={self.chassis_count()}>'
+
+def _order(entity):
+    return (entity.position if entity.position is not None and entity.position >= 0 else float('inf'), entity.index)
+
+def _object_id(value):
+    if isinstance(value, tuple):
+        value = "." + ".".join(map(str, value))
+    else:
+        value = text(value)
+    #zeroDotZero stands for an unknown vendor type
+    return None if not value or value.strip('.') in ('0.0', 'ccitt.0') else value
+
+def entity(index, values):
+    """
+    Entity for an entPhysicalTable row, values in ENTITY_COLUMNS order
+    """
+    descr, vendor_type, contained_in, entity_class, position, name, hardware_rev, firmware_rev, software_rev, serial, manufacturer, model, fru = values
+    return Entity(index[0], number(contained_in) or 0, number(position), CLASSES.get(number(entity_class)), _strip(name), _strip(descr),
+            _strip(model), _strip(serial), _strip(hardware_rev), _strip(firmware_rev), _strip(software_rev), _strip(manufacturer),
+            _object_id(vendor_type), {1: True, 2: False}.get(number(fru)))
+
+def _strip(value):
+    value = text(octets(value))
+    return value.strip() or None if value else None
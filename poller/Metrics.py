@@ -0,0 +1,380 @@
+"""
+Instrumentation for every SNMP request the poller makes. Hooks added with add_hook are called
+with a RequestEvent per request, labelled with the Poller helper that made it, and enable()
+installs a Registry that aggregates events into counters and latency histograms for a
+Prometheus text dump. With no hooks set nothing is measured or built.
+"""
+import os
+import time
+import inspect
+import logging
+import threading
+import ipaddress
+import contextvars
+from functools import wraps
+
+from poller.utils import BERUtils
+
+hooks = []
+registry = None
+
+_helper = contextvars.ContextVar('helper', default=None)
+
+_NO_SUCH_TAGS = (BERUtils.NOSUCHOBJECT, BERUtils.NOSUCHINSTANCE)
+_NO_SUCH_TYPES = ('NOSUCHOBJECT', 'NOSUCHINSTANCE')
+
+#Error classes by exception name, so neither easysnmp nor the Engine need importing here
+_ERROR_CLASSES = {
+    'SnmpCircuitOpen': 'circuit_open',
+    'SnmpDeadlineExceeded': 'deadline',
+    'SnmpTimeout': 'timeout',
+    'SnmpTooBig': 'too_big',
+    'EasySNMPTimeoutError': 'timeout',
+    'EasySNMPConnectionError': 'connection',
+    'EasySNMPNoSuchObjectError': 'no_such_object',
+    'EasySNMPNoSuchInstanceError': 'no_such_instance',
+    'EasySNMPNoSuchNameError': 'no_such_name',
+    'EasySNMPUnknownObjectIDError': 'unknown_oid',
+    'EasySNMPUndeterminedTypeError': 'undetermined_type',
+    'CancelledError': 'cancelled',
+    'gaierror': 'resolve',
+}
+
+_STATUS_CLASSES = {1: 'too_big', 2: 'no_such_name', 5: 'gen_err', 6: 'no_access', 16: 'auth'}
+
+def classify(err):
+    """
+    Short error class for an exception raised by a request: timeout, deadline, circuit_open,
+    auth, no_such_object and so on, or the lowercased exception name
+    """
+    message = str(err).lower()
+    if 'circuit open' in message:
+        return 'circuit_open'
+    if 'deadline passed' in message:
+        return 'deadline'
+    if 'authorizationerror' in message or 'authentication' in message or 'unknown user' in message:
+        return 'auth'
+    error = _ERROR_CLASSES.get(type(err).__name__)
+    if error:
+        return error
+    if 'toobig' in message or 'too big' in message:
+        return 'too_big'
+    if 'nosuchname' in message:
+        return 'no_such_name'
+    return type(err).__name__.lower()
+
+def status_error(error_status):
+    """
+    Error class for a non-zero error-status in a response PDU, None for noError
+    """
+    if not error_status:
+        return
+    return _STATUS_CLASSES.get(error_status, 'error_status')
+
+def no_such(varbinds):
+    """
+    Count of NOSUCHOBJECT/NOSUCHINSTANCE values among Engine tuples, Varbinds or easysnmp variables
+    """
+    count = 0
+    for varbind in varbinds:
+        if isinstance(varbind, tuple):
+            count += varbind[1] in _NO_SUCH_TAGS
+        else:
+            count += getattr(varbind, 'snmp_type', None) in _NO_SUCH_TYPES
+    return count
+
+class RequestEvent:
+    """
+    One SNMP request: operation is get, get_next, get_bulk, walk and the like, seconds its
+    wall time, pdus/sent/received/retries what went over the wire (None where a net-snmp
+    session hides it) and error the class from classify, None when it succeeded
+    """
+    __slots__ = ('helper', 'host', 'operation', 'started', 'seconds', 'pdus', 'varbinds', 'exceptions', 'sent', 'received', 'retries', 'error')
+
+    def __init__(self, host, operation):
+        self.helper = _helper.get()
+        self.host = host
+        self.operation = operation
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.pdus = None
+        self.varbinds = None
+        self.exceptions = None
+        self.sent = None
+        self.received = None
+        self.retries = None
+        self.error = None
+
+    def finish(self, error=None, varbinds=None):
+        self.seconds = time.perf_counter() - self.started
+        self.error = error
+        if varbinds is not None:
+            self.varbinds = len(varbinds)
+            self.exceptions = no_such(varbinds)
+        for hook in list(hooks):
+            try:
+                hook(self)
+            except Exception as err:
+                logging.debug(f'Metrics hook {hook!r}: {err!r}')
+
+    def __repr__(self):
+        return f'<RequestEvent {self.helper} {self.operation} {self.host} {self.seconds} error={self.error}>'
+
+def start(host, operation):
+    """
+    RequestEvent for a request about to be made, or None when there are no hooks
+    """
+    if hooks:
+        return RequestEvent(host, operation)
+
+def add_hook(hook):
+    """
+    Calls hook(event) after every request. Hooks run on the thread and in the context that
+    made the request, so a tracer can read its own span from a contextvar
+    """
+    if hook not in hooks:
+        hooks.append(hook)
+
+def remove_hook(hook):
+    if hook in hooks:
+        hooks.remove(hook)
+
+def helper():
+    """
+    Name of the outermost Poller helper running in this context, or None
+    """
+    return _helper.get()
+
+def traced(func):
+    """
+    Labels requests made while func runs with its name, unless an outer helper already did
+    """
+    name = func.__name__
+    #Look through other decorators for the kind of function underneath
+    inner = inspect.unwrap(func)
+    if inspect.isasyncgenfunction(inner):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not hooks or _helper.get() is not None:
+                async for item in func(*args, **kwargs):
+                    yield item
+                return
+            items = func(*args, **kwargs)
+            try:
+                while True:
+                    token = _helper.set(name)
+                    try:
+                        item = await items.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        _helper.reset(token)
+                    yield item
+            finally:
+                await items.aclose()
+    elif inspect.iscoroutinefunction(inner):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not hooks or _helper.get() is not None:
+                return await func(*args, **kwargs)
+            token = _helper.set(name)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _helper.reset(token)
+    elif inspect.isgeneratorfunction(inner):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            items = func(*args, **kwargs)
+            if not hooks or _helper.get() is not None:
+                return items
+            return _labelled(items, name)
+    else:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not hooks or _helper.get() is not None:
+                return func(*args, **kwargs)
+            token = _helper.set(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _helper.reset(token)
+    return wrapper
+
+def _labelled(items, name):
+    try:
+        while True:
+            token = _helper.set(name)
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                _helper.reset(token)
+            yield item
+    finally:
+        items.close()
+
+def host_group(host, v4_prefix=16, v6_prefix=48):
+    """
+    Network an IP literal host (with or without :port) falls in, 'other' for names
+    """
+    name = host
+    if name.startswith('['):
+        name = name[1:].partition(']')[0]
+    elif name.count(':') == 1:
+        name = name.split(':')[0]
+    try:
+        address = ipaddress.ip_address(name)
+    except ValueError:
+        return 'other'
+    prefix = v4_prefix if address.version == 4 else v6_prefix
+    return str(ipaddress.ip_network((address, prefix), strict=False))
+
+class _Series:
+    __slots__ = ('requests', 'errors', 'pdus', 'varbinds', 'exceptions', 'sent', 'received', 'retries', 'buckets', 'seconds')
+
+    def __init__(self, buckets):
+        self.requests = 0
+        self.errors = {}
+        self.pdus = 0
+        self.varbinds = 0
+        self.exceptions = 0
+        self.sent = 0
+        self.received = 0
+        self.retries = 0
+        self.buckets = [0] * len(buckets)
+        self.seconds = 0.0
+
+    def copy(self):
+        copied = _Series(self.buckets)
+        for attribute in self.__slots__:
+            value = getattr(self, attribute)
+            setattr(copied, attribute, value.copy() if isinstance(value, (dict, list)) else value)
+        return copied
+
+class Registry:
+    """
+    Hook aggregating RequestEvents by helper, operation and group(host) into request, error,
+    PDU, varbind, byte and retry counters and a latency histogram. group defaults to the /16
+    (or /48) a host is in, pass group=None for a single series per helper and operation
+    """
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, group=host_group, buckets=None):
+        self.group = group
+        if buckets is not None:
+            self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    def _group(self, host):
+        if self.group is None:
+            return 'all'
+        group = self._groups.get(host)
+        if group is None:
+            if len(self._groups) >= 100000:
+                self._groups.clear()
+            group = self._groups[host] = self.group(host)
+        return group
+
+    def __call__(self, event):
+        key = (event.helper or '', event.operation, self._group(event.host))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(self.buckets)
+            series.requests += 1
+            if event.error:
+                series.errors[event.error] = series.errors.get(event.error, 0) + 1
+            series.pdus += event.pdus or 0
+            series.varbinds += event.varbinds or 0
+            series.exceptions += event.exceptions or 0
+            series.sent += event.sent or 0
+            series.received += event.received or 0
+            series.retries += event.retries or 0
+            series.seconds += event.seconds
+            for position, bound in enumerate(self.buckets):
+                if event.seconds <= bound:
+                    series.buckets[position] += 1
+                    break
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def prometheus(self, prefix='snmp_'):
+        """
+        Everything recorded so far in the Prometheus text exposition format
+        """
+        with self._lock:
+            snapshot = [(key, value.copy()) for key, value in self._series.items()]
+        lines = []
+        counters = (('requests', 'SNMP requests made'), ('pdus', 'PDUs sent, retransmissions included'),
+                ('varbinds', 'Varbinds received'), ('exceptions', 'NOSUCHOBJECT/NOSUCHINSTANCE values received'),
+                ('sent', 'Bytes sent'), ('received', 'Bytes received'), ('retries', 'Retransmissions'))
+        for attribute, description in counters:
+            name = f'{prefix}{"bytes_" + attribute if attribute in ("sent", "received") else attribute}_total'
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} counter')
+            for key, value in snapshot:
+                lines.append(f'{name}{{{_labels(key)}}} {getattr(value, attribute)}')
+        name = f'{prefix}request_errors_total'
+        lines.append(f'# HELP {name} Failed SNMP requests by error class')
+        lines.append(f'# TYPE {name} counter')
+        for key, value in snapshot:
+            for error, count in sorted(value.errors.items()):
+                lines.append(f'{name}{{{_labels(key)},error="{_escape(error)}"}} {count}')
+        name = f'{prefix}request_seconds'
+        lines.append(f'# HELP {name} SNMP request latency')
+        lines.append(f'# TYPE {name} histogram')
+        for key, value in snapshot:
+            labels = _labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, value.buckets):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {value.requests}')
+            lines.append(f'{name}_sum{{{labels}}} {value.seconds}')
+            lines.append(f'{name}_count{{{labels}}} {value.requests}')
+        return '\n'.join(lines) + '\n'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(key):
+    helper, operation, group = key
+    return f'helper="{_escape(helper)}",operation="{_escape(operation)}",group="{_escape(group)}"'
+
+def enable(group=host_group, buckets=None):
+    """
+    Installs (or returns the already installed) module Registry as a hook
+    """
+    global registry
+    if registry is None:
+        registry = Registry(group, buckets)
+    add_hook(registry)
+    return registry
+
+def disable():
+    """
+    Removes the module Registry, leaving any other hooks in place
+    """
+    global registry
+    if registry is not None:
+        remove_hook(registry)
+        registry = None
+
+def dump(path=None):
+    """
+    Prometheus text for the module Registry, written to path when given (atomically,
+    for a node_exporter textfile collector) and returned
+    """
+    text = registry.prometheus() if registry is not None else ''
+    if path:
+        partial = f'{path}.tmp'
+        with open(partial, 'w') as output:
+            output.write(text)
+        os.replace(partial, path)
+    return text
@@ -0,0 +1,146 @@
+"""
+Compiled sysObjectID lookup built once from poller/translations
+"""
+import re
+import json
+import pkgutil
+from functools import lru_cache
+
+translations = json.loads(pkgutil.get_data('poller', 'translations'))
+
+#Bases whose model arcs start one arc further down
+_SKIP_ARCS = {'1.3.6.1.4.1.2636.1.1.1': 1}
+
+_ENTRY = object()
+
+def _build_trie(table):
+    trie = {}
+    for base, entry in table.items():
+        node = trie
+        for arc in base.split('.'):
+            node = node.setdefault(int(arc), {})
+        node[_ENTRY] = (base, entry, _SKIP_ARCS.get(base, 0))
+    return trie
+
+_trie = _build_trie(translations)
+
+def lookup(oid):
+    """
+    Longest-prefix match of an oid against the translation table, returning
+    (base, entry, model arcs as strings) or None
+    """
+    arcs = oid if isinstance(oid, tuple) else tuple(int(arc) for arc in oid.strip('.').split('.') if arc)
+    node = _trie
+    match = None
+    depth = 0
+    for depth, arc in enumerate(arcs, 1):
+        node = node.get(arc)
+        if node is None:
+            break
+        if _ENTRY in node:
+            match = (node[_ENTRY], depth)
+    if not match:
+        return
+    (base, entry, skip), depth = match
+    return base, entry, [str(arc) for arc in arcs[depth + skip:]]
+
+#Vendor decoders, each turning (entry, model arcs) into (series, model)
+def _decode_a10(entry, octets):
+    if len(octets) == 1:
+        return (entry.get(octets[0]) or {}).get('series'), None
+    subset = entry.get(octets[0]) or {}
+    return (subset.get(octets[1]) or {}).get('series'), None
+
+def _decode_arista(entry, octets):
+    model = ''.join(entry.get(octet) if entry.get(octet) else octet for octet in octets)
+    series = ''.join(entry.get(octet) if entry.get(octet) else octet for octet in octets[:2])
+    return series, model
+
+def _decode_cisco(entry, octets):
+    subset = entry.get(octets[0]) or {}
+    return subset.get('series'), subset.get('model')
+
+def _decode_nested(entry, octets):
+    subset = entry.get(octets[0])
+    if not subset:
+        return None, None
+    series = subset.get('series')
+    if len(octets) == 1:
+        return series, subset.get('model') if subset.get('model') else subset.get('base')
+    leaf = subset.get(octets[-1]) or {}
+    model = subset.get('model') if subset.get('model') else "".join((subset.get('base'), leaf.get('model')))
+    if not series and entry.get('make') == 'juniper':
+        series = "".join((subset.get('base'), leaf.get('series')))
+    return series, model
+
+DECODERS = {'a10': _decode_a10,
+        'arista': _decode_arista,
+        'cisco': _decode_cisco,
+        'alcatel': _decode_nested,
+        'juniper': _decode_nested,
+        'f5': _decode_nested}
+
+@lru_cache(maxsize=65536)
+def decode_sysobjectid(oid):
+    """
+    Decodes (make, series, model) from a sysObjectID alone. Vendors that carry
+    the model elsewhere (a10, niagara, avocent) come back partially filled in
+    """
+    match = lookup(oid)
+    if not match:
+        return None, None, None
+    base, entry, octets = match
+    make = entry.get('make')
+    decoder = DECODERS.get(make)
+    if not decoder or not octets:
+        return make, None, None
+    try:
+        series, model = decoder(entry, octets)
+    except (AttributeError, TypeError):
+        return make, None, None
+    return make, series, model
+
+#Vendors whose model is read from sysDescr
+_a10_model_regex = re.compile(r'(?:AX|TH)\d{3,4}(?:S|-\d+)?')
+_niagara_model_regex = re.compile(r'Model Number: (\w+)( |-)(\w+)', re.I)
+DESCR_MAKES = ('a10', 'niagara')
+
+def decode_descr(make, series, descr):
+    """
+    Fills in (series, model) from sysDescr for vendors in DESCR_MAKES
+    """
+    model = None
+    if not descr or 'NOSUCHOBJECT' in descr:
+        return series, model
+    if make == 'a10':
+        found = _a10_model_regex.search(descr)
+        model = found.group(0) if found else None
+    elif make == 'niagara':
+        found = _niagara_model_regex.search(descr)
+        if found:
+            series = found.group(1)
+            model = found.group(3) if found.group(2) == ' ' else "-".join((found.group(1), found.group(3)))
+    return series, model
+
+def decode(oid, descr=None):
+    """
+    Decodes (make, series, model) from a sysObjectID and, where the vendor needs it, sysDescr
+    """
+    make, series, model = decode_sysobjectid(oid.lstrip('.') if isinstance(oid, str) else oid)
+    if make in DESCR_MAKES and descr:
+        series, model = decode_descr(make, series, descr)
+    return make, series, model
+
+#Avocent models are only available from their own product oids
+AVOCENT_MODEL_OIDS = ('1.3.6.1.4.1.10418.16.2.1.2.0', '1.3.6.1.4.1.10418.26.2.1.2.0')
+_avocent_model_regex = re.compile(r'ACS\d{4}')
+
+def decode_avocent(poll_result):
+    """
+    Decodes (series, model) from a poll of AVOCENT_MODEL_OIDS
+    """
+    found = _avocent_model_regex.search(str(poll_result.values())) if poll_result else None
+    if not found:
+        return None, None
+    model = found.group(0)
+    return f'{model[:5]}00', model
@@ -0,0 +1,208 @@
+"""
+Compact records for ARP, bridge forwarding (FDB) and LLDP neighbor tables, decoded straight
+from index arcs and raw column values as table rows stream in, without string-keyed dicts
+"""
+from poller.utils import IPUtils
+
+ARP_COLUMNS = ('ipNetToPhysicalPhysAddress', 'ipNetToPhysicalType')
+ARP_V4_COLUMNS = ('ipNetToMediaPhysAddress', 'ipNetToMediaType')
+FDB_COLUMNS = ('dot1qTpFdbPort', 'dot1qTpFdbStatus')
+BRIDGE_FDB_COLUMNS = ('dot1dTpFdbPort', 'dot1dTpFdbStatus')
+PORT_COLUMNS = ('dot1dBasePortIfIndex',)
+LLDP_COLUMNS = ('lldpRemChassisIdSubtype', 'lldpRemChassisId', 'lldpRemPortIdSubtype', 'lldpRemPortId',
+        'lldpRemPortDesc', 'lldpRemSysName', 'lldpRemSysDesc', 'lldpRemSysCapEnabled')
+LLDP_LOCAL_COLUMNS = ('lldpLocPortId', 'lldpLocPortDesc')
+LLDP_ADDRESS_COLUMNS = ('lldpRemManAddrIfSubtype',)
+VLAN_COLUMNS = ('vtpVlanState',)
+
+#ipNetToPhysicalType, ipNetToMediaType shares 1-4
+ARP_TYPES = {1: 'other', 2: 'invalid', 3: 'dynamic', 4: 'static', 5: 'local'}
+#dot1dTpFdbStatus and dot1qTpFdbStatus
+FDB_STATUSES = {1: 'other', 2: 'invalid', 3: 'learned', 4: 'self', 5: 'mgmt'}
+#LldpSystemCapabilitiesMap bits, most significant bit of the first octet first
+LLDP_CAPABILITIES = ('other', 'repeater', 'bridge', 'wlanAccessPoint', 'router', 'telephone', 'docsisCableDevice', 'stationOnly')
+#Chassis and port id subtypes carrying a MAC or a network address rather than text
+_MAC_SUBTYPES = {'chassis': 4, 'port': 3}
+_ADDRESS_SUBTYPES = {'chassis': 5, 'port': 4}
+#Cisco reserved VLANs, never with a bridge instance of their own
+_RESERVED_VLANS = range(1002, 1006)
+
+def octets(value):
+    """
+    bytes of an OCTET STRING, raw from the Engine or as the str net-snmp hands back
+    """
+    if value is None:
+        return b''
+    if isinstance(value, bytes):
+        return value
+    return value.encode('latin-1', 'replace')
+
+def text(value):
+    raw = octets(value)
+    if not raw:
+        return None
+    try:
+        return raw.decode()
+    except UnicodeDecodeError:
+        return raw.decode('latin-1')
+
+def number(value):
+    if value is None or isinstance(value, int):
+        return value
+    return int(value) if value.lstrip('-').isdigit() else None
+
+def mac(raw):
+    """
+    aa:bb:cc:dd:ee:ff for six octets (or arcs), None for anything else
+    """
+    if len(raw) != 6:
+        return None
+    return bytes(raw).hex(':')
+
+class ArpEntry:
+    """
+    One ipNetToPhysicalTable (or ipNetToMediaTable) row
+    """
+    __slots__ = ('if_index', 'address', 'mac', 'type')
+
+    def __init__(self, if_index, address, mac, type):
+        self.if_index = if_index
+        self.address = address
+        self.mac = mac
+        self.type = type
+
+    def __repr__(self):
+        return f'<ArpEntry {self.address} {self.mac} if_index={self.if_index} {self.type}>'
+
+class FdbEntry:
+    """
+    One learned MAC address. vlan is the VLAN of the community@vlan context it was read in or,
+    from the Q-BRIDGE table, its filtering database id (the VLAN on IVL bridges). if_index is
+    None when the bridge port has no interface mapping
+    """
+    __slots__ = ('vlan', 'mac', 'port', 'if_index', 'status')
+
+    def __init__(self, vlan, mac, port, if_index, status):
+        self.vlan = vlan
+        self.mac = mac
+        self.port = port
+        self.if_index = if_index
+        self.status = status
+
+    def __repr__(self):
+        return f'<FdbEntry vlan={self.vlan} {self.mac} port={self.port} if_index={self.if_index} {self.status}>'
+
+class LldpNeighbor:
+    """
+    One lldpRemTable row: local_port is lldpRemLocalPortNum, local_port_id its lldpLocPortId
+    text and remote_index the lldpRemIndex telling neighbors on one port apart
+    """
+    __slots__ = ('local_port', 'remote_index', 'local_port_id', 'chassis_id', 'port_id', 'port_desc', 'sys_name', 'sys_desc',
+            'capabilities', 'addresses')
+
+    def __init__(self, local_port, remote_index, chassis_id, port_id, port_desc=None, sys_name=None, sys_desc=None, capabilities=(), addresses=None):
+        self.local_port = local_port
+        self.remote_index = remote_index
+        self.local_port_id = None
+        self.chassis_id = chassis_id
+        self.port_id = port_id
+        self.port_desc = port_desc
+        self.sys_name = sys_name
+        self.sys_desc = sys_desc
+        self.capabilities = capabilities
+        self.addresses = addresses or []
+
+    def __repr__(self):
+        return f'<LldpNeighbor local_port={self.local_port} {self.sys_name or self.chassis_id} port={self.port_id}>'
+
+def arp_entry(index, values):
+    """
+    ipNetToPhysicalTable row, indexed by ifIndex, InetAddressType, InetAddress
+    """
+    if_index, address = IPUtils.decode_index(index, IPUtils.IP_NET_TO_PHYSICAL_INDEX)
+    if address is None:
+        return
+    physical, kind = values
+    return ArpEntry(if_index, address, mac(octets(physical)), ARP_TYPES.get(number(kind)))
+
+def arp_v4_entry(index, values):
+    """
+    ipNetToMediaTable row, indexed by ifIndex and a bare IPv4 address
+    """
+    if_index, address = IPUtils.decode_index(index, ('integer', 'ipv4'))
+    physical, kind = values
+    return ArpEntry(if_index, address, mac(octets(physical)), ARP_TYPES.get(number(kind)))
+
+def fdb_entry(index, values, ports):
+    """
+    dot1qTpFdbTable row, indexed by filtering database id and MAC. ports maps bridge ports to ifIndexes
+    """
+    port, status = values
+    port = number(port)
+    return FdbEntry(index[0], mac(index[1:]), port, ports.get(port), FDB_STATUSES.get(number(status)))
+
+def bridge_fdb_entry(index, values, ports, vlan=None):
+    """
+    dot1dTpFdbTable row, indexed by MAC, read in the context of vlan
+    """
+    port, status = values
+    port = number(port)
+    return FdbEntry(vlan, mac(index), port, ports.get(port), FDB_STATUSES.get(number(status)))
+
+def port_map(rows):
+    """
+    {bridge port: ifIndex} from dot1dBasePortIfIndex rows
+    """
+    return {index[0]: number(values[0]) for index, values in rows}
+
+def vlans(rows):
+    """
+    Operational VLANs from vtpVlanState rows (index management domain, VLAN), reserved ones left out
+    """
+    return sorted({index[-1] for index, values in rows if number(values[0]) == 1 and index[-1] not in _RESERVED_VLANS})
+
+def _identifier(subtype, value, kind):
+    raw = octets(value)
+    if subtype == _MAC_SUBTYPES[kind]:
+        return mac(raw) or raw.hex()
+    if subtype == _ADDRESS_SUBTYPES[kind] and raw:
+        #IANA address family octet then the address, the same shape as an InetAddress index
+        address, _ = IPUtils.decode_inet((raw[0], len(raw) - 1) + tuple(raw[1:]))
+        return str(address) if address is not None else raw.hex()
+    return text(raw)
+
+def capabilities(value):
+    raw = octets(value)
+    if not raw:
+        return ()
+    return tuple(name for bit, name in enumerate(LLDP_CAPABILITIES) if raw[0] & (0x80 >> bit))
+
+def lldp_neighbor(index, values):
+    """
+    lldpRemTable row, indexed by lldpRemTimeMark, lldpRemLocalPortNum, lldpRemIndex
+    """
+    chassis_subtype, chassis_id, port_subtype, port_id, port_desc, sys_name, sys_desc, enabled = values
+    return LldpNeighbor(index[1], index[2], _identifier(number(chassis_subtype), chassis_id, 'chassis'),
+            _identifier(number(port_subtype), port_id, 'port'), text(port_desc), text(sys_name), text(sys_desc), capabilities(enabled))
+
+def join_lldp(neighbors, local_rows, address_rows):
+    """
+    Fills local_port_id and management addresses (from lldpRemManAddrTable rows, whose index
+    ends in the address) into the neighbors list
+    """
+    local = {index[0]: text(values[0]) for index, values in local_rows}
+    by_key = {}
+    for neighbor in neighbors:
+        neighbor.local_port_id = local.get(neighbor.local_port)
+        by_key[(neighbor.local_port, neighbor.remote_index)] = neighbor
+    for index, values in address_rows:
+        neighbor = by_key.get(index[1:3])
+        if neighbor is None:
+            continue
+        try:
+            address, _ = IPUtils.decode_inet(index, 3)
+        except (IndexError, ValueError):
+            continue
+        if address is not None:
+            neighbor.addresses.append(address)
+    return neighbors
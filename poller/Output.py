@@ -0,0 +1,252 @@
+"""
+Buffered sinks writing (host, result) pairs from a fleet poll as NDJSON, CSV or
+length-prefixed binary records, with size based rotation and optional gzip
+"""
+import io
+import os
+import csv
+import sys
+import gzip
+import json
+import time
+import struct
+import ipaddress
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from poller import Fleet
+
+FORMATS = ('ndjson', 'csv', 'binary')
+
+_suffixes = {'.ndjson': 'ndjson', '.jsonl': 'ndjson', '.json': 'ndjson', '.csv': 'csv', '.bin': 'binary'}
+
+def status(result):
+    """
+    ok, unreachable (dropped by the ping stage) or no_response. Only None means no answer,
+    falsy results such as 0 or an empty table are still answers
+    """
+    if result is Fleet.UNREACHABLE:
+        return 'unreachable'
+    if result is None:
+        return 'no_response'
+    return 'ok'
+
+def plain(value):
+    """
+    value with Tables, Rates, snapshots and addresses turned into JSON-safe dicts, lists and strings
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return {str(key): plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [plain(item) for item in value]
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'backslashreplace')
+    if hasattr(value, 'to_dict'):
+        return plain(value.to_dict())
+    if isinstance(value, (ipaddress.IPv4Address, ipaddress.IPv6Address, ipaddress.IPv4Interface, ipaddress.IPv6Interface)):
+        return str(value)
+    if hasattr(value, '__slots__') and not hasattr(value, '__dict__'):
+        return {name: plain(getattr(value, name, None)) for name in value.__slots__ if not name.startswith('_')}
+    if hasattr(value, '__dict__'):
+        return {name: plain(item) for name, item in vars(value).items() if not name.startswith('_')}
+    return str(value)
+
+def flatten(value, prefix=''):
+    """
+    Yields (dotted key, leaf value) pairs for a plain() value
+    """
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten(item, f'{prefix}.{key}' if prefix else key)
+    elif isinstance(value, list):
+        for position, item in enumerate(value):
+            yield from flatten(item, f'{prefix}.{position}' if prefix else str(position))
+    else:
+        yield prefix, value
+
+class Sink:
+    """
+    Encodes records into an in-memory buffer and writes it out in one go once buffer_size bytes
+    or flush_interval seconds have built up. path None or '-' writes to stdout, anything else
+    is opened for writing, gzip compressed with compress, and with rotate_bytes set a new file
+    (path with -0001, -0002 ... before its suffix) is started once that many bytes have gone
+    into the current one, counted before compression
+    """
+    def __init__(self, path=None, compress=False, rotate_bytes=None, buffer_size=1024 * 1024, flush_interval=1.0):
+        self.path = None if path in (None, '-') else path
+        self.compress = compress
+        self.rotate_bytes = rotate_bytes if self.path else None
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.records = 0
+        self.files = []
+        self._buffer = []
+        self._buffered = 0
+        self._flushed = time.monotonic()
+        self._file = None
+        self._written = 0
+
+    def _name(self):
+        if not self.rotate_bytes:
+            return self.path
+        stem, suffix = self.path, ''
+        for ending in ('.gz',) + tuple(_suffixes):
+            if stem.endswith(ending):
+                stem, suffix = stem[:-len(ending)], ending + suffix
+        return f'{stem}-{len(self.files) + 1:04d}{suffix}'
+
+    def _open(self):
+        if self.path is None:
+            stream = sys.stdout.buffer
+            self._file = gzip.GzipFile(fileobj=stream, mode='wb') if self.compress else stream
+        else:
+            name = self._name()
+            self._file = gzip.open(name, 'wb') if self.compress else open(name, 'wb')
+            self.files.append(name)
+        self._written = 0
+        header = self.header()
+        if header:
+            self._file.write(header)
+            self._written += len(header)
+
+    def _close_file(self):
+        if self._file is None:
+            return
+        if self._file is sys.stdout.buffer:
+            self._file.flush()
+        else:
+            self._file.close()
+        self._file = None
+
+    def header(self):
+        return b''
+
+    def encode(self, host, result):
+        raise NotImplementedError
+
+    def write(self, host, result):
+        record = self.encode(host, result)
+        self._buffer.append(record)
+        self._buffered += len(record)
+        self.records += 1
+        if (self._buffered >= self.buffer_size or time.monotonic() - self._flushed >= self.flush_interval
+                or self.rotate_bytes and self._written + self._buffered >= self.rotate_bytes):
+            self.flush()
+
+    def write_all(self, results):
+        for host, result in results:
+            self.write(host, result)
+
+    def flush(self):
+        self._flushed = time.monotonic()
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._open()
+        data = b''.join(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        self._file.write(data)
+        self._written += len(data)
+        if self.rotate_bytes and self._written >= self.rotate_bytes:
+            self._close_file()
+        elif self._file is sys.stdout.buffer:
+            self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._close_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class NdjsonSink(Sink):
+    """
+    One {"host", "status", "result"} JSON object per line
+    """
+    def encode(self, host, result):
+        state = status(result)
+        record = {'host': host, 'status': state, 'result': plain(result) if state == 'ok' else None}
+        return (json.dumps(record, separators=(',', ':'), default=str) + '\n').encode()
+
+class CsvSink(Sink):
+    """
+    Long format host,status,key,value rows, one per leaf value with its dotted key, so results
+    of any shape fit the same four columns. Hosts without a result get a single row with no key
+    """
+    def __init__(self, path=None, **kwargs):
+        super().__init__(path, **kwargs)
+        self._text = io.StringIO()
+        self._writer = csv.writer(self._text)
+
+    def header(self):
+        return b'host,status,key,value\r\n'
+
+    def encode(self, host, result):
+        state = status(result)
+        rows = [(host, state, key, '' if value is None else value) for key, value in flatten(plain(result))] if state == 'ok' else None
+        #Empty dicts and lists have no leaves but the host still answered
+        self._writer.writerows(rows or [(host, state, '', '')])
+        record = self._text.getvalue().encode()
+        self._text.seek(0)
+        self._text.truncate()
+        return record
+
+class BinarySink(Sink):
+    """
+    Records framed as a 4 byte big-endian length followed by the NDJSON record body, or msgpack
+    with codec='msgpack'. read_binary reads them back
+    """
+    def __init__(self, path=None, codec='json', **kwargs):
+        if codec == 'msgpack' and msgpack is None:
+            raise ImportError('BinarySink codec msgpack needs the msgpack package')
+        self.codec = codec
+        super().__init__(path, **kwargs)
+
+    def encode(self, host, result):
+        state = status(result)
+        record = {'host': host, 'status': state, 'result': plain(result) if state == 'ok' else None}
+        if self.codec == 'msgpack':
+            body = msgpack.packb(record, default=str)
+        else:
+            body = json.dumps(record, separators=(',', ':'), default=str).encode()
+        return struct.pack('>I', len(body)) + body
+
+def read_binary(path, codec='json'):
+    """
+    Yields the records of a BinarySink file, gzipped or not
+    """
+    with open(path, 'rb') as probe:
+        compressed = probe.read(2) == b'\x1f\x8b'
+    with (gzip.open(path, 'rb') if compressed else open(path, 'rb')) as records:
+        while True:
+            prefix = records.read(4)
+            if len(prefix) < 4:
+                return
+            body = records.read(struct.unpack('>I', prefix)[0])
+            yield msgpack.unpackb(body) if codec == 'msgpack' else json.loads(body)
+
+_sinks = {'ndjson': NdjsonSink, 'csv': CsvSink, 'binary': BinarySink}
+
+def open_sink(path=None, format=None, compress=None, **kwargs):
+    """
+    Sink for path, its format and compression taken from the suffix (.ndjson/.jsonl, .csv,
+    .bin, plus .gz) unless given. Defaults to NDJSON
+    """
+    name = path or ''
+    if compress is None:
+        compress = name.endswith('.gz')
+    if format is None:
+        base = name[:-3] if name.endswith('.gz') else name
+        format = _suffixes.get(os.path.splitext(base)[1], 'ndjson')
+    if format not in _sinks:
+        raise ValueError(f'Unknown output format {format}, expected one of {", ".join(FORMATS)}')
+    return _sinks[format](path, compress=compress, **kwargs)
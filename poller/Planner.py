@@ -0,0 +1,342 @@
+"""
+Query planner for polling many fields of a device at once. The scalars every requested field
+needs are packed into as few GETs as fit the message size budget, the table columns they need
+share one GETBULK stream, and each field decodes its own slice of the answers the way its
+Poller helper would. Fields that need to see one answer before asking the next (avocent models,
+serial tables) get further rounds, batched the same way.
+"""
+import re
+import asyncio
+from functools import partial
+
+from poller import Poller
+from poller import Engine
+from poller import SessionPool
+from poller import ModelIndex
+from poller import Metrics
+from poller import Timing
+from poller.utils import OIDUtils
+
+#Message, community and PDU headers around the varbind list
+_overhead = 48
+#Expected encoded value size, DisplayStrings may run to 255 octets
+_value_size = 64
+_value_sizes = {'sysDescr': 255, 'sysContact': 255, 'sysLocation': 255, 'sysName': 255}
+_system_oids = ('sysDescr.0', 'sysObjectID.0', 'sysUpTime.0', 'sysContact.0', 'sysName.0', 'sysLocation.0', 'sysServices.0')
+_index_regex = re.compile(r'at index (\d+)')
+
+class Step:
+    """
+    What a field needs fetched, scalars by GET and columns from the shared GETBULK stream, and
+    decode(values, table) turning the answers into its result or into a further Step. A Step with
+    call set instead runs one of the (sync, async) helper pair as call(host, community, **kwargs)
+    """
+    __slots__ = ('scalars', 'columns', 'decode', 'call')
+
+    def __init__(self, scalars=(), columns=(), decode=None, call=None):
+        self.scalars = tuple(scalars)
+        self.columns = tuple(columns)
+        self.decode = decode
+        self.call = call
+
+def _scalar(oid):
+    return Step((oid,), decode=lambda values, table: values.get(oid))
+
+def _column(column):
+    def decode(values, table):
+        if table is None:
+            return
+        return {".".join((column, _index_string(index))): value for index, value in table.column(column) if value is not None} or None
+    return Step(columns=(column,), decode=decode)
+
+def _index_string(index):
+    return ".".join(map(str, index)) if isinstance(index, tuple) else str(index)
+
+def _base(values, table):
+    return {oid: values[oid] for oid in _system_oids if values.get(oid) is not None} or None
+
+def _fingerprint(values, table):
+    poll_result = {oid: values.get(oid) for oid in Poller._fingerprint_oids}
+    if not any(poll_result.values()):
+        return
+    fingerprint = Poller._decode_fingerprint(poll_result)
+    if fingerprint.get('make') != 'avocent':
+        return fingerprint
+    def avocent(values, table):
+        fingerprint['series'], fingerprint['model'] = ModelIndex.decode_avocent(_answered(values, ModelIndex.AVOCENT_MODEL_OIDS))
+        return fingerprint
+    return Step(ModelIndex.AVOCENT_MODEL_OIDS, decode=avocent)
+
+def _make_series_model(values, table):
+    object_id = (values.get('sysObjectID.0') or '').lstrip('.')
+    if not object_id:
+        return
+    make, series, model = ModelIndex.decode(object_id)
+    if not make:
+        return
+    if make in ModelIndex.DESCR_MAKES:
+        descr = values.get('sysDescr.0')
+        if make == 'a10' and not descr:
+            return
+        return ModelIndex.decode(object_id, descr)
+    if make == 'avocent':
+        return Step(ModelIndex.AVOCENT_MODEL_OIDS, decode=lambda values, table: (make,) + ModelIndex.decode_avocent(_answered(values, ModelIndex.AVOCENT_MODEL_OIDS)))
+    return make, series, model
+
+def _serial_number(values, table):
+    object_id = values.get('sysObjectID.0')
+    if not object_id:
+        return
+    return Step(call=(partial(Poller.poll_serial_number, object_id=object_id, speculative=True),
+            partial(Poller.async_poll_serial_number, object_id=object_id, speculative=True)))
+
+def _interfaces(values, table):
+    if table is None:
+        return
+    ips = {int(value): _index_string(index) for index, value in table.column('ipAdEntIfIndex') if value and value.isdigit()}
+    if ips:
+        return Poller._join_interfaces(ips, table, 'v4_ip')
+    def address_table(values, addresses):
+        if addresses is None:
+            return
+        found = {}
+        for index, value in addresses.column('ipAddressIfIndex'):
+            #ipv4(1), 4 octets, leaving out the 254.x link-local block the helper skips too
+            if isinstance(index, tuple) and index[:2] == (1, 4) and index[2] != 254 and value and value.isdigit() and int(value):
+                found[int(value)] = ".".join(map(str, index[2:]))
+        return Poller._join_interfaces(found, table, 'v4_ip') if found else None
+    return Step(columns=('ipAddressIfIndex',), decode=address_table)
+
+#Fields by name, each the Step its Poller helper's requests and decoding boil down to
+FIELDS = {
+    'base': Step(_system_oids, decode=_base),
+    'descr': _scalar('sysDescr.0'),
+    'object_id': _scalar('sysObjectID.0'),
+    'uptime': _scalar('sysUpTime.0'),
+    'contact': _scalar('sysContact.0'),
+    'name': _scalar('sysName.0'),
+    'location': _scalar('sysLocation.0'),
+    'interface_number': _scalar('ifNumber.0'),
+    'fingerprint': Step(Poller._fingerprint_oids, decode=_fingerprint),
+    'make_series_model': Step(('sysObjectID.0', 'sysDescr.0'), decode=_make_series_model),
+    'serial_number': Step(('sysObjectID.0',), decode=_serial_number),
+    'ifDescr': _column('ifDescr'),
+    'ifOperStatus': _column('ifOperStatus'),
+    'ifAdminStatus': _column('ifAdminStatus'),
+    'interfaces': Step(columns=Poller._interface_columns + ('ipAdEntIfIndex',), decode=_interfaces),
+}
+
+def field(name):
+    """
+    Step for a named field, or for a bare oid: a scalar GET when it ends in .0, a column otherwise
+    """
+    if isinstance(name, Step):
+        return name
+    step = FIELDS.get(name)
+    if step is not None:
+        return step
+    OIDUtils.resolve(name)
+    return _scalar(name) if name.endswith('.0') else _column(name)
+
+def _answered(values, oids):
+    return {oid: values[oid] for oid in oids if values.get(oid) is not None}
+
+def _unique(items):
+    return list(dict.fromkeys(items))
+
+def _varbind_size(oid):
+    name = oid.lstrip('.').split('.', 1)[0]
+    return len(OIDUtils.resolve(oid)) + 8 + _value_sizes.get(name, _value_size)
+
+def pack(oids, max_size=1400, max_varbinds=60):
+    """
+    Splits scalar oids into GET requests whose responses should fit in max_size bytes
+    """
+    pdus = []
+    current = []
+    size = _overhead
+    for oid in _unique(oids):
+        cost = _varbind_size(oid)
+        if current and (size + cost > max_size or len(current) >= max_varbinds):
+            pdus.append(current)
+            current = []
+            size = _overhead
+        current.append(oid)
+        size += cost
+    if current:
+        pdus.append(current)
+    return pdus
+
+def _values(oids, variables):
+    #GET answers come back in request order, exceptions read as missing
+    values = {}
+    for oid, variable in zip(oids, variables):
+        values[oid] = None if variable.snmp_type in Poller._snmp_exceptions else str(variable.value)
+    return values
+
+def _retry(oids, err):
+    """
+    How to retry a GET the agent refused: halves for tooBig, the rest of the request
+    when an SNMPv1 agent names the missing oid. None when it should not be retried
+    """
+    error = Metrics.classify(err)
+    if error == 'no_such_name':
+        found = _index_regex.search(str(err))
+        position = int(found.group(1)) - 1 if found else -1
+        if 0 <= position < len(oids):
+            return [oids[:position] + oids[position + 1:]]
+    if error in ('too_big', 'no_such_name') and len(oids) > 1:
+        half = len(oids) // 2
+        return [oids[:half], oids[half:]]
+
+def _get(oids, host, community, **kwargs):
+    try:
+        with SessionPool.session(host, community, **kwargs) as session:
+            return _values(oids, session.get(list(oids)))
+    except Exception as err:
+        parts = _retry(oids, err)
+        if parts is None:
+            if Metrics.classify(err) in ('too_big', 'no_such_name'):
+                return dict.fromkeys(oids)
+            raise
+    values = dict.fromkeys(oids)
+    for part in parts:
+        if part:
+            values.update(_get(part, host, community, **kwargs))
+    return values
+
+async def _async_get(oids, host, community, **kwargs):
+    try:
+        return _values(oids, await Engine.snmp_get(list(oids), hostname=host, community=community, **kwargs))
+    except Exception as err:
+        parts = _retry(oids, err)
+        if parts is None:
+            if Metrics.classify(err) in ('too_big', 'no_such_name'):
+                return dict.fromkeys(oids)
+            raise
+    values = dict.fromkeys(oids)
+    for part in parts:
+        if part:
+            values.update(await _async_get(part, host, community, **kwargs))
+    return values
+
+class Plan:
+    """
+    Reusable plan for polling fields off any number of hosts: names from FIELDS and bare oids,
+    or a {name: Step} mapping for fields of your own. Its first round of GETs is packed once up front
+    """
+    def __init__(self, fields, max_size=1400, max_varbinds=60, max_repetitions=25):
+        specs = fields.items() if isinstance(fields, dict) else ((name, name) for name in fields)
+        self.steps = {name: field(spec) for name, spec in specs}
+        self.names = list(self.steps)
+        self.max_size = max_size
+        self.max_varbinds = max_varbinds
+        self.max_repetitions = max_repetitions
+        self.pdus = self._pack(self.steps)
+        self.columns = _unique(column for step in self.steps.values() for column in step.columns)
+
+    def _pack(self, steps):
+        return pack([oid for step in steps.values() for oid in step.scalars], self.max_size, self.max_varbinds)
+
+    def _settle(self, steps, values, table, results):
+        #Decodes every step that had its answers, returning those that need another round
+        pending = {}
+        for name, step in steps.items():
+            if step.call:
+                continue
+            outcome = step.decode(values, table)
+            if isinstance(outcome, Step):
+                pending[name] = outcome
+            else:
+                results[name] = outcome
+        return pending
+
+    def run(self, host, community, **kwargs):
+        """
+        {field: result} for host, None if it answered nothing
+        """
+        options = {'version': kwargs.get('version', 2), 'retries': kwargs.get('retries', 1), 'timeout': kwargs.get('timeout', 1)}
+        steps = dict(self.steps)
+        pdus, columns = self.pdus, self.columns
+        results = {}
+        answered = False
+        while steps:
+            values = {}
+            #A failed GET reads as missing, the host only counts as silent once the whole round is in
+            for pdu in pdus:
+                try:
+                    values.update(_get(pdu, host, community, **options))
+                    answered = True
+                except Exception as err:
+                    values.update(dict.fromkeys(pdu))
+            table = Poller.poll_table(columns, host, community, max_repetitions=self.max_repetitions, structured=True, **options) if columns else None
+            answered = answered or table is not None
+            if not answered:
+                return
+            for name, step in steps.items():
+                if step.call:
+                    results[name] = step.call[0](host, community, **options)
+            steps = self._settle(steps, values, table, results)
+            pdus = self._pack(steps)
+            columns = _unique(column for step in steps.values() for column in step.columns)
+        return {name: results.get(name) for name in self.names}
+
+    async def async_run(self, host, community, **kwargs):
+        """
+        {field: result} for host, None if it answered nothing. Every GET of a round and its
+        column stream go out together
+        """
+        options = {'version': kwargs.get('version', 2), 'retries': kwargs.get('retries', 1), 'timeout': kwargs.get('timeout', 1)}
+        steps = dict(self.steps)
+        pdus, columns = self.pdus, self.columns
+        results = {}
+        answered = False
+        while steps:
+            fetches = [_async_get(pdu, host, community, **options) for pdu in pdus]
+            if columns:
+                fetches.append(Poller.async_poll_table(columns, host, community, max_repetitions=self.max_repetitions, structured=True, **options))
+            calls = [(name, step.call[1](host, community, **options)) for name, step in steps.items() if step.call]
+            fetches += [call for _, call in calls]
+            outcomes = await asyncio.gather(*fetches, return_exceptions=True)
+            values = {}
+            for pdu, outcome in zip(pdus, outcomes):
+                if isinstance(outcome, BaseException):
+                    values.update(dict.fromkeys(pdu))
+                else:
+                    values.update(outcome)
+                    answered = True
+            table = outcomes[len(pdus)] if columns else None
+            answered = answered or (table is not None and not isinstance(table, BaseException))
+            if not answered:
+                return
+            if isinstance(table, BaseException):
+                table = None
+            for (name, _), outcome in zip(calls, outcomes[len(outcomes) - len(calls):]):
+                results[name] = None if isinstance(outcome, BaseException) else outcome
+            steps = self._settle(steps, values, table, results)
+            pdus = self._pack(steps)
+            columns = _unique(column for step in steps.values() for column in step.columns)
+        return {name: results.get(name) for name in self.names}
+
+@Metrics.traced
+@Timing.budgeted
+def poll_fields(host, community, fields, **kwargs):
+    """
+    Polls fields (a Plan, or what Plan takes) off host in as few requests as
+    they fit in, returning {field: result} with each result shaped as its helper returns it
+    """
+    plan = fields if isinstance(fields, Plan) else Plan(fields, **_plan_options(kwargs))
+    return plan.run(host, community, **kwargs)
+
+@Metrics.traced
+@Timing.budgeted
+async def async_poll_fields(host, community, fields, **kwargs):
+    """
+    Polls fields (a Plan, or what Plan takes) off host in as few requests as
+    they fit in, returning {field: result} with each result shaped as its helper returns it
+    """
+    plan = fields if isinstance(fields, Plan) else Plan(fields, **_plan_options(kwargs))
+    return await plan.async_run(host, community, **kwargs)
+
+def _plan_options(kwargs):
+    return {option: kwargs[option] for option in ('max_size', 'max_varbinds', 'max_repetitions') if option in kwargs}
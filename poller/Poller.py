@@ -1,16 +1,29 @@
 import re
-import json
 import time
 import logging
 import asyncio
-import pkgutil
+import threading
+import itertools
+import contextvars
 import subprocess
 from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 
 import easysnmp
-from poller.utils import IPUtils
+from poller import Engine
+from poller import SessionPool
+from poller import ModelIndex
+from poller import Cache
+from poller import Snapshot
+from poller import Counters
+from poller import Timing
+from poller import Metrics
+from poller import Neighbors
+from poller import Inventory
+from poller.Table import Table, parse_index, make_index
+from poller.utils import IPUtils, OIDUtils, BERUtils
 
-translations = json.loads(pkgutil.get_data('poller', 'translations'))
+translations = ModelIndex.translations
 
 #Closures
 def poll_func(oids, community, **kwargs):
@@ -22,7 +35,8 @@ def poll_func(oids, community, **kwargs):
     timeout = kwargs.get('timeout', 1)
     def poll(host):
         try:
-            get = easysnmp.snmp_get(oids, hostname=host, version=version, community=community, retries=retries, timeout=timeout)
+            with SessionPool.session(host, community, version=version, retries=retries, timeout=timeout) as session:
+                get = session.get(oids)
         except Exception as err:
             return
         if get:
@@ -38,9 +52,8 @@ def async_poll_func(oids, community, **kwargs):
     timeout = kwargs.get('timeout', 1)
 
     async def poll(host):
-        loop = asyncio.get_event_loop()
         try:
-            get = await loop.run_in_executor(None, partial(easysnmp.snmp_get, oids, hostname=host, version=version, community=community, retries=retries, timeout=timeout))
+            get = await Engine.snmp_get(oids, hostname=host, version=version, community=community, retries=retries, timeout=timeout)
         except Exception as err:
             return
         if get:
@@ -48,89 +61,249 @@ def async_poll_func(oids, community, **kwargs):
     return poll
 
 #Generic poller, add any oid(s)
+@Metrics.traced
+@Timing.budgeted
 def poll(oids, host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
     try:
-        get = easysnmp.snmp_get(oids, hostname=host, version=version, community=community, retries=retries, timeout=timeout)
+        with SessionPool.session(host, community, version=version, retries=retries, timeout=timeout) as session:
+            get = session.get(oids)
     except Exception as err:
         return
     if get:
         return _convertToDict(get)
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll(oids, host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
-    loop = asyncio.get_event_loop()
     try:
-        get = await loop.run_in_executor(None, partial(easysnmp.snmp_get, oids, hostname=host, version=version, community=community, retries=retries, timeout=timeout))
+        get = await Engine.snmp_get(oids, hostname=host, version=version, community=community, retries=retries, timeout=timeout)
     except Exception as err:
         return
     if get:
         return _convertToDict(get)
 
 #Generic bulk poller, add any oid(s)
+@Metrics.traced
+@Timing.budgeted
 def poll_bulk(oids, host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
     try:
-        get = easysnmp.snmp_get_bulk(oids, hostname=host, version=version, community=community, retries=retries, timeout=timeout)
+        with SessionPool.session(host, community, version=version, retries=retries, timeout=timeout) as session:
+            get = session.get_bulk(oids)
     except Exception as err:
         return
     if get:
         return _convertToDict(get)
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_bulk(oids, host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
-    loop = asyncio.get_event_loop()
     try:
-        get = await loop.run_in_executor(None, partial(easysnmp.snmp_get_bulk, oids, hostname=host, version=version, community=community, retries=retries, timeout=timeout))
+        get = await Engine.snmp_get_bulk(oids, hostname=host, version=version, community=community, retries=retries, timeout=timeout)
     except Exception as err:
         return
     if get:
         return _convertToDict(get)
 
+@Metrics.traced
+@Timing.budgeted
 async def async_walk(oid, host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
-    loop = asyncio.get_event_loop()
     try:
-        get = await loop.run_in_executor(None, partial(easysnmp.snmp_walk, oid, hostname=host, version=version, community=community, retries=retries, timeout=timeout))
+        get = await Engine.snmp_walk(oid, hostname=host, version=version, community=community, retries=retries, timeout=timeout)
     except Exception as err:
         return
     if get:
-        return _convertToDict(get)
+        return _convertToTable(get, oid) if kwargs.get('structured') else _convertToDict(get)
 
+@Metrics.traced
+@Timing.budgeted
 def walk(oid, host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
     try:
-        get = easysnmp.snmp_walk(oid, hostname=host, version=version, community=community, retries=retries, timeout=timeout)
+        with SessionPool.session(host, community, version=version, retries=retries, timeout=timeout) as session:
+            get = session.walk(oid)
     except:
         return
     if get:
-        return _convertToDict(get)
+        return _convertToTable(get, oid) if kwargs.get('structured') else _convertToDict(get)
+
+#Streaming walkers, yield varbinds as each response arrives
+@Metrics.traced
+@Timing.budgeted
+def iter_walk(oid, host, community, **kwargs):
+    """
+    Generator over the variables under oid, fetched one GETBULK (GETNEXT on v1) page at a time.
+    Stops after max_rows variables or as soon as the caller stops iterating; with batches set
+    each page is yielded as a list
+    """
+    version = kwargs.get('version', 2)
+    retries = kwargs.get('retries', 1)
+    timeout = kwargs.get('timeout', 1)
+    max_rows = kwargs.get('max_rows')
+    rows = 0
+    try:
+        for page in _session_pages(oid, host, community, version=version, retries=retries, timeout=timeout, max_repetitions=kwargs.get('max_repetitions', 25)):
+            if max_rows:
+                page = page[:max_rows - rows]
+            rows += len(page)
+            if kwargs.get('batches'):
+                yield page
+            else:
+                yield from page
+            if max_rows and rows >= max_rows:
+                return
+    except Exception as err:
+        return
+
+@Metrics.traced
+@Timing.budgeted
+async def async_iter_walk(oid, host, community, **kwargs):
+    """
+    Async generator over the variables under oid, yielded as each GETBULK (GETNEXT on v1) response
+    arrives. Stops after max_rows variables or as soon as the caller stops iterating; with batches
+    set each response is yielded as a list
+    """
+    version = kwargs.get('version', 2)
+    retries = kwargs.get('retries', 1)
+    timeout = kwargs.get('timeout', 1)
+    max_rows = kwargs.get('max_rows')
+    max_repetitions = kwargs.get('max_repetitions', 25)
+    if Engine.supports(version, oid):
+        pages = Engine.get_engine().iter_walk(oid, host, community, max_repetitions=max_repetitions, version=version, retries=retries, timeout=timeout)
+    else:
+        pages = _executor_pages(_session_pages(oid, host, community, version=version, retries=retries, timeout=timeout, max_repetitions=max_repetitions))
+    rows = 0
+    try:
+        async for page in pages:
+            if max_rows:
+                page = page[:max_rows - rows]
+            rows += len(page)
+            if kwargs.get('batches'):
+                yield page
+            else:
+                for variable in page:
+                    yield variable
+            if max_rows and rows >= max_rows:
+                return
+    except Exception as err:
+        return
+    finally:
+        await pages.aclose()
+
+#Table poller, walks several columns together with GETBULK
+@Metrics.traced
+@Timing.budgeted
+def poll_table(columns, host, community, **kwargs):
+    """
+    Collects table columns side by side in one GETBULK stream, returning {index: {column: value}},
+    or a Table when structured is set
+    """
+    version = kwargs.get('version', 2)
+    retries = kwargs.get('retries', 1)
+    timeout = kwargs.get('timeout', 1)
+    max_repetitions = kwargs.get('max_repetitions', 25)
+    try:
+        with SessionPool.session(host, community, version=version, retries=retries, timeout=timeout) as session:
+            table = _session_table(session, columns, max_repetitions)
+    except Exception as err:
+        return
+    return table if kwargs.get('structured') else dict(table.rows())
+
+@Metrics.traced
+@Timing.budgeted
+async def async_poll_table(columns, host, community, **kwargs):
+    """
+    Collects table columns side by side in one GETBULK stream, returning {index: {column: value}},
+    or a Table when structured is set
+    """
+    version = kwargs.get('version', 2)
+    retries = kwargs.get('retries', 1)
+    timeout = kwargs.get('timeout', 1)
+    max_repetitions = kwargs.get('max_repetitions', 25)
+    try:
+        if Engine.supports(version, columns):
+            table = await Engine.snmp_table(columns, host, community, max_repetitions=max_repetitions, version=version, retries=retries, timeout=timeout)
+        else:
+            loop = asyncio.get_event_loop()
+            table = await loop.run_in_executor(None, contextvars.copy_context().run, partial(poll_table, columns, host, community, version=version, retries=retries, timeout=timeout, max_repetitions=max_repetitions, structured=True))
+    except Exception as err:
+        return
+    return table if kwargs.get('structured') else dict(table.rows())
+
+#Streaming table poller, yields rows as soon as every column has walked past them
+@Metrics.traced
+@Timing.budgeted
+def iter_table(columns, host, community, **kwargs):
+    """
+    Generator over table rows as (index arcs, [value per column]), the columns walked side by side
+    in one GETBULK stream and each row yielded once all of them have moved past it, so only rows
+    still in flight are held. With batches set each response's rows are yielded as a list
+    """
+    try:
+        for rows in _table_rows(columns, host, community, **kwargs):
+            if kwargs.get('batches'):
+                yield rows
+            else:
+                yield from rows
+    except Exception as err:
+        return
+
+@Metrics.traced
+@Timing.budgeted
+async def async_iter_table(columns, host, community, **kwargs):
+    """
+    Async generator over table rows as (index arcs, [value per column]), the columns walked side by
+    side in one GETBULK stream and each row yielded once all of them have moved past it. Values are
+    raw (bytes, int) from the Engine. With batches set each response's rows are yielded as a list
+    """
+    pages = _async_table_rows(columns, host, community, **kwargs)
+    try:
+        async for rows in pages:
+            if kwargs.get('batches'):
+                yield rows
+            else:
+                for row in rows:
+                    yield row
+    except Exception as err:
+        return
+    finally:
+        await pages.aclose()
 
 #Base system poll, same as snmpbulkget system
+@Metrics.traced
+@Timing.budgeted
 def poll_base(host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
     return poll_bulk('system', host, community, version=version, retries=retries, timeout=timeout)
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_base(host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
     return await async_poll_bulk('system', host, community, version=version, retries=retries, timeout=timeout)
 
+@Metrics.traced
+@Timing.budgeted
 def poll_descr(host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
@@ -139,6 +312,8 @@ def poll_descr(host, community, **kwargs):
     if poll_result:
         return poll_result.get('sysDescr.0')
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_descr(host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
@@ -147,196 +322,200 @@ async def async_poll_descr(host, community, **kwargs):
     if poll_result:
         return poll_result.get('sysDescr.0')
 
+@Metrics.traced
+@Timing.budgeted
 def poll_contact(host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
+    if kwargs.get('cache'):
+        return _cached('contact', poll_contact, host, community, **kwargs)
     poll_result = poll('sysContact.0', host, community, version=version, retries=retries, timeout=timeout)
     if poll_result:
         return poll_result.get('sysContact.0')
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_contact(host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
+    if kwargs.get('cache'):
+        return await _async_cached('contact', async_poll_contact, host, community, **kwargs)
     poll_result = await async_poll('sysContact.0', host, community, version=version, retries=retries, timeout=timeout)
     if poll_result:
         return poll_result.get('sysContact.0')
 
+@Metrics.traced
+@Timing.budgeted
 def poll_name(host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
+    if kwargs.get('cache'):
+        return _cached('name', poll_name, host, community, **kwargs)
     poll_result = poll('sysName.0', host, community, version=version, retries=retries, timeout=timeout)
     if poll_result:
         return poll_result.get('sysName.0')
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_name(host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
+    if kwargs.get('cache'):
+        return await _async_cached('name', async_poll_name, host, community, **kwargs)
     poll_result = await async_poll('sysName.0', host, community, version=version, retries=retries, timeout=timeout)
     if poll_result:
         return poll_result.get('sysName.0')
 
+@Metrics.traced
+@Timing.budgeted
 def poll_location(host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
+    if kwargs.get('cache'):
+        return _cached('location', poll_location, host, community, **kwargs)
     poll_result = poll('sysLocation.0', host, community, version=version, retries=retries, timeout=timeout)
     if poll_result:
         return poll_result.get('sysLocation.0')
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_location(host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
+    if kwargs.get('cache'):
+        return await _async_cached('location', async_poll_location, host, community, **kwargs)
     poll_result = await async_poll('sysLocation.0', host, community, version=version, retries=retries, timeout=timeout)
     if poll_result:
         return poll_result.get('sysLocation.0')
 
+@Metrics.traced
+@Timing.budgeted
 def poll_make_series_model(host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
+    if kwargs.get('cache'):
+        return _cached('make_series_model', poll_make_series_model, host, community, **kwargs)
     object_id = poll('sysObjectID.0', host, community, version=version, retries=retries, timeout=timeout)
     if not object_id:
         return
     oid = object_id.get('sysObjectID.0').lstrip('.')
-    base = oid
-    if not base:
-        return
-    oid_dict = {}
-    while base and not oid_dict:
-        oid_dict = translations.get(base)
-        if not oid_dict:
-            base = ".".join(base.split('.')[:-1])
-    if not base or not oid_dict:
-        return
-    make = oid_dict.get('make')
-    series = None
-    model = None
-    model_octets = re.sub(base, '', oid).split('.')[1:] if base != '1.3.6.1.4.1.2636.1.1.1' else re.sub(base, '', oid).split('.')[2:]
-    if make == 'a10':
-        if len(model_octets) == 1:
-            series = oid_dict.get(model_octets[0]).get('series') if oid_dict.get(model_octets[0]) else None
-        else:
-            series = oid_dict.get(model_octets[0]).get(model_octets[1]).get('series') if oid_dict.get(model_octets[0]) and oid_dict.get(model_octets[0]).get(model_octets[1]) else None
-        model_poll = poll('sysDescr.0', host, community, version=version, retries=retries, timeout=timeout)
-        if not model_poll or not model_poll.get('sysDescr.0') or re.search('NOSUCHOBJECT', str(model_poll.values())):
+    if not oid:
+        return
+    make, series, model = ModelIndex.decode(oid)
+    if not make:
+        return
+    if make in ModelIndex.DESCR_MAKES:
+        descr = poll_descr(host, community, version=version, retries=retries, timeout=timeout)
+        if make == 'a10' and (not descr or 'NOSUCHOBJECT' in descr):
             return
-        a10_model_regex = re.compile(r'(?:AX|TH)\d{3,4}(?:S|-\d+)?')
-        model = a10_model_regex.search(model_poll.get('sysDescr.0')).group(0) if a10_model_regex.search(model_poll.get('sysDescr.0')) else None
-    elif make == 'arista':
-        model = ''.join(oid_dict.get(octet) if oid_dict.get(octet) else octet for octet in model_octets)
-        series = ''.join(oid_dict.get(octet) if oid_dict.get(octet) else octet for octet in model_octets[:2])
-    elif make == 'cisco':
-        model = oid_dict.get(model_octets[0]).get('model') if oid_dict.get(model_octets[0]) else None
-        series = oid_dict.get(model_octets[0]).get('series') if oid_dict.get(model_octets[0]) else None
-    elif make in ['alcatel', 'juniper', 'f5']:
-        subset = oid_dict.get(model_octets[0])
-        if subset:
-            series = subset.get('series')
-            if len(model_octets) == 1:
-                model = subset.get('model') if subset.get('model') else subset.get('base')
-            else:
-                model = subset.get('model') if subset.get('model') else "".join((subset.get('base'), subset.get(model_octets[-1]).get('model')))
-                if not series and make == 'juniper':
-                    series = "".join((subset.get('base'), subset.get(model_octets[-1]).get('series')))
+        make, series, model = ModelIndex.decode(oid, descr)
     elif make == 'avocent':
-        poll_result = poll('1.3.6.1.4.1.10418.16.2.1.2.0', host, community, version=version, retries=retries, timeout=timeout)
+        poll_result = poll(ModelIndex.AVOCENT_MODEL_OIDS[0], host, community, version=version, retries=retries, timeout=timeout)
         if poll_result and re.search('NOSUCHOBJECT', str(poll_result.values())):
             poll_result = None
-        poll_result = poll('1.3.6.1.4.1.10418.26.2.1.2.0', host, community, version=version, retries=retries, timeout=timeout) if not poll_result else poll_result
-        if poll_result and re.search(r'ACS\d{4}', str(poll_result.values())):
-            model = re.search(r'ACS\d{4}', str(poll_result.values())).group(0)
-            series = f'{model[:5]}00'
-    elif make == 'niagara':
-        poll_result = poll('sysDescr.0', host, community, version=version, retries=retries, timeout=timeout)
-        if poll_result and poll_result.get('sysDescr.0') and not re.search('NOSUCHOBJECT', str(poll_result)):
-            result = re.search('Model Number: (\w+)( |-)(\w+)', poll_result.get('sysDescr.0'), re.I)
-            if result:
-                if result.group(2) == ' ':
-                    series = result.group(1)
-                    model = result.group(3)
-                else:
-                    series = result.group(1)
-                    model = "-".join((result.group(1), result.group(3)))
+        poll_result = poll(ModelIndex.AVOCENT_MODEL_OIDS[1], host, community, version=version, retries=retries, timeout=timeout) if not poll_result else poll_result
+        series, model = ModelIndex.decode_avocent(poll_result)
     if not all((make, series, model)):
         logging.debug(f'poll_make_series_model {host}: oid {oid} not fully recognized ({make}, {series}, {model}) ')
     return make, series, model
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_make_series_model(host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
+    if kwargs.get('cache'):
+        return await _async_cached('make_series_model', async_poll_make_series_model, host, community, **kwargs)
     object_id = await async_poll('sysObjectID.0', host, community, version=version, retries=retries, timeout=timeout)
     if not object_id:
         return None, None, None
     oid = object_id.get('sysObjectID.0').lstrip('.')
-    base = oid
-    if not base:
+    if not oid:
         return None, None, None
-    oid_dict = {}
-    while base and not oid_dict:
-        oid_dict = translations.get(base)
-        if not oid_dict:
-            base = ".".join(base.split('.')[:-1])
-    if not base or not oid_dict:
+    make, series, model = ModelIndex.decode(oid)
+    if not make:
         return None, None, None
-    make = oid_dict.get('make')
-    series = None
-    model = None
-    model_octets = re.sub(base, '', oid).split('.')[1:] if base != '1.3.6.1.4.1.2636.1.1.1' else re.sub(base, '', oid).split('.')[2:]
-    if make == 'a10':
-        if len(model_octets) == 1:
-            series = oid_dict.get(model_octets[0]).get('series') if oid_dict.get(model_octets[0]) else None
-        else:
-            series = oid_dict.get(model_octets[0]).get(model_octets[1]).get('series') if oid_dict.get(model_octets[0]) and oid_dict.get(model_octets[0]).get(model_octets[1]) else None
-        model_poll = await async_poll('sysDescr.0', host, community, version=version, retries=retries, timeout=timeout)
-        if not model_poll or not model_poll.get('sysDescr.0') or re.search('NOSUCHOBJECT', str(model_poll.values())):
+    if make in ModelIndex.DESCR_MAKES:
+        descr = await async_poll_descr(host, community, version=version, retries=retries, timeout=timeout)
+        if make == 'a10' and (not descr or 'NOSUCHOBJECT' in descr):
             return None, None, None
-        a10_model_regex = re.compile(r'(?:AX|TH)\d{3,4}(?:S|-\d+)?')
-        model = a10_model_regex.search(model_poll.get('sysDescr.0')).group(0) if a10_model_regex.search(model_poll.get('sysDescr.0')) else None
-    elif make == 'arista':
-        model = ''.join(oid_dict.get(octet) if oid_dict.get(octet) else octet for octet in model_octets)
-        series = ''.join(oid_dict.get(octet) if oid_dict.get(octet) else octet for octet in model_octets[:2])
-    elif make == 'cisco':
-        model = oid_dict.get(model_octets[0]).get('model') if oid_dict.get(model_octets[0]) else None
-        series = oid_dict.get(model_octets[0]).get('series') if oid_dict.get(model_octets[0]) else None
-    elif make in ['alcatel', 'juniper', 'f5']:
-        subset = oid_dict.get(model_octets[0])
-        if subset:
-            series = subset.get('series')
-            if len(model_octets) == 1:
-                model = subset.get('model') if subset.get('model') else subset.get('base')
-            else:
-                model = subset.get('model') if subset.get('model') else "".join((subset.get('base'), subset.get(model_octets[-1]).get('model')))
-                if not series and make == 'juniper':
-                    series = "".join((subset.get('base'), subset.get(model_octets[-1]).get('series')))
+        make, series, model = ModelIndex.decode(oid, descr)
     elif make == 'avocent':
-        poll_result = await async_poll('1.3.6.1.4.1.10418.16.2.1.2.0', host, community, version=version, retries=retries, timeout=timeout)
+        poll_result = await async_poll(ModelIndex.AVOCENT_MODEL_OIDS[0], host, community, version=version, retries=retries, timeout=timeout)
         if poll_result and re.search('NOSUCHOBJECT', str(poll_result.values())):
             poll_result = None
-        poll_result = await async_poll('1.3.6.1.4.1.10418.26.2.1.2.0', host, community, version=version, retries=retries, timeout=timeout) if not poll_result else poll_result
-        if poll_result and re.search(r'ACS\d{4}', str(poll_result.values())):
-            model = re.search(r'ACS\d{4}', str(poll_result.values())).group(0)
-            series = f'{model[:5]}00'
-    elif make == 'niagara':
-        poll_result = poll('sysDescr.0', host, community, version=version, retries=retries, timeout=timeout)
-        if poll_result and poll_result.get('sysDescr.0') and not re.search('NOSUCHOBJECT', str(poll_result)):
-            result = re.search('Model Number: (\w+)( |-)(\w+)', poll_result.get('sysDescr.0'), re.I)
-            if result:
-                if result.group(2) == ' ':
-                    series = result.group(1)
-                    model = result.group(3)
-                else:
-                    series = result.group(1)
-                    model = "-".join((result.group(1), result.group(3)))
+        poll_result = await async_poll(ModelIndex.AVOCENT_MODEL_OIDS[1], host, community, version=version, retries=retries, timeout=timeout) if not poll_result else poll_result
+        series, model = ModelIndex.decode_avocent(poll_result)
     if not all((make, series, model)):
         logging.debug(f'poll_make_series_model {host}: oid {oid} not fully recognized ({make}, {series}, {model})')
     return make, series, model
 
+#Device fingerprint, system group scalars and sysObjectID in a single GET
+@Metrics.traced
+@Timing.budgeted
+def poll_fingerprint(host, community, **kwargs):
+    """
+    Polls sysDescr, sysObjectID, sysUpTime, sysContact, sysName and sysLocation in one request
+    and decodes make, series and model from the same response. Only avocent needs a second request
+    """
+    version = kwargs.get('version', 2)
+    retries = kwargs.get('retries', 1)
+    timeout = kwargs.get('timeout', 1)
+    if kwargs.get('cache'):
+        #uptime is never served from cache, a hit polls it fresh
+        fresh = {}
+        fingerprint = _cached('fingerprint', partial(_fingerprint_fetch, fresh=fresh), host, community, **kwargs)
+        if not fingerprint:
+            return fingerprint
+        if 'uptime' not in fresh:
+            fresh['uptime'] = _uptime(poll(['sysUpTime.0'], host, community, version=version, retries=retries, timeout=timeout))
+        return dict(fingerprint, uptime=fresh['uptime'])
+    poll_result = poll(_fingerprint_oids, host, community, version=version, retries=retries, timeout=timeout)
+    if not poll_result:
+        return
+    fingerprint = _decode_fingerprint(poll_result)
+    if fingerprint.get('make') == 'avocent':
+        model_poll = poll(list(ModelIndex.AVOCENT_MODEL_OIDS), host, community, version=version, retries=retries, timeout=timeout)
+        fingerprint['series'], fingerprint['model'] = ModelIndex.decode_avocent(model_poll)
+    return fingerprint
+
+@Metrics.traced
+@Timing.budgeted
+async def async_poll_fingerprint(host, community, **kwargs):
+    """
+    Polls sysDescr, sysObjectID, sysUpTime, sysContact, sysName and sysLocation in one request
+    and decodes make, series and model from the same response. Only avocent needs a second request
+    """
+    version = kwargs.get('version', 2)
+    retries = kwargs.get('retries', 1)
+    timeout = kwargs.get('timeout', 1)
+    if kwargs.get('cache'):
+        fresh = {}
+        fingerprint = await _async_cached('fingerprint', partial(_async_fingerprint_fetch, fresh=fresh), host, community, **kwargs)
+        if not fingerprint:
+            return fingerprint
+        if 'uptime' not in fresh:
+            fresh['uptime'] = _uptime(await async_poll(['sysUpTime.0'], host, community, version=version, retries=retries, timeout=timeout))
+        return dict(fingerprint, uptime=fresh['uptime'])
+    poll_result = await async_poll(_fingerprint_oids, host, community, version=version, retries=retries, timeout=timeout)
+    if not poll_result:
+        return
+    fingerprint = _decode_fingerprint(poll_result)
+    if fingerprint.get('make') == 'avocent':
+        model_poll = await async_poll(list(ModelIndex.AVOCENT_MODEL_OIDS), host, community, version=version, retries=retries, timeout=timeout)
+        fingerprint['series'], fingerprint['model'] = ModelIndex.decode_avocent(model_poll)
+    return fingerprint
+
+@Metrics.traced
+@Timing.budgeted
 def poll_interface_number(host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
@@ -344,6 +523,8 @@ def poll_interface_number(host, community, **kwargs):
     poll_result = poll('ifNumber.0', host, community, version=version, retries=retries, timeout=timeout)
     return poll_result.get('ifNumber.0')
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_interface_number(host, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
@@ -351,6 +532,8 @@ async def async_poll_interface_number(host, community, **kwargs):
     poll_result = await async_poll('ifNumber.0', host, community, version=version, retries=retries, timeout=timeout)
     return poll_result.get('ifNumber.0')
 
+@Metrics.traced
+@Timing.budgeted
 def poll_interface_ips(host, community, index=None, v6=False, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
@@ -374,17 +557,15 @@ def poll_interface_ips(host, community, index=None, v6=False, **kwargs):
     except:
         return
     if raw:
-        version = "2.16" if v6 else "1.4"
-        for line in raw.keys():
-            if int(raw.get(line)) and line.split('.', 1)[1].startswith(version) and not line.split('.', 1)[1].startswith(version + ".254"):
-                addr = IPUtils.reduce_ipv6_address(":".join([str(format(int(digit), '02x')) for digit in line.split('.')[3:]])) if v6 else str(line.split('.', 3)[-1])
-                if index and int(raw[line]) == int(index):
-                    return {int(raw.get(line)):addr}
-                else:
-                    result.update({int(raw.get(line)):addr})
+        for if_index, addr in _address_rows(raw, v6):
+            if index and if_index == int(index):
+                return {if_index:addr}
+            result.update({if_index:addr})
         if result:
             return result
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_interface_ips(host, community, index=None, v6=False, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
@@ -408,29 +589,31 @@ async def async_poll_interface_ips(host, community, index=None, v6=False, **kwar
     except:
         return
     if raw:
-        version = "2.16" if v6 else "1.4"
-        for line in raw.keys():
-            if int(raw.get(line)) and line.split('.', 1)[1].startswith(version) and not line.split('.', 1)[1].startswith(version + ".254"):
-                addr = IPUtils.reduce_ipv6_address(":".join([str(format(int(digit), '02x')) for digit in line.split('.')[3:]])) if v6 else str(line.split('.', 3)[-1])
-                if index and int(raw[line]) == int(index):
-                    return {int(raw.get(line)):addr}
-                else:
-                    result.update({int(raw.get(line)):addr})
+        for if_index, addr in _address_rows(raw, v6):
+            if index and if_index == int(index):
+                return {if_index:addr}
+            result.update({if_index:addr})
         if result:
             return result
 
+@Metrics.traced
+@Timing.budgeted
 def poll_interface_ip(host, community, interface, v6=False, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
     return poll_interfaces(host, community, v6=v6, version=version, retries=retries, timeout=timeout).get(interface)
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_interface_ip(host, community, interface, v6=False, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
     return await async_poll_interfaces(host, community, v6=v6, version=version, retries=retries, timeout=timeout).get(interface)
 
+@Metrics.traced
+@Timing.budgeted
 def poll_ifOperStatus(host, community, index=None, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
@@ -443,6 +626,8 @@ def poll_ifOperStatus(host, community, index=None, **kwargs):
         except:
             return
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_ifOperStatus(host, community, index=None, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
@@ -455,6 +640,8 @@ async def async_poll_ifOperStatus(host, community, index=None, **kwargs):
         except:
             return
 
+@Metrics.traced
+@Timing.budgeted
 def poll_ifAdminStatus(host, community, index=None, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
@@ -467,6 +654,8 @@ def poll_ifAdminStatus(host, community, index=None, **kwargs):
         except:
             return
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_ifAdminStatus(host, community, index=None, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
@@ -479,16 +668,27 @@ async def async_poll_ifAdminStatus(host, community, index=None, **kwargs):
         except:
             return
 
+@Metrics.traced
+@Timing.budgeted
 def poll_interfaces(host, community, v6=False, **kwargs):
     version = kwargs.get('version', 2)
-    retries = kwargs.get('retries', 1)
+    retries = kwargs.get('retries', 2)
     timeout = kwargs.get('timeout', 1)
     if v6: address = "v6_ip"
     else: address = "v4_ip"
-    ips = poll_interface_ips(host, community, v6=v6, version=version, retries=2, timeout=timeout)
-    interfaces = poll_ifDescr(host, community, version=version, retries=2, timeout=timeout)
-    oper = poll_ifOperStatus(host, community, version=version, retries=2, timeout=timeout)
-    admin = poll_ifAdminStatus(host, community, version=version, retries=2, timeout=timeout)
+    if kwargs.get('snapshots') is not None and version not in (1, '1'):
+        return _incremental_interfaces(host, community, v6, address, kwargs['snapshots'], version=version, retries=retries, timeout=timeout)
+    ips = poll_interface_ips(host, community, v6=v6, version=version, retries=retries, timeout=timeout)
+    if kwargs.get('sparse', True):
+        table = _sparse_table(_sparse_rows(ips, kwargs.get('sparse_limit', _sparse_limit)), _interface_columns, host, community, version=version, retries=retries, timeout=timeout)
+        if table is not None:
+            return _join_interfaces(ips, table, address)
+    if kwargs.get('bulk', True) and version not in (1, '1'):
+        table = poll_table(_interface_columns, host, community, version=version, retries=retries, timeout=timeout, structured=True)
+        return _join_interfaces(ips, table, address)
+    interfaces = poll_ifDescr(host, community, version=version, retries=retries, timeout=timeout)
+    oper = poll_ifOperStatus(host, community, version=version, retries=retries, timeout=timeout)
+    admin = poll_ifAdminStatus(host, community, version=version, retries=retries, timeout=timeout)
     result = []
     if all((interfaces, oper, admin, ips)):
         for ip in ips.keys():
@@ -497,16 +697,38 @@ def poll_interfaces(host, community, v6=False, **kwargs):
                         'oper_status':oper[".".join(('ifOperStatus', str(ip)))], 'admin_status':admin['.'.join(('ifAdminStatus', str(ip)))]})
     return result
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_interfaces(host, community, v6=False, **kwargs):
     version = kwargs.get('version', 2)
-    retries = kwargs.get('retries', 1)
+    retries = kwargs.get('retries', 2)
     timeout = kwargs.get('timeout', 1)
     if v6: address = "v6_ip"
     else: address = "v4_ip"
-    ips = await async_poll_interface_ips(host, community, v6=v6, version=version, retries=retries, timeout=timeout)
-    interfaces = await async_poll_ifDescr(host, community, version=version, retries=retries, timeout=timeout)
-    oper = await async_poll_ifOperStatus(host, community, version=version, retries=2, timeout=timeout)
-    admin = await async_poll_ifAdminStatus(host, community, version=version, retries=2, timeout=timeout)
+    if kwargs.get('snapshots') is not None and version not in (1, '1'):
+        return await _async_incremental_interfaces(host, community, v6, address, kwargs['snapshots'], version=version, retries=retries, timeout=timeout)
+    ips = None
+    if kwargs.get('sparse', True):
+        #IP-bearing rows first, then just those rows, unless there are too many to beat walking
+        ips = await async_poll_interface_ips(host, community, v6=v6, version=version, retries=retries, timeout=timeout)
+        table = await _async_sparse_table(_sparse_rows(ips, kwargs.get('sparse_limit', _sparse_limit)), _interface_columns, host, community, version=version, retries=retries, timeout=timeout)
+        if table is not None:
+            return _join_interfaces(ips, table, address)
+        if kwargs.get('bulk', True) and version not in (1, '1'):
+            table = await async_poll_table(_interface_columns, host, community, version=version, retries=retries, timeout=timeout, structured=True)
+            return _join_interfaces(ips, table, address)
+    elif kwargs.get('bulk', True) and version not in (1, '1'):
+        ips, table = await asyncio.gather(async_poll_interface_ips(host, community, v6=v6, version=version, retries=retries, timeout=timeout),
+                async_poll_table(_interface_columns, host, community, version=version, retries=retries, timeout=timeout, structured=True))
+        return _join_interfaces(ips, table, address)
+    columns = [async_poll_ifDescr(host, community, version=version, retries=retries, timeout=timeout),
+            async_poll_ifOperStatus(host, community, version=version, retries=retries, timeout=timeout),
+            async_poll_ifAdminStatus(host, community, version=version, retries=retries, timeout=timeout)]
+    #The address table is only walked here when the sparse fetch did not already get it
+    if ips is None:
+        ips, interfaces, oper, admin = await asyncio.gather(async_poll_interface_ips(host, community, v6=v6, version=version, retries=retries, timeout=timeout), *columns)
+    else:
+        interfaces, oper, admin = await asyncio.gather(*columns)
     result = []
     if all((interfaces, oper, admin, ips)):
         for ip in ips.keys():
@@ -515,14 +737,48 @@ async def async_poll_interfaces(host, community, v6=False, **kwargs):
                         'oper_status':oper[".".join(('ifOperStatus', str(ip)))], 'admin_status':admin['.'.join(('ifAdminStatus', str(ip)))]})
     return result
 
-def poll_ip_interfaces(host, community, v6=False, **kwargs):
+#Interface counters, sampled with sysUpTime so rates survive counter wraps and reboots
+@Metrics.traced
+@Timing.budgeted
+def poll_counters(host, community, **kwargs):
+    """
+    Samples interface counters (columns, default Counters.COUNTER_COLUMNS) in one GETBULK stream.
+    With a Counters.CounterStore as store, returns the Rates since the host's previous sample instead
+    """
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
+    columns = kwargs.get('columns', Counters.COUNTER_COLUMNS)
+    uptime, _ = _device_state(poll(['sysUpTime.0'], host, community, version=version, retries=retries, timeout=timeout))
+    table = poll_table(columns, host, community, version=version, retries=retries, timeout=timeout, max_repetitions=kwargs.get('max_repetitions', 25), structured=True)
+    return _counter_sample(host, table, uptime, columns, kwargs.get('store'))
+
+@Metrics.traced
+@Timing.budgeted
+async def async_poll_counters(host, community, **kwargs):
+    """
+    Samples interface counters (columns, default Counters.COUNTER_COLUMNS) in one GETBULK stream.
+    With a Counters.CounterStore as store, returns the Rates since the host's previous sample instead
+    """
+    version = kwargs.get('version', 2)
+    retries = kwargs.get('retries', 1)
+    timeout = kwargs.get('timeout', 1)
+    columns = kwargs.get('columns', Counters.COUNTER_COLUMNS)
+    state, table = await asyncio.gather(async_poll(['sysUpTime.0'], host, community, version=version, retries=retries, timeout=timeout),
+            async_poll_table(columns, host, community, version=version, retries=retries, timeout=timeout, max_repetitions=kwargs.get('max_repetitions', 25), structured=True))
+    return _counter_sample(host, table, _device_state(state)[0], columns, kwargs.get('store'))
+
+@Metrics.traced
+@Timing.budgeted
+def poll_ip_interfaces(host, community, v6=False, **kwargs):
+    version = kwargs.get('version', 2)
+    retries = kwargs.get('retries', 2)
+    timeout = kwargs.get('timeout', 1)
     if v6: address = "v6_ip"
     else: address = "v4_ip"
-    ips = poll_interface_ips(host, community, v6=v6, version=version, retries=2, timeout=timeout)
-    interfaces = poll_ifDescr(host, community, version=version, retries=2, timeout=timeout)
+    ips = poll_interface_ips(host, community, v6=v6, version=version, retries=retries, timeout=timeout)
+    table = _sparse_table(_sparse_rows(ips, kwargs.get('sparse_limit', _sparse_limit)), ('ifDescr',), host, community, version=version, retries=retries, timeout=timeout) if kwargs.get('sparse', True) else None
+    interfaces = table.to_dict() if table is not None else poll_ifDescr(host, community, version=version, retries=retries, timeout=timeout)
     result = []
     if all((interfaces, ips)):
         for ip in ips.keys():
@@ -530,14 +786,17 @@ def poll_ip_interfaces(host, community, v6=False, **kwargs):
                 result.append({interfaces[".".join(('ifDescr', str(ip)))]:str(ips[ip])})
     return result
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_ip_interfaces(host, community, v6=False, **kwargs):
     version = kwargs.get('version', 2)
-    retries = kwargs.get('retries', 1)
+    retries = kwargs.get('retries', 2)
     timeout = kwargs.get('timeout', 1)
     if v6: address = "v6_ip"
     else: address = "v4_ip"
-    ips = await async_poll_interface_ips(host, community, v6=v6, version=version, retries=2, timeout=timeout)
-    interfaces = await async_poll_ifDescr(host, community, version=version, retries=2, timeout=timeout)
+    ips = await async_poll_interface_ips(host, community, v6=v6, version=version, retries=retries, timeout=timeout)
+    table = await _async_sparse_table(_sparse_rows(ips, kwargs.get('sparse_limit', _sparse_limit)), ('ifDescr',), host, community, version=version, retries=retries, timeout=timeout) if kwargs.get('sparse', True) else None
+    interfaces = table.to_dict() if table is not None else await async_poll_ifDescr(host, community, version=version, retries=retries, timeout=timeout)
     result = []
     if all((interfaces, ips)):
         for ip in ips.keys():
@@ -545,18 +804,24 @@ async def async_poll_ip_interfaces(host, community, v6=False, **kwargs):
                 result.append({interfaces[".".join(('ifDescr', str(ip)))]:str(ips[ip])})
     return result
 
+@Metrics.traced
+@Timing.budgeted
 def poll_interface_index(host, index, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
     return poll('ifIndex.' + str(index), host, community, version=version, retries=retries, timeout=timeout)
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_interface_index(host, index, community, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
     return await async_poll('ifIndex.' + str(index), host, community, version=version, retries=retries, timeout=timeout)
 
+@Metrics.traced
+@Timing.budgeted
 def poll_ifDescr(host, community, index=None, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
@@ -566,6 +831,8 @@ def poll_ifDescr(host, community, index=None, **kwargs):
     else:
         return walk('ifDescr', host, community, version=version, retries=retries, timeout=timeout)
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_ifDescr(host, community, index=None, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
@@ -575,52 +842,99 @@ async def async_poll_ifDescr(host, community, index=None, **kwargs):
     else:
         return await async_walk('ifDescr', host, community, version=version, retries=retries, timeout=timeout)
 
+@Metrics.traced
+@Timing.budgeted
 def poll_serial_number(host, community, index=None, make=None, **kwargs):
+    """
+    Serial number(s) from the vendor table for make, or from the first vendor table that answers.
+    With speculative set every candidate table is probed at once on a shared pool and the vendor
+    that answered is remembered for the device's sysObjectID family, so its relatives are probed
+    with that one first. Once a probe wins, probes still queued are dropped and running walks
+    stop at their next GETBULK page
+    """
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
-    oids = {'cisco': '.1.3.6.1.2.1.47.1.1.1.1.11',
-            'juniper': '.1.3.6.1.4.1.2636.3.1.3',
-            'f5': '.1.3.6.1.4.1.3375.2.1.3.3.3',
-            'a10': '.1.3.6.1.4.1.22610.2.4.1.6.2',
-            'avocent': '.1.3.6.1.4.1.10418.16.2.1.4',
-            'alcatel': '.1.3.6.1.4.1.6527.3.1.2.2.1.8.1.5'}
-    if make and oids.get(make):
-        oids = {make: oids.get(make)}
-    if index:
-        for oid in oids.values():
-            result = poll(oid + str(index), host, community, version=version, retries=retries, timeout=timeout)
-            if result:
-                return result
-    else:
-        for oid in oids.values():
-            result = walk(oid, host, community, version=version, retries=retries, timeout=timeout)
-            if result:
-                return result
+    if kwargs.get('cache'):
+        return _cached(f'serial_number:{make}:{index}', partial(poll_serial_number, index=index, make=make), host, community, **kwargs)
+    if make and _serial_oids.get(make):
+        return _serial_probe(_serial_oids[make], host, community, index, version=version, retries=retries, timeout=timeout)
+    family = None
+    if kwargs.get('speculative') or kwargs.get('object_id'):
+        family = _object_family(kwargs.get('object_id') or _device_state(poll(['sysObjectID.0'], host, community, version=version, retries=retries, timeout=timeout))[1])
+    learned = _serial_vendors.get(family)
+    if learned:
+        result = _serial_probe(_serial_oids[learned], host, community, index, version=version, retries=retries, timeout=timeout)
+        if _serial_found(result):
+            return result
+    candidates = [(vendor, oid) for vendor, oid in _serial_oids.items() if vendor != learned]
+    if kwargs.get('speculative'):
+        cancelled = threading.Event()
+        probes = [(vendor, _probe_pool.submit(contextvars.copy_context().run, _serial_probe, oid, host, community, index, cancelled, version=version, retries=retries, timeout=timeout))
+                for vendor, oid in candidates]
+        try:
+            for vendor, probe in probes:
+                result = probe.result()
+                if _serial_found(result):
+                    _remember_serial_vendor(family, vendor)
+                    return result
+        finally:
+            cancelled.set()
+            for _, probe in probes:
+                probe.cancel()
+        return
+    for vendor, oid in candidates:
+        result = _serial_probe(oid, host, community, index, version=version, retries=retries, timeout=timeout)
+        if _serial_found(result):
+            _remember_serial_vendor(family, vendor)
+            return result
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_serial_number(host, community, index=None, make=None, **kwargs):
+    """
+    Serial number(s) from the vendor table for make, or from the first vendor table that answers.
+    With speculative set every candidate table is probed at once and the vendor that answered is
+    remembered for the device's sysObjectID family, so its relatives are probed with that one first
+    """
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
     timeout = kwargs.get('timeout', 1)
-    oids = {'cisco': '.1.3.6.1.2.1.47.1.1.1.1.11',
-            'juniper': '.1.3.6.1.4.1.2636.3.1.3',
-            'f5': '.1.3.6.1.4.1.3375.2.1.3.3.3',
-            'a10': '.1.3.6.1.4.1.22610.2.4.1.6.2',
-            'avocent': '.1.3.6.1.4.1.10418.16.2.1.4',
-            'alcatel': '.1.3.6.1.4.1.6527.3.1.2.2.1.8.1.5'}
-    if make and oids.get(make):
-        oids = {make: oids.get(make)}
-    if not isinstance(index, type(None)):
-        for oid in oids.values():
-            result = await async_poll(".".join((oid, str(index))), host, community, version=version, retries=retries, timeout=timeout)
-            if result and 'NOSUCHOBJECT' not in result.values():
-                return result
-    else:
-        for oid in oids.values():
-            result = await async_walk(oid, host, community, version=version, retries=retries, timeout=timeout)
-            if result:
-                return result
+    if kwargs.get('cache'):
+        return await _async_cached(f'serial_number:{make}:{index}', partial(async_poll_serial_number, index=index, make=make), host, community, **kwargs)
+    if make and _serial_oids.get(make):
+        return await _async_serial_probe(_serial_oids[make], host, community, index, version=version, retries=retries, timeout=timeout)
+    family = None
+    if kwargs.get('speculative') or kwargs.get('object_id'):
+        family = _object_family(kwargs.get('object_id') or _device_state(await async_poll(['sysObjectID.0'], host, community, version=version, retries=retries, timeout=timeout))[1])
+    learned = _serial_vendors.get(family)
+    if learned:
+        result = await _async_serial_probe(_serial_oids[learned], host, community, index, version=version, retries=retries, timeout=timeout)
+        if _serial_found(result):
+            return result
+    candidates = [(vendor, oid) for vendor, oid in _serial_oids.items() if vendor != learned]
+    if kwargs.get('speculative'):
+        #Everything goes out at once, answers are still taken in vendor order
+        probes = [(vendor, asyncio.ensure_future(_async_serial_probe(oid, host, community, index, version=version, retries=retries, timeout=timeout)))
+                for vendor, oid in candidates]
+        try:
+            for vendor, probe in probes:
+                result = await probe
+                if _serial_found(result):
+                    _remember_serial_vendor(family, vendor)
+                    return result
+        finally:
+            for _, probe in probes:
+                probe.cancel()
+        return
+    for vendor, oid in candidates:
+        result = await _async_serial_probe(oid, host, community, index, version=version, retries=retries, timeout=timeout)
+        if _serial_found(result):
+            _remember_serial_vendor(family, vendor)
+            return result
 
+@Metrics.traced
+@Timing.budgeted
 def poll_number_of_chassis(host, community, make, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
@@ -631,21 +945,23 @@ def poll_number_of_chassis(host, community, make, **kwargs):
         oid = oids.get(make)
     else:
         return
-    snmp_output = walk(oid, host, community, version=version, retries=retries, timeout=timeout)
+    snmp_output = walk(oid, host, community, version=version, retries=retries, timeout=timeout, structured=True)
     if not snmp_output:
         logging.debug(f'No output from walk {host} {make} {oid}')
         return
     chassis = 0
-    for key in snmp_output.keys():
+    for value in snmp_output.values():
         try:
-            if make == 'cisco' and int(snmp_output.get(key)) == 3:
+            if make == 'cisco' and int(value) == 3:
                 chassis += 1
-            elif make == 'alcatel' and re.search('chassis', snmp_output.get(key), flags=re.IGNORECASE):
+            elif make == 'alcatel' and re.search('chassis', value, flags=re.IGNORECASE):
                 chassis += 1
         except ValueError as err:
             logging.debug(err)
     return chassis
 
+@Metrics.traced
+@Timing.budgeted
 async def async_poll_number_of_chassis(host, community, make, **kwargs):
     version = kwargs.get('version', 2)
     retries = kwargs.get('retries', 1)
@@ -656,37 +972,202 @@ async def async_poll_number_of_chassis(host, community, make, **kwargs):
         oid = oids.get(make)
     else:
         return
-    snmp_output = await async_walk(oid, host, community, version=version, retries=retries, timeout=timeout)
+    snmp_output = await async_walk(oid, host, community, version=version, retries=retries, timeout=timeout, structured=True)
     if not snmp_output:
         logging.debug(f'No output from walk {host} {make} {oid}')
         return
     chassis = 0
-    for key in snmp_output.keys():
+    for value in snmp_output.values():
         try:
-            if make == 'cisco' and int(snmp_output.get(key)) == 3:
+            if make == 'cisco' and int(value) == 3:
                 chassis += 1
-            elif make == 'alcatel' and re.search('chassis', snmp_output.get(key), flags=re.IGNORECASE):
+            elif make == 'alcatel' and re.search('chassis', value, flags=re.IGNORECASE):
                 chassis += 1
         except ValueError as err:
             logging.debug(err)
     return chassis
 
+#Physical inventory, the whole entPhysicalTable in one GETBULK sweep
+@Metrics.traced
+@Timing.budgeted
+def poll_entity_inventory(host, community, **kwargs):
+    """
+    Inventory.Inventory of the entPhysicalTable: entities with their class, name, model, serial,
+    revisions and FRU flag, linked into their containment tree. chassis_count() and serials()
+    on it replace separate entPhysicalClass and entPhysicalSerialNum walks
+    """
+    kwargs.pop('streams', None)
+    try:
+        entities = _records(_table_rows(Inventory.ENTITY_COLUMNS, host, community, **kwargs), Inventory.entity)
+    except Exception as err:
+        return
+    if entities:
+        return Inventory.Inventory(entities)
+
+@Metrics.traced
+@Timing.budgeted
+async def async_poll_entity_inventory(host, community, **kwargs):
+    """
+    Inventory.Inventory of the entPhysicalTable: entities with their class, name, model, serial,
+    revisions and FRU flag, linked into their containment tree. The columns are split over
+    streams GETBULK streams walked at once and their rows merged by index
+    """
+    streams = max(min(kwargs.pop('streams', 3), len(Inventory.ENTITY_COLUMNS)), 1)
+    groups = [Inventory.ENTITY_COLUMNS[start::streams] for start in range(streams)]
+    try:
+        walked = await asyncio.gather(*(_async_flat(_async_table_rows(group, host, community, **kwargs)) for group in groups))
+    except Exception as err:
+        return
+    rows = {}
+    for group, group_rows in zip(groups, walked):
+        for index, values in group_rows:
+            row = rows.get(index)
+            if row is None:
+                row = rows[index] = dict.fromkeys(Inventory.ENTITY_COLUMNS)
+            row.update(zip(group, values))
+    entities = _records([[(index, list(row.values())) for index, row in rows.items()]], Inventory.entity)
+    if entities:
+        return Inventory.Inventory(entities)
+
+#Neighbor tables: ARP, bridge forwarding and LLDP, decoded into Neighbors records as rows stream in
+@Metrics.traced
+@Timing.budgeted
+def poll_arp(host, community, **kwargs):
+    """
+    ARP/ND cache as Neighbors.ArpEntry records from ipNetToPhysicalTable, or v4 only from
+    ipNetToMediaTable on agents without it
+    """
+    try:
+        entries = _records(_table_rows(Neighbors.ARP_COLUMNS, host, community, **kwargs), Neighbors.arp_entry)
+        if not entries:
+            entries = _records(_table_rows(Neighbors.ARP_V4_COLUMNS, host, community, **kwargs), Neighbors.arp_v4_entry)
+    except Exception as err:
+        return
+    return entries
+
+@Metrics.traced
+@Timing.budgeted
+async def async_poll_arp(host, community, **kwargs):
+    """
+    ARP/ND cache as Neighbors.ArpEntry records from ipNetToPhysicalTable, or v4 only from
+    ipNetToMediaTable on agents without it
+    """
+    try:
+        entries = await _async_records(_async_table_rows(Neighbors.ARP_COLUMNS, host, community, **kwargs), Neighbors.arp_entry)
+        if not entries:
+            entries = await _async_records(_async_table_rows(Neighbors.ARP_V4_COLUMNS, host, community, **kwargs), Neighbors.arp_v4_entry)
+    except Exception as err:
+        return
+    return entries
+
+@Metrics.traced
+@Timing.budgeted
+def poll_fdb(host, community, vlans=None, **kwargs):
+    """
+    Learned MAC addresses as Neighbors.FdbEntry records. dot1qTpFdbTable is used when the bridge
+    has it, otherwise dot1dTpFdbTable is read in every VLAN's community@vlan context (VLANs from
+    vtpVlanState unless given) or, with no VLANs, once with community itself. VLAN contexts that
+    do not answer are skipped
+    """
+    kwargs.pop('vlan_concurrency', None)
+    try:
+        if vlans is None:
+            ports = Neighbors.port_map(_flat(_table_rows(Neighbors.PORT_COLUMNS, host, community, **kwargs)))
+            entries = _records(_table_rows(Neighbors.FDB_COLUMNS, host, community, **kwargs), Neighbors.fdb_entry, ports)
+            if entries:
+                return entries
+            vlans = Neighbors.vlans(_flat(_table_rows(Neighbors.VLAN_COLUMNS, host, community, **kwargs)))
+        if not vlans:
+            return _bridge_fdb(host, community, None, **kwargs)
+    except Exception as err:
+        return
+    found = [_bridge_fdb(host, f'{community}@{vlan}', vlan, **kwargs) for vlan in vlans]
+    if all(entries is None for entries in found):
+        return
+    return [entry for entries in found if entries for entry in entries]
+
+@Metrics.traced
+@Timing.budgeted
+async def async_poll_fdb(host, community, vlans=None, **kwargs):
+    """
+    Learned MAC addresses as Neighbors.FdbEntry records. dot1qTpFdbTable is used when the bridge
+    has it, otherwise dot1dTpFdbTable is read in every VLAN's community@vlan context (VLANs from
+    vtpVlanState unless given, vlan_concurrency at a time) or, with no VLANs, once with community
+    itself. VLAN contexts that do not answer are skipped
+    """
+    limit = asyncio.Semaphore(kwargs.pop('vlan_concurrency', 4))
+    try:
+        if vlans is None:
+            port_rows, entries = await asyncio.gather(_async_flat(_async_table_rows(Neighbors.PORT_COLUMNS, host, community, **kwargs)),
+                    _async_records(_async_table_rows(Neighbors.FDB_COLUMNS, host, community, **kwargs), Neighbors.fdb_entry, {}))
+            if entries:
+                ports = Neighbors.port_map(port_rows)
+                for entry in entries:
+                    entry.if_index = ports.get(entry.port)
+                return entries
+            vlans = Neighbors.vlans(await _async_flat(_async_table_rows(Neighbors.VLAN_COLUMNS, host, community, **kwargs)))
+        if not vlans:
+            return await _async_bridge_fdb(host, community, None, **kwargs)
+    except Exception as err:
+        return
+    async def context(vlan):
+        async with limit:
+            return await _async_bridge_fdb(host, f'{community}@{vlan}', vlan, **kwargs)
+    found = await asyncio.gather(*(context(vlan) for vlan in vlans))
+    if all(entries is None for entries in found):
+        return
+    return [entry for entries in found if entries for entry in entries]
+
+@Metrics.traced
+@Timing.budgeted
+def poll_lldp_neighbors(host, community, **kwargs):
+    """
+    LLDP neighbors as Neighbors.LldpNeighbor records, with the local port id they were heard on
+    and their management addresses
+    """
+    try:
+        neighbors = _records(_table_rows(Neighbors.LLDP_COLUMNS, host, community, **kwargs), Neighbors.lldp_neighbor)
+        if not neighbors:
+            return neighbors
+        local = _flat(_table_rows(Neighbors.LLDP_LOCAL_COLUMNS, host, community, **kwargs))
+        addresses = _flat(_table_rows(Neighbors.LLDP_ADDRESS_COLUMNS, host, community, **kwargs))
+        return Neighbors.join_lldp(neighbors, local, addresses)
+    except Exception as err:
+        return
+
+@Metrics.traced
+@Timing.budgeted
+async def async_poll_lldp_neighbors(host, community, **kwargs):
+    """
+    LLDP neighbors as Neighbors.LldpNeighbor records, with the local port id they were heard on
+    and their management addresses
+    """
+    try:
+        neighbors, local, addresses = await asyncio.gather(
+                _async_records(_async_table_rows(Neighbors.LLDP_COLUMNS, host, community, **kwargs), Neighbors.lldp_neighbor),
+                _async_flat(_async_table_rows(Neighbors.LLDP_LOCAL_COLUMNS, host, community, **kwargs)),
+                _async_flat(_async_table_rows(Neighbors.LLDP_ADDRESS_COLUMNS, host, community, **kwargs)))
+    except Exception as err:
+        return
+    return Neighbors.join_lldp(neighbors, local, addresses)
+
+@Metrics.traced
+@Timing.budgeted
 def ping_poll(*iprange):
     if len(iprange) > 1:
         fping = subprocess.Popen(['fping', '-ag', iprange[0], iprange[1], '-i', '10'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
         return fping.communicate()[0].decode().split('\n')
-    raw = subprocess.Popen(['ping', "-i", "0.2", "-l", "3", "-w", "1", iprange[0]], stdout=subprocess.PIPE)
-    while raw.poll() == None:
-        time.sleep(0.1)
-    return False if raw.returncode else True
+    raw = subprocess.Popen(['ping', "-i", "0.2", "-l", "3", "-w", "1", iprange[0]], stdout=subprocess.DEVNULL)
+    return False if raw.wait() else True
 
+@Metrics.traced
+@Timing.budgeted
 async def async_ping_poll(*iprange, retries=2):
     #Calling this function, make sure you have child watcher attached to loop
-    loop = asyncio.get_event_loop()
     if len(iprange) > 1:
         for attempt in range(retries):
             try:
-                fping = await asyncio.create_subprocess_exec('fping', '-ag', iprange[0], iprange[1], '-i', '10', stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL, loop=loop)
+                fping = await asyncio.create_subprocess_exec('fping', '-ag', iprange[0], iprange[1], '-i', '10', stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
                 stdout, stderr = await fping.communicate()
                 return stdout.decode().split('\n')
             except BlockingIOError:
@@ -694,13 +1175,673 @@ async def async_ping_poll(*iprange, retries=2):
     else:
         for attempt in range(retries):
             try:
-                raw = await asyncio.create_subprocess_exec('ping', '-i', '0.2', '-l', '3', '-w', '1', iprange[0], stdout=asyncio.subprocess.PIPE, loop=loop)
+                raw = await asyncio.create_subprocess_exec('ping', '-i', '0.2', '-l', '3', '-w', '1', iprange[0], stdout=asyncio.subprocess.PIPE)
                 stdout, stderr = await raw.communicate()
                 return False if raw.returncode else True
             except BlockingIOError:
                 await asyncio.sleep(1)
 
-#Helper formatting function
+#Ping sweep, streams fping results for any list of hosts
+@Metrics.traced
+@Timing.budgeted
+def ping_sweep(hosts, **kwargs):
+    """
+    Generator yielding (host, rtt in ms or None when unreachable) for every host, feeding fping
+    chunk_size targets at a time over stdin and reading its results line by line
+    """
+    chunk_size = kwargs.get('chunk_size', 1024)
+    command = _fping_command(**kwargs)
+    source = iter(hosts)
+    while True:
+        chunk = list(itertools.islice(source, chunk_size))
+        if not chunk:
+            return
+        pending = set(chunk)
+        fping = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            fping.stdin.write(_fping_targets(chunk))
+            fping.stdin.close()
+            for line in fping.stdout:
+                host, rtt = _parse_fping(line)
+                if host in pending:
+                    pending.discard(host)
+                    yield host, rtt
+            fping.wait()
+        finally:
+            if fping.poll() is None:
+                fping.kill()
+                fping.wait()
+        for host in pending:
+            yield host, None
+
+@Metrics.traced
+@Timing.budgeted
+async def async_ping_sweep(hosts, **kwargs):
+    """
+    Async generator yielding (host, rtt in ms or None when unreachable) for every host of an
+    iterable or async iterable. Hosts are fed chunk_size at a time over stdin to up to parallelism
+    fping processes at once, and results are yielded as fping reports them. Errors, such as fping
+    missing, are raised once the results already in are out
+    """
+    chunk_size = kwargs.get('chunk_size', 1024)
+    parallelism = kwargs.get('parallelism', 4)
+    command = _fping_command(**kwargs)
+    source = hosts.__aiter__() if hasattr(hosts, '__aiter__') else iter(hosts)
+    pulling = asyncio.Lock()
+    results = asyncio.Queue(maxsize=chunk_size)
+    done = object()
+
+    async def worker():
+        while True:
+            async with pulling:
+                chunk = await _async_islice(source, chunk_size)
+            if not chunk:
+                return
+            await _async_fping(command, chunk, results)
+
+    async def supervise(workers):
+        outcome = await asyncio.gather(*workers, return_exceptions=True)
+        await results.put(done)
+        return [err for err in outcome if isinstance(err, Exception)]
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(parallelism)]
+    supervisor = asyncio.ensure_future(supervise(workers))
+    try:
+        while True:
+            item = await results.get()
+            if item is done:
+                break
+            yield item
+        errors = await supervisor
+        if errors:
+            raise errors[0]
+    finally:
+        for task in workers + [supervisor]:
+            task.cancel()
+
+#Helper decoding functions
+_fingerprint_oids = ['sysDescr.0', 'sysObjectID.0', 'sysUpTime.0', 'sysContact.0', 'sysName.0', 'sysLocation.0']
+_snmp_exceptions = ('NOSUCHOBJECT', 'NOSUCHINSTANCE', 'ENDOFMIBVIEW')
+_interface_columns = ('ifDescr', 'ifOperStatus', 'ifAdminStatus')
+_state_oids = ['sysUpTime.0', 'sysObjectID.0']
+_interface_state_oids = ['sysUpTime.0', 'ifTableLastChange.0', 'ipAddressSpinLock.0', 'ifNumber.0']
+_rows_per_get = 10
+#Above this many IP-bearing rows, walking the interface columns beats GETting the rows
+_sparse_limit = 64
+_serial_oids = {'cisco': '.1.3.6.1.2.1.47.1.1.1.1.11',
+        'juniper': '.1.3.6.1.4.1.2636.3.1.3',
+        'f5': '.1.3.6.1.4.1.3375.2.1.3.3.3',
+        'a10': '.1.3.6.1.4.1.22610.2.4.1.6.2',
+        'avocent': '.1.3.6.1.4.1.10418.16.2.1.4',
+        'alcatel': '.1.3.6.1.4.1.6527.3.1.2.2.1.8.1.5'}
+#Vendor serial table that answered, by sysObjectID family
+_serial_vendors = {}
+#Shared by every speculative serial probe, so concurrent callers cannot pile up threads
+_probe_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix='serial-probe')
+_fping_regex = re.compile(r'^(\S+) +is (alive|unreachable)(?: \((\d+(?:\.\d+)?) ms\))?')
+
+def _fingerprint_fetch(host, community, fresh, **kwargs):
+    """
+    poll_fingerprint for the cache: the whole fingerprint goes into fresh, the cached copy leaves out uptime
+    """
+    fresh.update(poll_fingerprint(host, community, **kwargs) or {})
+    return {key: value for key, value in fresh.items() if key != 'uptime'} or None
+
+async def _async_fingerprint_fetch(host, community, fresh, **kwargs):
+    fresh.update(await async_poll_fingerprint(host, community, **kwargs) or {})
+    return {key: value for key, value in fresh.items() if key != 'uptime'} or None
+
+def _uptime(poll_result):
+    uptime = (poll_result or {}).get('sysUpTimeInstance', (poll_result or {}).get('sysUpTime.0'))
+    return None if uptime in _snmp_exceptions else uptime
+
+def _decode_fingerprint(poll_result):
+    values = {key.split('.')[0]: (None if value in _snmp_exceptions else value) for key, value in poll_result.items()}
+    object_id = (values.get('sysObjectID') or '').lstrip('.')
+    descr = values.get('sysDescr')
+    make, series, model = ModelIndex.decode(object_id, descr) if object_id else (None, None, None)
+    return {'name': values.get('sysName'),
+            'contact': values.get('sysContact'),
+            'location': values.get('sysLocation'),
+            'descr': descr,
+            'uptime': values.get('sysUpTimeInstance', values.get('sysUpTime')),
+            'object_id': object_id or None,
+            'make': make,
+            'series': series,
+            'model': model}
+
+def _session_pages(oid, host, community, version=2, retries=1, timeout=1, max_repetitions=25):
+    """
+    Pages of easysnmp variables under oid from a pooled session
+    """
+    try:
+        root = OIDUtils.resolve(oid)
+    except ValueError:
+        root = None
+    column = None
+    cursor = oid
+    with SessionPool.session(host, community, version=version, retries=retries, timeout=timeout) as session:
+        while True:
+            get = session.get_next([cursor]) if version in (1, '1') else session.get_bulk([cursor], 0, max_repetitions)
+            page = []
+            for variable in get or ():
+                column = column or variable.oid
+                if variable.snmp_type in _snmp_exceptions or not _in_subtree(variable, root, column):
+                    break
+                page.append(variable)
+            if page:
+                yield page
+                cursor = ".".join((page[-1].oid, page[-1].oid_index))
+            if not get or len(page) < len(get):
+                return
+
+def _in_subtree(variable, root, column):
+    #Numeric check when both names are known, otherwise stay on the first column seen
+    if root:
+        try:
+            return OIDUtils.resolve(".".join((variable.oid, variable.oid_index)))[:len(root)] == root
+        except ValueError:
+            pass
+    return variable.oid == column
+
+def _table_rows(columns, host, community, **kwargs):
+    """
+    Batches of completed (index arcs, values) rows from a pooled session's GETBULK column stream
+    """
+    version = kwargs.get('version', 2)
+    retries = kwargs.get('retries', 1)
+    timeout = kwargs.get('timeout', 1)
+    with SessionPool.session(host, community, version=version, retries=retries, timeout=timeout) as session:
+        yield from _session_rows(session, columns, kwargs.get('max_repetitions', 25))
+
+def _async_table_rows(columns, host, community, **kwargs):
+    version = kwargs.get('version', 2)
+    retries = kwargs.get('retries', 1)
+    timeout = kwargs.get('timeout', 1)
+    max_repetitions = kwargs.get('max_repetitions', 25)
+    if Engine.supports(version, columns):
+        return _engine_rows(columns, host, community, max_repetitions, version=version, retries=retries, timeout=timeout)
+    return _executor_pages(_table_rows(columns, host, community, version=version, retries=retries, timeout=timeout, max_repetitions=max_repetitions))
+
+def _session_rows(session, columns, max_repetitions):
+    """
+    GETBULK column stream over an easysnmp session, yielding the rows each response completes
+    """
+    roots = []
+    for column in columns:
+        try:
+            roots.append(OIDUtils.resolve(column))
+        except ValueError:
+            roots.append(None)
+    cursors = {position: column for position, column in enumerate(columns)}
+    reached = [()] * len(columns)
+    pending = {}
+    while cursors:
+        active = list(cursors)
+        get = session.get_bulk([cursors[position] for position in active], 0, max_repetitions)
+        if not get:
+            break
+        finished = set()
+        for offset, variable in enumerate(get):
+            position = active[offset % len(active)]
+            if position in finished:
+                continue
+            cursor = ".".join((variable.oid, variable.oid_index))
+            index = _variable_index(variable, columns[position], roots[position])
+            if index is None or variable.snmp_type == 'ENDOFMIBVIEW' or cursor == cursors[position]:
+                finished.add(position)
+                continue
+            cursors[position] = cursor
+            reached[position] = index
+            row = pending.get(index)
+            if row is None:
+                row = pending[index] = [None] * len(columns)
+            row[position] = None if variable.snmp_type in _snmp_exceptions else variable.value
+        for position in finished:
+            del cursors[position]
+        rows = _completed_rows(pending, reached, cursors)
+        if rows:
+            yield rows
+    if pending:
+        yield _completed_rows(pending, reached, ())
+
+async def _engine_rows(columns, host, community, max_repetitions, **kwargs):
+    """
+    Engine GETBULK column stream, yielding the rows each response completes with raw values
+    """
+    depths = [len(OIDUtils.resolve(column)) for column in columns]
+    reached = [()] * len(columns)
+    active = set(range(len(columns)))
+    pending = {}
+    async for batch, ended in Engine.get_engine().column_stream(columns, host, community, max_repetitions=max_repetitions, **kwargs):
+        for position, varbind in batch:
+            index = varbind.numeric[depths[position]:]
+            row = pending.get(index)
+            if row is None:
+                row = pending[index] = [None] * len(columns)
+            row[position] = None if varbind.tag in BERUtils.EXCEPTION_TAGS else varbind.raw
+            reached[position] = index
+        active -= ended
+        rows = _completed_rows(pending, reached, active)
+        if rows:
+            yield rows
+    if pending:
+        yield _completed_rows(pending, reached, ())
+
+def _completed_rows(pending, reached, active):
+    """
+    Pops the rows every column still walking has moved past, in index order
+    """
+    horizon = min((reached[position] for position in active), default=None)
+    ready = sorted(index for index in pending if horizon is None or index <= horizon)
+    return [(index, pending.pop(index)) for index in ready]
+
+def _variable_index(variable, column, root):
+    #Index arcs under root when the returned name resolves, otherwise stay on the column name asked for
+    if root:
+        try:
+            arcs = OIDUtils.resolve(".".join((variable.oid, variable.oid_index)))
+        except ValueError:
+            arcs = None
+        if arcs is not None:
+            return arcs[len(root):] if len(arcs) > len(root) and arcs[:len(root)] == root else None
+    if variable.oid != column or not variable.oid_index:
+        return None
+    try:
+        return tuple(int(arc) for arc in variable.oid_index.split('.'))
+    except ValueError:
+        return None
+
+def _flat(batches):
+    return [row for rows in batches for row in rows]
+
+async def _async_flat(batches):
+    return [row async for rows in batches for row in rows]
+
+def _records(batches, decode, *args):
+    """
+    decode(index, values, *args) of every row, leaving out rows that do not decode
+    """
+    records = []
+    for rows in batches:
+        for index, values in rows:
+            try:
+                record = decode(index, values, *args)
+            except (IndexError, ValueError, TypeError):
+                continue
+            if record is not None:
+                records.append(record)
+    return records
+
+async def _async_records(batches, decode, *args):
+    records = []
+    async for rows in batches:
+        for index, values in rows:
+            try:
+                record = decode(index, values, *args)
+            except (IndexError, ValueError, TypeError):
+                continue
+            if record is not None:
+                records.append(record)
+    return records
+
+def _bridge_fdb(host, community, vlan, **kwargs):
+    """
+    dot1dTpFdbTable entries read with community (community@vlan for a VLAN context), None if it did not answer
+    """
+    try:
+        ports = Neighbors.port_map(_flat(_table_rows(Neighbors.PORT_COLUMNS, host, community, **kwargs)))
+        return _records(_table_rows(Neighbors.BRIDGE_FDB_COLUMNS, host, community, **kwargs), Neighbors.bridge_fdb_entry, ports, vlan)
+    except Exception as err:
+        return
+
+async def _async_bridge_fdb(host, community, vlan, **kwargs):
+    try:
+        port_rows, entries = await asyncio.gather(_async_flat(_async_table_rows(Neighbors.PORT_COLUMNS, host, community, **kwargs)),
+                _async_records(_async_table_rows(Neighbors.BRIDGE_FDB_COLUMNS, host, community, **kwargs), Neighbors.bridge_fdb_entry, {}, vlan))
+    except Exception as err:
+        return
+    ports = Neighbors.port_map(port_rows)
+    for entry in entries:
+        entry.if_index = ports.get(entry.port)
+    return entries
+
+async def _executor_pages(pages):
+    loop = asyncio.get_event_loop()
+    done = object()
+    try:
+        while True:
+            page = await loop.run_in_executor(None, contextvars.copy_context().run, next, pages, done)
+            if page is done:
+                return
+            yield page
+    finally:
+        pages.close()
+
+def _incremental_interfaces(host, community, v6, address, snapshots, **kwargs):
+    """
+    poll_interfaces against the stored snapshot. One GET of the change indicators decides;
+    while they hold still only ifLastChange is walked and the rows it shows moving are refetched
+    """
+    state = _interface_state(poll(_interface_state_oids, host, community, **kwargs))
+    if not state:
+        snapshots.discard(host)
+        return []
+    snapshot = snapshots.lookup(host, v6)
+    if snapshots.current(snapshot, state):
+        last_change = poll_table(['ifLastChange'], host, community, structured=True, **kwargs)
+        changed = snapshot.changed_rows(last_change)
+        if changed is not None and all(_update_rows(snapshot.table, poll(_row_oids(chunk), host, community, **kwargs))
+                for chunk in _chunks(changed, _rows_per_get)):
+            _refresh_snapshot(snapshot, state, last_change)
+            return _join_interfaces(snapshot.ips, snapshot.table, address)
+    ips = poll_interface_ips(host, community, v6=v6, **kwargs)
+    table = poll_table(_interface_columns + ('ifLastChange',), host, community, structured=True, **kwargs)
+    _store_snapshot(snapshots, host, v6, state, ips, table)
+    return _join_interfaces(ips, table, address)
+
+async def _async_incremental_interfaces(host, community, v6, address, snapshots, **kwargs):
+    """
+    poll_interfaces against the stored snapshot. One GET of the change indicators decides;
+    while they hold still only ifLastChange is walked and the rows it shows moving are refetched
+    """
+    state = _interface_state(await async_poll(_interface_state_oids, host, community, **kwargs))
+    if not state:
+        snapshots.discard(host)
+        return []
+    snapshot = snapshots.lookup(host, v6)
+    if snapshots.current(snapshot, state):
+        last_change = await async_poll_table(['ifLastChange'], host, community, structured=True, **kwargs)
+        changed = snapshot.changed_rows(last_change)
+        if changed is not None:
+            updates = await asyncio.gather(*(async_poll(_row_oids(chunk), host, community, **kwargs) for chunk in _chunks(changed, _rows_per_get)))
+            if all([_update_rows(snapshot.table, update) for update in updates]):
+                _refresh_snapshot(snapshot, state, last_change)
+                return _join_interfaces(snapshot.ips, snapshot.table, address)
+    ips, table = await asyncio.gather(async_poll_interface_ips(host, community, v6=v6, **kwargs),
+            async_poll_table(_interface_columns + ('ifLastChange',), host, community, structured=True, **kwargs))
+    _store_snapshot(snapshots, host, v6, state, ips, table)
+    return _join_interfaces(ips, table, address)
+
+def _interface_state(poll_result):
+    if not poll_result:
+        return
+    values = {key.split('.')[0]: value for key, value in poll_result.items()}
+    def number(name):
+        value = values.get(name)
+        return int(value) if value and value.isdigit() else None
+    state = Snapshot.InterfaceState(number('sysUpTimeInstance') or number('sysUpTime'), number('ifTableLastChange'), number('ipAddressSpinLock'), number('ifNumber'))
+    return state if state.uptime is not None else None
+
+def _address_rows(raw, v6):
+    """
+    (ifIndex, address text) for the ipAddressIfIndex rows of one family, decoded straight from
+    the index arcs. Rows on ifIndex 0 and 254.x / fe80::/8 addresses are left out as before
+    """
+    kind = 2 if v6 else 1
+    for key, value in raw.items():
+        try:
+            arcs = tuple(map(int, key.split('.', 1)[1].split('.')))
+            if_index = int(value)
+        except (IndexError, ValueError):
+            continue
+        if len(arcs) < 3 or arcs[0] != kind or arcs[2] == 254 or not if_index:
+            continue
+        address, _ = IPUtils.decode_inet(arcs)
+        if address is not None:
+            yield if_index, str(address)
+
+def _row_oids(indexes, columns=_interface_columns):
+    return [".".join((column, str(index))) for index in indexes for column in columns]
+
+def _sparse_rows(ips, limit):
+    """
+    Sorted ifIndexes holding addresses, None when there are none or more than limit
+    """
+    if not ips or len(ips) > limit:
+        return
+    return sorted({int(index) for index in ips})
+
+def _sparse_table(indexes, columns, host, community, **kwargs):
+    """
+    Table of only the rows at indexes, by batched GETs of columns.N. None to fall back to
+    walking when there are no indexes or a row did not come back whole
+    """
+    if not indexes:
+        return
+    table = Table(columns)
+    for chunk in _chunks(indexes, max(_rows_per_get * len(_interface_columns) // len(columns), 1)):
+        if not _update_rows(table, poll(_row_oids(chunk, columns), host, community, **kwargs)):
+            return
+    return table
+
+async def _async_sparse_table(indexes, columns, host, community, **kwargs):
+    if not indexes:
+        return
+    table = Table(columns)
+    chunks = _chunks(indexes, max(_rows_per_get * len(_interface_columns) // len(columns), 1))
+    updates = await asyncio.gather(*(async_poll(_row_oids(chunk, columns), host, community, **kwargs) for chunk in chunks))
+    if not all([_update_rows(table, update) for update in updates]):
+        return
+    return table
+
+def _chunks(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+def _update_rows(table, poll_result):
+    """
+    Writes polled ifTable cells into table, False if the poll failed or a row has gone
+    """
+    if not poll_result:
+        return False
+    for key, value in poll_result.items():
+        if value in _snmp_exceptions:
+            return False
+        column, _, index = key.partition('.')
+        table.add(column, parse_index(index), value)
+    return True
+
+def _refresh_snapshot(snapshot, state, last_change):
+    snapshot.state = state
+    snapshot.last_change = last_change
+
+def _store_snapshot(snapshots, host, v6, state, ips, table):
+    if ips and table:
+        snapshots.store(host, v6, Snapshot.InterfaceSnapshot(state, ips, table))
+    else:
+        snapshots.discard(host)
+
+def _counter_sample(host, table, uptime, columns, store):
+    if table is None or uptime is None:
+        return
+    sample = Counters.Sample.from_table(table, uptime, columns)
+    if store is None:
+        return sample
+    return store.update(host, sample)
+
+def _fping_command(**kwargs):
+    return ['fping', '-e', '-t', str(kwargs.get('timeout', 500)), '-r', str(kwargs.get('retries', 1)), '-i', str(kwargs.get('interval', 1))]
+
+def _fping_targets(chunk):
+    return "".join(f'{host}\n' for host in chunk).encode()
+
+def _parse_fping(line):
+    found = _fping_regex.match(line.decode(errors='replace') if isinstance(line, bytes) else line)
+    if not found:
+        return None, None
+    if found.group(2) == 'unreachable':
+        return found.group(1), None
+    return found.group(1), float(found.group(3)) if found.group(3) else 0.0
+
+async def _async_islice(source, size):
+    """
+    Next size items of an iterator or async iterator
+    """
+    if not hasattr(source, '__anext__'):
+        return list(itertools.islice(source, size))
+    chunk = []
+    while len(chunk) < size:
+        try:
+            chunk.append(await source.__anext__())
+        except StopAsyncIteration:
+            break
+    return chunk
+
+async def _async_fping(command, chunk, results):
+    """
+    Runs one fping over chunk, putting (host, rtt) on results as lines arrive and
+    (host, None) for hosts fping never reported, such as names that did not resolve
+    """
+    pending = set(chunk)
+    fping = await asyncio.create_subprocess_exec(*command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+    try:
+        fping.stdin.write(_fping_targets(chunk))
+        await fping.stdin.drain()
+        fping.stdin.close()
+        async for line in fping.stdout:
+            host, rtt = _parse_fping(line)
+            if host in pending:
+                pending.discard(host)
+                await results.put((host, rtt))
+        await fping.wait()
+    finally:
+        if fping.returncode is None:
+            fping.kill()
+            await fping.wait()
+    for host in pending:
+        await results.put((host, None))
+
+def _serial_probe(oid, host, community, index, cancelled=None, **kwargs):
+    if index is not None:
+        return poll(".".join((oid, str(index))), host, community, **kwargs)
+    if cancelled is None:
+        return walk(oid, host, community, **kwargs)
+    #Walked a page at a time so a probe that lost the race stops loading the device
+    variables = []
+    try:
+        for page in _session_pages(oid, host, community, **kwargs):
+            if cancelled.is_set():
+                return
+            variables.extend(page)
+    except Exception as err:
+        return
+    if variables:
+        return _convertToDict(variables)
+
+async def _async_serial_probe(oid, host, community, index, **kwargs):
+    if index is not None:
+        return await async_poll(".".join((oid, str(index))), host, community, **kwargs)
+    return await async_walk(oid, host, community, **kwargs)
+
+def _serial_found(result):
+    return bool(result) and not all(value in _snmp_exceptions for value in result.values())
+
+def _object_family(object_id):
+    """
+    Translation table base matching a sysObjectID, or its enterprise arc when none does
+    """
+    if not object_id:
+        return
+    match = ModelIndex.lookup(object_id.lstrip('.'))
+    if match:
+        return match[0]
+    return ".".join(object_id.strip('.').split('.')[:7])
+
+def _remember_serial_vendor(family, vendor):
+    if family:
+        _serial_vendors[family] = vendor
+
+def _join_interfaces(ips, table, address):
+    result = []
+    if ips and table:
+        for ip in ips.keys():
+            interface, oper, admin = (table.get(int(ip), column) for column in _interface_columns)
+            if all((interface, oper, admin)):
+                result.append({'interface':interface, address:str(ips[ip]), 'oper_status':oper, 'admin_status':admin})
+    return result
+
+def _session_table(session, columns, max_repetitions):
+    """
+    Table of the rows _session_rows streams over an easysnmp session
+    """
+    table = Table(columns)
+    for rows in _session_rows(session, columns, max_repetitions):
+        for index, values in rows:
+            for column, value in zip(columns, values):
+                if value is not None:
+                    table.add(column, make_index(index), value)
+    return table
+
+def _cached(attribute, fetch, host, community, **kwargs):
+    """
+    Serves attribute from cache while it is fresh and, for Cache.VALIDATED attributes,
+    the device has neither rebooted nor changed sysObjectID. Otherwise fetches and stores it
+    """
+    cache = kwargs.pop('cache')
+    entry = cache.lookup(host, attribute)
+    uptime = object_id = None
+    if attribute.split(':')[0] in Cache.VALIDATED:
+        state = cache.recent_state(host)
+        if not state:
+            state = _device_state(poll(_state_oids, host, community, **kwargs))
+            if state[0] is not None:
+                cache.remember_state(host, *state)
+        uptime, object_id = state
+        if entry and not cache.unchanged(entry, uptime, object_id):
+            entry = None
+        #Fetchers taking object_id (speculative serial probing) skip polling it again
+        if object_id and not kwargs.get('object_id'):
+            kwargs['object_id'] = object_id
+    if entry:
+        return entry.value
+    value = fetch(host, community, **kwargs)
+    if value and value != (None, None, None):
+        cache.store(host, attribute, value, uptime, object_id)
+    return value
+
+async def _async_cached(attribute, fetch, host, community, **kwargs):
+    """
+    Serves attribute from cache while it is fresh and, for Cache.VALIDATED attributes,
+    the device has neither rebooted nor changed sysObjectID. Otherwise fetches and stores it.
+    SQLite calls run on the default executor, a locked database never stalls the event loop
+    """
+    cache = kwargs.pop('cache')
+    loop = asyncio.get_event_loop()
+    entry = await loop.run_in_executor(None, cache.lookup, host, attribute)
+    uptime = object_id = None
+    if attribute.split(':')[0] in Cache.VALIDATED:
+        state = cache.recent_state(host)
+        if not state:
+            state = _device_state(await async_poll(_state_oids, host, community, **kwargs))
+            if state[0] is not None:
+                cache.remember_state(host, *state)
+        uptime, object_id = state
+        if entry and not cache.unchanged(entry, uptime, object_id):
+            entry = None
+        if object_id and not kwargs.get('object_id'):
+            kwargs['object_id'] = object_id
+    if entry:
+        return entry.value
+    value = await fetch(host, community, **kwargs)
+    if value and value != (None, None, None):
+        await loop.run_in_executor(None, cache.store, host, attribute, value, uptime, object_id)
+    return value
+
+def _device_state(poll_result):
+    if not poll_result:
+        return None, None
+    uptime = poll_result.get('sysUpTimeInstance', poll_result.get('sysUpTime.0'))
+    object_id = poll_result.get('sysObjectID.0')
+    return (int(uptime) if uptime and uptime.isdigit() else None), (object_id if object_id not in _snmp_exceptions else None)
+
+#Helper formatting functions
+def _convertToTable(variables, oid):
+    if variables and isinstance(variables[0], Engine.Varbind):
+        root = OIDUtils.resolve(oid)
+        name, index = OIDUtils.translate(root)
+        return Table.from_varbinds(variables, [(oid if index else name, root)])
+    return Table.from_variables(variables)
+
 def _convertToDict(easysnmpvariable):
     if isinstance(easysnmpvariable, (easysnmp.variables.SNMPVariableList, list)):
         output = {}
@@ -0,0 +1,147 @@
+"""
+Pool of reusable easysnmp Sessions keyed by host and credentials
+"""
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import easysnmp
+
+from poller import Timing
+from poller import Metrics
+
+#Session calls that put requests on the wire, reported to Metrics hooks
+_TRACED = frozenset(('get', 'get_next', 'get_bulk', 'walk', 'bulkwalk', 'set', 'set_multiple'))
+
+class _TracedSession:
+    """
+    Stand-in for a lent session while Metrics hooks are set, reporting every request call
+    """
+    __slots__ = ('_session', '_host')
+
+    def __init__(self, session, host):
+        self._session = session
+        self._host = host
+
+    def __getattr__(self, name):
+        attribute = getattr(self._session, name)
+        if name not in _TRACED:
+            return attribute
+        def traced(*args, **kwargs):
+            event = Metrics.RequestEvent(self._host, name)
+            try:
+                result = attribute(*args, **kwargs)
+            except BaseException as err:
+                event.finish(Metrics.classify(err))
+                raise
+            event.finish(varbinds=result if isinstance(result, list) else [result])
+            return result
+        return traced
+
+class SessionPool:
+    """
+    Keeps idle sessions for reuse, evicting the least recently used beyond max_sessions
+    and any left idle longer than idle_ttl seconds. A session is checked out to one
+    caller at a time, so concurrent threads polling the same host get their own.
+    """
+    def __init__(self, max_sessions=1024, idle_ttl=300):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._idle = OrderedDict()
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(host, community, version=2, timeout=1, retries=1, **kwargs):
+        return (host, version, community, timeout, retries, tuple(sorted(kwargs.items())))
+
+    def acquire(self, host, community, version=2, timeout=1, retries=1, **kwargs):
+        key = self.key(host, community, version, timeout, retries, **kwargs)
+        with self._lock:
+            self._expire()
+            idle = self._idle.get(key)
+            if idle:
+                session, _ = idle.pop()
+                self._count -= 1
+                if not idle:
+                    del self._idle[key]
+                return key, session
+        return key, easysnmp.Session(hostname=host, community=community, version=version, timeout=timeout, retries=retries, **kwargs)
+
+    def release(self, key, session):
+        with self._lock:
+            self._idle.setdefault(key, []).append((session, time.monotonic()))
+            self._idle.move_to_end(key)
+            self._count += 1
+            while self._count > self.max_sessions:
+                oldest = next(iter(self._idle))
+                self._idle[oldest].pop(0)
+                self._count -= 1
+                if not self._idle[oldest]:
+                    del self._idle[oldest]
+
+    def _expire(self):
+        #Keys are ordered by last release, so stale ones collect at the front
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._idle:
+            key = next(iter(self._idle))
+            if self._idle[key][-1][1] >= cutoff:
+                break
+            self._count -= len(self._idle.pop(key))
+
+    @contextmanager
+    def session(self, host, community, version=2, timeout=1, retries=1, **kwargs):
+        """
+        Context manager lending out a session, returned to the pool unless it broke.
+        Timeouts and successes are reported to Timing.tracker, and timeout=None takes the
+        host's adaptive timeout and refuses hosts whose circuit is open. Under a Timing
+        deadline timeout and retries shrink so the call ends in time. While Metrics hooks
+        are set the session's request calls, and refusals, are reported to them
+        """
+        if timeout is None:
+            if not Timing.tracker.allow(host):
+                _refused(host, 'circuit_open')
+                raise easysnmp.EasySNMPTimeoutError(f'{host}: not polled, circuit open after repeated timeouts')
+            timeout = Timing.quantize(Timing.tracker.timeout(host))
+        deadline = Timing.current()
+        fitted = False
+        if deadline is not None:
+            fit = Timing.fit(timeout, retries, deadline)
+            if fit is None:
+                _refused(host, 'deadline')
+                raise easysnmp.EasySNMPTimeoutError(f'{host}: not polled, deadline passed')
+            fitted = fit != (timeout, retries)
+            timeout, retries = fit
+        key, session = self.acquire(host, community, version, timeout, retries, **kwargs)
+        try:
+            yield _TracedSession(session, host) if Metrics.hooks else session
+        except easysnmp.EasySNMPTimeoutError:
+            self.release(key, session)
+            if not fitted:
+                Timing.tracker.failure(host)
+            raise
+        except GeneratorExit:
+            self.release(key, session)
+            raise
+        else:
+            self.release(key, session)
+            Timing.tracker.success(host)
+
+    def clear(self):
+        with self._lock:
+            self._idle.clear()
+            self._count = 0
+
+    def __len__(self):
+        return self._count
+
+def _refused(host, error):
+    event = Metrics.start(host, 'session')
+    if event is not None:
+        event.finish(error)
+
+pool = SessionPool()
+
+def session(host, community, **kwargs):
+    return pool.session(host, community, **kwargs)
@@ -0,0 +1,83 @@
+"""
+Per-host interface snapshots for incremental poll_interfaces sweeps
+"""
+import time
+import threading
+
+class InterfaceState:
+    """
+    Change indicators read in a single GET: sysUpTime, ifTableLastChange, ipAddressSpinLock
+    and ifNumber. Indicators the agent does not implement are None
+    """
+    __slots__ = ('uptime', 'table_change', 'spin_lock', 'if_number')
+
+    def __init__(self, uptime=None, table_change=None, spin_lock=None, if_number=None):
+        self.uptime = uptime
+        self.table_change = table_change
+        self.spin_lock = spin_lock
+        self.if_number = if_number
+
+    def indicators(self):
+        return (self.table_change, self.spin_lock, self.if_number)
+
+class InterfaceSnapshot:
+    """
+    Interface table (ifDescr, ifOperStatus, ifAdminStatus), ip map, the ifLastChange
+    column and the state they were taken under
+    """
+    __slots__ = ('state', 'ips', 'table', 'last_change', 'taken')
+
+    def __init__(self, state, ips, table, last_change=None, taken=None):
+        self.state = state
+        self.ips = ips
+        self.table = table
+        self.last_change = table if last_change is None else last_change
+        self.taken = taken or time.monotonic()
+
+    def changed_rows(self, last_change):
+        """
+        Indexes whose ifLastChange moved since the snapshot, or None when rows were added or removed
+        """
+        if last_change is None or set(last_change) != set(self.table):
+            return
+        return [index for index in last_change if last_change.raw(index, 'ifLastChange') != self.last_change.raw(index, 'ifLastChange')]
+
+class SnapshotStore:
+    """
+    Keeps the last interface snapshot per (host, v6). A snapshot is reused while the device
+    has not rebooted and none of its indicators moved, and is rebuilt from full walks once it
+    is older than max_age seconds, which catches address changes made without touching
+    ipAddressSpinLock (and every change on agents without ipAddressTable)
+    """
+    def __init__(self, max_age=3600):
+        self.max_age = max_age
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, host, v6=False):
+        with self._lock:
+            return self._snapshots.get((host, v6))
+
+    def store(self, host, v6, snapshot):
+        with self._lock:
+            self._snapshots[(host, v6)] = snapshot
+
+    def discard(self, host):
+        with self._lock:
+            for key in [key for key in self._snapshots if key[0] == host]:
+                del self._snapshots[key]
+
+    def current(self, snapshot, state):
+        """
+        True if snapshot still describes a device reporting state
+        """
+        if not snapshot or state.uptime is None or snapshot.state.uptime is None:
+            return False
+        if time.monotonic() - snapshot.taken > self.max_age:
+            return False
+        if state.uptime < snapshot.state.uptime:
+            return False
+        return state.indicators() == snapshot.state.indicators()
+
+    def __len__(self):
+        return len(self._snapshots)
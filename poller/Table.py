@@ -0,0 +1,176 @@
+"""
+Compact table-shaped SNMP results
+"""
+from poller.utils import BERUtils
+
+class Table:
+    """
+    Rows keyed by integer index (or a tuple of arcs for multi-part indexes) with each column
+    held as a list of raw decoded values parallel to the row list. Values are rendered to
+    strings only when read, and to_dict() gives back the flat {'column.index': value} form.
+    """
+    __slots__ = ('columns', 'indexes', '_rows', '_values', '_tags', '_odd')
+
+    def __init__(self, columns=()):
+        self.columns = list(columns)
+        self.indexes = []
+        self._rows = {}
+        self._values = {column: [] for column in self.columns}
+        self._tags = {}
+        self._odd = {}
+
+    def _row(self, index):
+        row = self._rows.get(index)
+        if row is None:
+            row = self._rows[index] = len(self.indexes)
+            self.indexes.append(index)
+            for values in self._values.values():
+                values.append(None)
+        return row
+
+    def _column(self, column):
+        values = self._values.get(column)
+        if values is None:
+            self.columns.append(column)
+            values = self._values[column] = [None] * len(self.indexes)
+        return values
+
+    def add(self, column, index, raw, tag=None):
+        """
+        Stores a raw value, tag being the BER type or None for values that are already strings
+        """
+        values = self._column(column)
+        row = self._row(index)
+        values[row] = raw
+        expected = self._tags.setdefault(column, tag)
+        if tag != expected:
+            self._odd[(column, row)] = tag
+
+    def _tag(self, column, row):
+        return self._odd.get((column, row), self._tags.get(column))
+
+    def raw(self, index, column, default=None):
+        row = self._rows.get(index)
+        if row is None or column not in self._values:
+            return default
+        value = self._values[column][row]
+        return default if value is None else value
+
+    def _present(self, column, row):
+        return self._values[column][row] is not None or self._tag(column, row) in BERUtils.EXCEPTION_TAGS
+
+    def get(self, index, column, default=None):
+        """
+        String value of column in the row at index
+        """
+        row = self._rows.get(index)
+        if row is None or column not in self._values or not self._present(column, row):
+            return default
+        tag = self._tag(column, row)
+        value = self._values[column][row]
+        return value if tag is None else BERUtils.format_value(tag, value)
+
+    def row(self, index):
+        """
+        {column: value} for one row
+        """
+        row = self._rows.get(index)
+        if row is None:
+            return
+        return {column: self.get(index, column) for column in self.columns if self._present(column, row)}
+
+    def column(self, column):
+        """
+        Yields (index, value) for rows that have column
+        """
+        for index in self.indexes:
+            value = self.get(index, column)
+            if value is not None:
+                yield index, value
+
+    def raw_column(self, column):
+        """
+        Raw values of column parallel to indexes, None where a row lacks it
+        """
+        return self._values.get(column) or [None] * len(self.indexes)
+
+    def rows(self):
+        for index in self.indexes:
+            yield index, self.row(index)
+
+    def values(self):
+        """
+        Yields every value, column by column
+        """
+        for column in self.columns:
+            for _, value in self.column(column):
+                yield value
+
+    def to_dict(self):
+        """
+        Flat {'column.index': value} mapping, as returned by walk and poll_bulk
+        """
+        output = {}
+        for column in self.columns:
+            for index, value in self.column(column):
+                output[".".join((column, _index_string(index)))] = value
+        return output
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __iter__(self):
+        return iter(self.indexes)
+
+    def __contains__(self, index):
+        return index in self._rows
+
+    def __getitem__(self, index):
+        row = self.row(index)
+        if row is None:
+            raise KeyError(index)
+        return row
+
+    def __repr__(self):
+        return f'<Table columns={self.columns} rows={len(self.indexes)}>'
+
+    @classmethod
+    def from_varbinds(cls, varbinds, columns):
+        """
+        Builds a table from engine Varbinds. columns is a list of (name, arc tuple) roots
+        """
+        table = cls(name for name, _ in columns)
+        for varbind in varbinds:
+            for name, root in columns:
+                if varbind.numeric[:len(root)] == root:
+                    table.add(name, make_index(varbind.numeric[len(root):]), varbind.raw, varbind.tag)
+                    break
+        return table
+
+    @classmethod
+    def from_variables(cls, variables, columns=None):
+        """
+        Builds a table from easysnmp SNMPVariables, one column per object name,
+        optionally only keeping the names in columns
+        """
+        table = cls(columns or ())
+        for variable in variables:
+            if not columns or variable.oid in table._values:
+                table.add(variable.oid, parse_index(variable.oid_index), variable.value)
+        return table
+
+def make_index(arcs):
+    return arcs[0] if len(arcs) == 1 else tuple(arcs)
+
+def parse_index(oid_index):
+    if oid_index.isdigit():
+        return int(oid_index)
+    try:
+        return tuple(int(arc) for arc in oid_index.split('.'))
+    except ValueError:
+        return oid_index
+
+def _index_string(index):
+    if isinstance(index, tuple):
+        return ".".join(map(str, index))
+    return str(index)
@@ -0,0 +1,251 @@
+"""
+Per-host round-trip estimates, a circuit breaker for hosts that stopped answering,
+and deadlines shared by every request a poll makes
+"""
+import time
+import asyncio
+import inspect
+import threading
+import contextvars
+from functools import wraps
+from contextlib import contextmanager
+
+class HostTiming:
+    __slots__ = ('srtt', 'rttvar', 'failures', 'trips', 'open_until', 'probe')
+
+    def __init__(self):
+        self.srtt = None
+        self.rttvar = None
+        self.failures = 0
+        self.trips = 0
+        self.open_until = None
+        self.probe = False
+
+class HostTracker:
+    """
+    Smoothed RTT and RTT variance per host, as TCP keeps them (RFC 6298), giving an adaptive
+    timeout of srtt + max(granularity, 4 * rttvar) clamped to [min_timeout, max_timeout],
+    or initial_timeout for hosts not measured yet. After failures consecutive timeouts a host's circuit opens and it
+    is refused for backoff seconds, doubling with every trip up to max_backoff. When that runs
+    out a single probe is let through, and its outcome closes the circuit or opens it again.
+    """
+    def __init__(self, initial_timeout=1, min_timeout=0.2, max_timeout=10, granularity=0.1, failures=3, backoff=30, max_backoff=900, max_hosts=100000):
+        self.initial_timeout = initial_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.granularity = granularity
+        self.failures = failures
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_hosts = max_hosts
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            if len(self._hosts) >= self.max_hosts:
+                del self._hosts[next(iter(self._hosts))]
+            state = self._hosts[host] = HostTiming()
+        return state
+
+    def timeout(self, host):
+        state = self._hosts.get(host)
+        if state is None or state.srtt is None:
+            return self.initial_timeout
+        return min(max(state.srtt + max(self.granularity, 4 * state.rttvar), self.min_timeout), self.max_timeout)
+
+    def observe(self, host, rtt):
+        """
+        Feeds in a round trip measured on a request that was not retransmitted
+        """
+        with self._lock:
+            state = self._state(host)
+            if state.srtt is None:
+                state.srtt = rtt
+                state.rttvar = rtt / 2
+            else:
+                state.rttvar = 0.75 * state.rttvar + 0.25 * abs(state.srtt - rtt)
+                state.srtt = 0.875 * state.srtt + 0.125 * rtt
+
+    def success(self, host):
+        state = self._hosts.get(host)
+        if state is not None and (state.failures or state.open_until is not None):
+            with self._lock:
+                state.failures = 0
+                state.trips = 0
+                state.open_until = None
+                state.probe = False
+
+    def failure(self, host):
+        with self._lock:
+            state = self._state(host)
+            state.failures += 1
+            if state.probe or (state.open_until is None and state.failures >= self.failures):
+                state.trips += 1
+                state.open_until = time.monotonic() + min(self.backoff * 2 ** (state.trips - 1), self.max_backoff)
+                state.probe = False
+
+    def allow(self, host):
+        """
+        False while host's circuit is open. Once the backoff runs out, one caller
+        gets True as the probe and everyone else keeps getting False until it reports
+        """
+        state = self._hosts.get(host)
+        if state is None or state.open_until is None:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if now < state.open_until:
+                return False
+            state.probe = True
+            state.open_until = now + self.max_timeout * 2
+            return True
+
+    def is_open(self, host):
+        state = self._hosts.get(host)
+        return state is not None and state.open_until is not None
+
+    def forget(self, host):
+        with self._lock:
+            self._hosts.pop(host, None)
+
+    def __len__(self):
+        return len(self._hosts)
+
+tracker = HostTracker()
+
+def quantize(timeout, step=0.25):
+    """
+    Rounds an adaptive timeout up to step seconds, so pooled sessions keyed on it stay few
+    """
+    return max(step, -(-timeout // step) * step)
+
+class Deadline:
+    """
+    Point on the monotonic clock by which a poll and all of its sub-requests must be done
+    """
+    __slots__ = ('expires',)
+
+    def __init__(self, budget=None, expires=None):
+        self.expires = expires if expires is not None else time.monotonic() + budget
+
+    def remaining(self):
+        return self.expires - time.monotonic()
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def __repr__(self):
+        return f'<Deadline remaining={self.remaining():.3f}>'
+
+_deadline = contextvars.ContextVar('deadline', default=None)
+
+def current():
+    """
+    Deadline in force for the running poll, or None
+    """
+    return _deadline.get()
+
+@contextmanager
+def scope(deadline):
+    """
+    Puts deadline in force for the block, unless an outer one expires sooner
+    """
+    outer = _deadline.get()
+    if outer is not None and outer.expires <= deadline.expires:
+        yield outer
+        return
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+def fit(timeout, retries, deadline, step=0.25):
+    """
+    Shrinks (timeout, retries) for a blocking session call so every attempt ends by deadline.
+    Returns None once it has passed
+    """
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        return
+    if timeout * (retries + 1) <= remaining:
+        return timeout, retries
+    timeout = min(timeout, remaining)
+    retries = max(int(remaining // timeout) - 1, 0)
+    return max(step, timeout // step * step), retries
+
+def _take_deadline(kwargs):
+    deadline = kwargs.pop('deadline', None)
+    budget = kwargs.pop('budget', None)
+    if budget is not None:
+        budgeted = Deadline(budget)
+        if deadline is None or budgeted.expires < deadline.expires:
+            deadline = budgeted
+    return deadline
+
+def budgeted(func):
+    """
+    Lets func take deadline (a Deadline) or budget (seconds) covering every request it makes,
+    directly or through other helpers. Requests are cut short when it passes and generators stop
+    """
+    if inspect.isasyncgenfunction(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            deadline = _take_deadline(kwargs)
+            if deadline is None:
+                async for item in func(*args, **kwargs):
+                    yield item
+                return
+            items = func(*args, **kwargs)
+            try:
+                while True:
+                    remaining = deadline.remaining()
+                    if remaining <= 0:
+                        return
+                    with scope(deadline):
+                        try:
+                            item = await asyncio.wait_for(items.__anext__(), remaining)
+                        except (StopAsyncIteration, asyncio.TimeoutError):
+                            return
+                    yield item
+            finally:
+                await items.aclose()
+    elif inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            deadline = _take_deadline(kwargs)
+            if deadline is None:
+                return await func(*args, **kwargs)
+            with scope(deadline):
+                return await func(*args, **kwargs)
+    elif inspect.isgeneratorfunction(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            deadline = _take_deadline(kwargs)
+            items = func(*args, **kwargs)
+            if deadline is None:
+                return items
+            return _bounded(items, deadline)
+    else:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            deadline = _take_deadline(kwargs)
+            if deadline is None:
+                return func(*args, **kwargs)
+            with scope(deadline):
+                return func(*args, **kwargs)
+    return wrapper
+
+def _bounded(items, deadline):
+    try:
+        while not deadline.expired():
+            with scope(deadline):
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+            yield item
+    finally:
+        items.close()
@@ -1,3 +1,15 @@
 from . import Poller
+from . import Engine
+from . import SessionPool
+from . import ModelIndex
+from . import Cache
+from . import Table
+from . import Snapshot
+from . import Counters
+from . import Timing
+from . import Metrics
+from . import Planner
+from . import Neighbors
+from . import Inventory
 
-__all__ = ['Poller']
+__all__ = ['Poller', 'Engine', 'SessionPool', 'ModelIndex', 'Cache', 'Table', 'Snapshot', 'Counters', 'Timing', 'Metrics', 'Planner', 'Neighbors', 'Inventory']
@@ -0,0 +1,238 @@
+"""
+Minimal BER codec for SNMPv1/v2c messages
+"""
+
+#Universal and application tags
+INTEGER = 0x02
+OCTET_STRING = 0x04
+NULL = 0x05
+OBJECT_IDENTIFIER = 0x06
+SEQUENCE = 0x30
+IPADDRESS = 0x40
+COUNTER32 = 0x41
+GAUGE32 = 0x42
+TIMETICKS = 0x43
+OPAQUE = 0x44
+COUNTER64 = 0x46
+NOSUCHOBJECT = 0x80
+NOSUCHINSTANCE = 0x81
+ENDOFMIBVIEW = 0x82
+
+#PDU tags
+GET_REQUEST = 0xa0
+GET_NEXT_REQUEST = 0xa1
+GET_RESPONSE = 0xa2
+SET_REQUEST = 0xa3
+GET_BULK_REQUEST = 0xa5
+REPORT = 0xa8
+
+#Names used for snmp_type, matching easysnmp
+TYPE_NAMES = {INTEGER: 'INTEGER',
+        OCTET_STRING: 'OCTETSTR',
+        NULL: 'NULL',
+        OBJECT_IDENTIFIER: 'OBJECTID',
+        IPADDRESS: 'IPADDR',
+        COUNTER32: 'COUNTER',
+        GAUGE32: 'GAUGE',
+        TIMETICKS: 'TICKS',
+        OPAQUE: 'OPAQUE',
+        COUNTER64: 'COUNTER64',
+        NOSUCHOBJECT: 'NOSUCHOBJECT',
+        NOSUCHINSTANCE: 'NOSUCHINSTANCE',
+        ENDOFMIBVIEW: 'ENDOFMIBVIEW'}
+
+EXCEPTION_TAGS = (NOSUCHOBJECT, NOSUCHINSTANCE, ENDOFMIBVIEW)
+UNSIGNED_TAGS = (COUNTER32, GAUGE32, TIMETICKS, COUNTER64)
+
+def format_value(tag, value):
+    """
+    Renders a decoded value the way easysnmp presents it
+    """
+    if tag == OCTET_STRING or tag == OPAQUE:
+        try:
+            return value.decode()
+        except UnicodeDecodeError:
+            return value.decode('latin-1')
+    if tag == IPADDRESS:
+        return ".".join(str(octet) for octet in value)
+    if tag == OBJECT_IDENTIFIER:
+        return "." + ".".join(map(str, value))
+    if tag in EXCEPTION_TAGS:
+        return TYPE_NAMES[tag]
+    if value is None:
+        return ''
+    return str(value)
+
+class DecodeError(ValueError):
+    pass
+
+def encode_length(length):
+    if length < 0x80:
+        return bytes((length,))
+    raw = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes((0x80 | len(raw),)) + raw
+
+def encode_tlv(tag, payload):
+    return bytes((tag,)) + encode_length(len(payload)) + payload
+
+def encode_integer(value, tag=INTEGER):
+    if tag in UNSIGNED_TAGS:
+        raw = value.to_bytes(value.bit_length() // 8 + 1, 'big')
+    else:
+        raw = value.to_bytes((value + (value < 0)).bit_length() // 8 + 1, 'big', signed=True)
+    return encode_tlv(tag, raw)
+
+def encode_octet_string(value, tag=OCTET_STRING):
+    if isinstance(value, str):
+        value = value.encode()
+    return encode_tlv(tag, bytes(value))
+
+def encode_oid(oid):
+    """
+    Encodes an oid given as a tuple of ints or dotted string
+    """
+    if isinstance(oid, str):
+        oid = tuple(int(arc) for arc in oid.strip('.').split('.'))
+    if len(oid) < 2:
+        oid = tuple(oid) + (0,) * (2 - len(oid))
+    raw = bytearray((oid[0] * 40 + oid[1],))
+    for arc in oid[2:]:
+        if arc < 0x80:
+            raw.append(arc)
+            continue
+        chunk = bytearray()
+        while arc:
+            chunk.append(0x80 | (arc & 0x7f))
+            arc >>= 7
+        chunk[0] &= 0x7f
+        chunk.reverse()
+        raw += chunk
+    return encode_tlv(OBJECT_IDENTIFIER, bytes(raw))
+
+def encode_value(tag, value):
+    if tag in (NULL,) + EXCEPTION_TAGS:
+        return bytes((tag, 0))
+    if tag == OBJECT_IDENTIFIER:
+        return encode_oid(value)
+    if tag in (INTEGER,) + UNSIGNED_TAGS:
+        return encode_integer(value, tag)
+    return encode_octet_string(value, tag)
+
+def encode_varbinds(varbinds):
+    """
+    Encodes a sequence of (oid, tag, value) tuples as a varbind list
+    """
+    return encode_tlv(SEQUENCE, b''.join(encode_tlv(SEQUENCE, encode_oid(oid) + encode_value(tag, value)) for oid, tag, value in varbinds))
+
+def encode_message(version, community, pdu_type, request_id, varbinds, error_status=0, error_index=0):
+    """
+    Encodes a complete community-based SNMP message. For GETBULK, error_status and
+    error_index carry non-repeaters and max-repetitions
+    """
+    pdu = encode_tlv(pdu_type, encode_integer(request_id) + encode_integer(error_status) + encode_integer(error_index) + encode_varbinds(varbinds))
+    return encode_tlv(SEQUENCE, encode_integer(version) + encode_octet_string(community) + pdu)
+
+def encode_request(version, community, pdu_type, request_id, oids, non_repeaters=0, max_repetitions=0):
+    """
+    Encodes a request PDU for a list of oid tuples
+    """
+    varbinds = [(oid, NULL, None) for oid in oids]
+    if pdu_type == GET_BULK_REQUEST:
+        return encode_message(version, community, pdu_type, request_id, varbinds, non_repeaters, max_repetitions)
+    return encode_message(version, community, pdu_type, request_id, varbinds)
+
+def decode_tlv(data, offset):
+    """
+    Returns tag, start and end of the value at offset
+    """
+    try:
+        tag = data[offset]
+        length = data[offset + 1]
+        offset += 2
+        if length & 0x80:
+            count = length & 0x7f
+            length = int.from_bytes(data[offset:offset + count], 'big')
+            offset += count
+    except IndexError:
+        raise DecodeError('truncated message')
+    end = offset + length
+    if end > len(data):
+        raise DecodeError('truncated message')
+    return tag, offset, end
+
+def decode_oid(raw):
+    if not raw:
+        return ()
+    first = raw[0]
+    if first < 40:
+        oid = [0, first]
+    elif first < 80:
+        oid = [1, first - 40]
+    else:
+        oid = [2, first - 80]
+    arc = 0
+    for byte in raw[1:]:
+        arc = (arc << 7) | (byte & 0x7f)
+        if not byte & 0x80:
+            oid.append(arc)
+            arc = 0
+    return tuple(oid)
+
+def decode_value(tag, raw):
+    if tag == INTEGER:
+        return int.from_bytes(raw, 'big', signed=True)
+    if tag in UNSIGNED_TAGS:
+        return int.from_bytes(raw, 'big')
+    if tag == OBJECT_IDENTIFIER:
+        return decode_oid(raw)
+    if tag == NULL or tag in EXCEPTION_TAGS:
+        return None
+    return bytes(raw)
+
+def decode_varbinds(data, offset, end):
+    varbinds = []
+    while offset < end:
+        _, start, stop = decode_tlv(data, offset)
+        oid_tag, oid_start, oid_end = decode_tlv(data, start)
+        if oid_tag != OBJECT_IDENTIFIER:
+            raise DecodeError('varbind without object identifier')
+        tag, value_start, value_end = decode_tlv(data, oid_end)
+        varbinds.append((decode_oid(data[oid_start:oid_end]), tag, decode_value(tag, data[value_start:value_end])))
+        offset = stop
+    return varbinds
+
+def decode_message(data):
+    """
+    Decodes a community-based SNMP message into
+    (version, community, pdu_type, request_id, error_status, error_index, varbinds)
+    """
+    data = memoryview(data)
+    tag, start, end = decode_tlv(data, 0)
+    if tag != SEQUENCE:
+        raise DecodeError('not an snmp message')
+    tag, value_start, value_end = decode_tlv(data, start)
+    version = decode_value(tag, data[value_start:value_end])
+    tag, value_start, value_end = decode_tlv(data, value_end)
+    community = bytes(data[value_start:value_end])
+    pdu_type, pdu_start, pdu_end = decode_tlv(data, value_end)
+    fields = []
+    offset = pdu_start
+    for _ in range(3):
+        tag, value_start, value_end = decode_tlv(data, offset)
+        fields.append(decode_value(tag, data[value_start:value_end]))
+        offset = value_end
+    tag, list_start, list_end = decode_tlv(data, offset)
+    varbinds = decode_varbinds(data, list_start, list_end)
+    return (version, community, pdu_type, fields[0], fields[1], fields[2], varbinds)
+
+def peek_request_id(data):
+    """
+    Pulls the request id out of a message without decoding the varbinds
+    """
+    data = memoryview(data)
+    _, start, _ = decode_tlv(data, 0)
+    _, _, offset = decode_tlv(data, start)
+    _, _, offset = decode_tlv(data, offset)
+    _, pdu_start, _ = decode_tlv(data, offset)
+    tag, value_start, value_end = decode_tlv(data, pdu_start)
+    return int.from_bytes(data[value_start:value_end], 'big', signed=True)
@@ -1,51 +1,82 @@
 import re
+import ipaddress
+
+#InetAddressType: octets in the InetAddress that follows it, zone index included
+INET_TYPES = {1: 4, 2: 16, 3: 8, 4: 20}
+
+#Index layouts of tables keyed on addresses: inet is an InetAddressType, InetAddress pair,
+#ipv4 a bare IpAddress, oid a length-prefixed OBJECT IDENTIFIER and integer a single arc
+IP_ADDRESS_INDEX = ('inet',)
+IP_NET_TO_PHYSICAL_INDEX = ('integer', 'inet')
+IP_CIDR_ROUTE_INDEX = ('ipv4', 'ipv4', 'integer', 'ipv4')
+INET_CIDR_ROUTE_INDEX = ('inet', 'integer', 'oid', 'inet')
+
+def decode_inet(arcs, position=0):
+    """
+    Decodes the InetAddressType, InetAddress pair starting at position in an index arc tuple
+    into (IPv4Address or IPv6Address, next position). Zones are dropped and dns or unknown types
+    give None. Addresses are kept packed, str() gives their RFC 5952 text when it is wanted
+    """
+    kind = arcs[position]
+    length = arcs[position + 1]
+    end = position + 2 + length
+    if INET_TYPES.get(kind) != length:
+        return None, end
+    octets = bytes(arcs[position + 2:end])
+    if kind in (1, 3):
+        return ipaddress.IPv4Address(octets[:4]), end
+    return ipaddress.IPv6Address(octets[:16]), end
+
+def decode_index(arcs, layout):
+    """
+    Splits an index arc tuple into its parts following layout, e.g. IP_NET_TO_PHYSICAL_INDEX
+    gives (ifIndex, address)
+    """
+    values = []
+    position = 0
+    for kind in layout:
+        if kind == 'inet':
+            value, position = decode_inet(arcs, position)
+        elif kind == 'ipv4':
+            value = ipaddress.IPv4Address(bytes(arcs[position:position + 4]))
+            position += 4
+        elif kind == 'oid':
+            length = arcs[position]
+            value = tuple(arcs[position + 1:position + 1 + length])
+            position += 1 + length
+        else:
+            value = arcs[position]
+            position += 1
+        values.append(value)
+    return tuple(values)
+
+def decode_indexes(indexes, layout=IP_ADDRESS_INDEX, family=None):
+    """
+    {index: decoded parts} for many index arc tuples at once, keeping only those whose first
+    address is IPv4 (family=4) or IPv6 (family=6) when family is given
+    """
+    decoded = {}
+    for index in indexes:
+        try:
+            parts = decode_index(index, layout)
+        except (IndexError, ValueError, TypeError):
+            continue
+        if family:
+            address = next((part for part in parts if isinstance(part, (ipaddress.IPv4Address, ipaddress.IPv6Address))), None)
+            if address is None or address.version != family:
+                continue
+        decoded[index] = parts
+    return decoded
 
 def reduce_ipv6_address(address):
     """
     Converts to IPV6 address from snmp poll notation: XX:XX:XX:XX:XX:XX:XX:XX:XX:XX:XX:XX:XX:XX:XX:XX
+    to its RFC 5952 text
     """
-    ipv6_add = ''
-    while len(address) > 0:
-        prefix = "".join(address.split(":")[:2])
-        address = ":".join(address.split(":")[2:])
-        while prefix.startswith('0') and len(prefix) > 1:
-            prefix = prefix[1:]
-        ipv6_add = ":".join([ipv6_add, prefix]) if ipv6_add else prefix
-    zeroes = [i for i, x in enumerate(ipv6_add.split(":")) if x == "0"]
-    if not zeroes:
-        return ipv6_add
-    index = 0
-    current = 0
-    longest = 0
-    current_streak = []
-    longest_streak = []
-    streaking = True
-    while index < len(zeroes):
-        if (index == 0 and zeroes[1:] and zeroes[1] - 1 == zeroes[0]) \
-            or (current == 0 and zeroes[index + 1:] and zeroes[index + 1] - 1 == zeroes[index]) \
-            or (zeroes[index] - 1 == zeroes[index - 1]):
-            current += 1
-            current_streak.append(zeroes[index])
-            if current > longest:
-                longest = current
-                longest_streak = current_streak[:]
-        else:
-            current = 0
-            current_streak = []
-        index += 1
-    longest_streak = set(longest_streak)
-    index = 0
-    ipv6_address = ''
-    double_colon = ":"
-    right = ":" if 7 in longest_streak else ""
-    while index < len(ipv6_add.split(":")):
-        if index in longest_streak:
-            ipv6_address += double_colon
-            double_colon = ""
-        else:
-            ipv6_address += ":" + ipv6_add.split(":")[index] if ipv6_address else ipv6_add.split(":")[index]
-        index += 1
-    return ipv6_address + right
+    digits = address.replace(':', '')
+    if len(digits) == 32:
+        return str(ipaddress.IPv6Address(bytes.fromhex(digits)))
+    return str(ipaddress.IPv6Address(address))
 
 def validate_ipv4_address(address):
     """
@@ -0,0 +1,197 @@
+"""
+Translation between MIB object names used by poller and numeric oids
+"""
+
+NAMES = {
+    'iso': '1',
+    'mib-2': '1.3.6.1.2.1',
+    'enterprises': '1.3.6.1.4.1',
+    #SNMPv2-MIB
+    'system': '1.3.6.1.2.1.1',
+    'sysDescr': '1.3.6.1.2.1.1.1',
+    'sysObjectID': '1.3.6.1.2.1.1.2',
+    'sysUpTime': '1.3.6.1.2.1.1.3',
+    'sysUpTimeInstance': '1.3.6.1.2.1.1.3.0',
+    'sysContact': '1.3.6.1.2.1.1.4',
+    'sysName': '1.3.6.1.2.1.1.5',
+    'sysLocation': '1.3.6.1.2.1.1.6',
+    'sysServices': '1.3.6.1.2.1.1.7',
+    'sysORLastChange': '1.3.6.1.2.1.1.8',
+    #IF-MIB
+    'interfaces': '1.3.6.1.2.1.2',
+    'ifNumber': '1.3.6.1.2.1.2.1',
+    'ifTable': '1.3.6.1.2.1.2.2',
+    'ifEntry': '1.3.6.1.2.1.2.2.1',
+    'ifIndex': '1.3.6.1.2.1.2.2.1.1',
+    'ifDescr': '1.3.6.1.2.1.2.2.1.2',
+    'ifType': '1.3.6.1.2.1.2.2.1.3',
+    'ifMtu': '1.3.6.1.2.1.2.2.1.4',
+    'ifSpeed': '1.3.6.1.2.1.2.2.1.5',
+    'ifPhysAddress': '1.3.6.1.2.1.2.2.1.6',
+    'ifAdminStatus': '1.3.6.1.2.1.2.2.1.7',
+    'ifOperStatus': '1.3.6.1.2.1.2.2.1.8',
+    'ifLastChange': '1.3.6.1.2.1.2.2.1.9',
+    'ifInOctets': '1.3.6.1.2.1.2.2.1.10',
+    'ifInUcastPkts': '1.3.6.1.2.1.2.2.1.11',
+    'ifInNUcastPkts': '1.3.6.1.2.1.2.2.1.12',
+    'ifInDiscards': '1.3.6.1.2.1.2.2.1.13',
+    'ifInErrors': '1.3.6.1.2.1.2.2.1.14',
+    'ifInUnknownProtos': '1.3.6.1.2.1.2.2.1.15',
+    'ifOutOctets': '1.3.6.1.2.1.2.2.1.16',
+    'ifOutUcastPkts': '1.3.6.1.2.1.2.2.1.17',
+    'ifOutNUcastPkts': '1.3.6.1.2.1.2.2.1.18',
+    'ifOutDiscards': '1.3.6.1.2.1.2.2.1.19',
+    'ifOutErrors': '1.3.6.1.2.1.2.2.1.20',
+    'ifOutQLen': '1.3.6.1.2.1.2.2.1.21',
+    'ifMIBObjects': '1.3.6.1.2.1.31.1',
+    'ifXTable': '1.3.6.1.2.1.31.1.1',
+    'ifXEntry': '1.3.6.1.2.1.31.1.1.1',
+    'ifName': '1.3.6.1.2.1.31.1.1.1.1',
+    'ifInMulticastPkts': '1.3.6.1.2.1.31.1.1.1.2',
+    'ifInBroadcastPkts': '1.3.6.1.2.1.31.1.1.1.3',
+    'ifOutMulticastPkts': '1.3.6.1.2.1.31.1.1.1.4',
+    'ifOutBroadcastPkts': '1.3.6.1.2.1.31.1.1.1.5',
+    'ifHCInOctets': '1.3.6.1.2.1.31.1.1.1.6',
+    'ifHCInUcastPkts': '1.3.6.1.2.1.31.1.1.1.7',
+    'ifHCInMulticastPkts': '1.3.6.1.2.1.31.1.1.1.8',
+    'ifHCInBroadcastPkts': '1.3.6.1.2.1.31.1.1.1.9',
+    'ifHCOutOctets': '1.3.6.1.2.1.31.1.1.1.10',
+    'ifHCOutUcastPkts': '1.3.6.1.2.1.31.1.1.1.11',
+    'ifHCOutMulticastPkts': '1.3.6.1.2.1.31.1.1.1.12',
+    'ifHCOutBroadcastPkts': '1.3.6.1.2.1.31.1.1.1.13',
+    'ifHighSpeed': '1.3.6.1.2.1.31.1.1.1.15',
+    'ifAlias': '1.3.6.1.2.1.31.1.1.1.18',
+    'ifCounterDiscontinuityTime': '1.3.6.1.2.1.31.1.1.1.19',
+    'ifTableLastChange': '1.3.6.1.2.1.31.1.5',
+    #IP-MIB
+    'ip': '1.3.6.1.2.1.4',
+    'ipAddrTable': '1.3.6.1.2.1.4.20',
+    'ipAddrEntry': '1.3.6.1.2.1.4.20.1',
+    'ipAdEntAddr': '1.3.6.1.2.1.4.20.1.1',
+    'ipAdEntIfIndex': '1.3.6.1.2.1.4.20.1.2',
+    'ipAdEntNetMask': '1.3.6.1.2.1.4.20.1.3',
+    'ipAddressSpinLock': '1.3.6.1.2.1.4.33',
+    'ipAddressTable': '1.3.6.1.2.1.4.34',
+    'ipAddressEntry': '1.3.6.1.2.1.4.34.1',
+    'ipAddressIfIndex': '1.3.6.1.2.1.4.34.1.3',
+    'ipAddressType': '1.3.6.1.2.1.4.34.1.4',
+    'ipAddressPrefix': '1.3.6.1.2.1.4.34.1.5',
+    'ipAddressOrigin': '1.3.6.1.2.1.4.34.1.6',
+    'ipAddressStatus': '1.3.6.1.2.1.4.34.1.7',
+    'ipNetToMediaTable': '1.3.6.1.2.1.4.22',
+    'ipNetToMediaPhysAddress': '1.3.6.1.2.1.4.22.1.2',
+    'ipNetToMediaType': '1.3.6.1.2.1.4.22.1.4',
+    'ipNetToPhysicalTable': '1.3.6.1.2.1.4.35',
+    'ipNetToPhysicalPhysAddress': '1.3.6.1.2.1.4.35.1.4',
+    'ipNetToPhysicalType': '1.3.6.1.2.1.4.35.1.6',
+    'ipNetToPhysicalState': '1.3.6.1.2.1.4.35.1.7',
+    #BRIDGE-MIB
+    'dot1dBasePortIfIndex': '1.3.6.1.2.1.17.1.4.1.2',
+    'dot1dTpFdbTable': '1.3.6.1.2.1.17.4.3',
+    'dot1dTpFdbPort': '1.3.6.1.2.1.17.4.3.1.2',
+    'dot1dTpFdbStatus': '1.3.6.1.2.1.17.4.3.1.3',
+    #Q-BRIDGE-MIB
+    'dot1qTpFdbTable': '1.3.6.1.2.1.17.7.1.2.2',
+    'dot1qTpFdbPort': '1.3.6.1.2.1.17.7.1.2.2.1.2',
+    'dot1qTpFdbStatus': '1.3.6.1.2.1.17.7.1.2.2.1.3',
+    #LLDP-MIB
+    'lldpLocPortId': '1.0.8802.1.1.2.1.3.7.1.3',
+    'lldpLocPortDesc': '1.0.8802.1.1.2.1.3.7.1.4',
+    'lldpRemTable': '1.0.8802.1.1.2.1.4.1',
+    'lldpRemChassisIdSubtype': '1.0.8802.1.1.2.1.4.1.1.4',
+    'lldpRemChassisId': '1.0.8802.1.1.2.1.4.1.1.5',
+    'lldpRemPortIdSubtype': '1.0.8802.1.1.2.1.4.1.1.6',
+    'lldpRemPortId': '1.0.8802.1.1.2.1.4.1.1.7',
+    'lldpRemPortDesc': '1.0.8802.1.1.2.1.4.1.1.8',
+    'lldpRemSysName': '1.0.8802.1.1.2.1.4.1.1.9',
+    'lldpRemSysDesc': '1.0.8802.1.1.2.1.4.1.1.10',
+    'lldpRemSysCapEnabled': '1.0.8802.1.1.2.1.4.1.1.12',
+    'lldpRemManAddrIfSubtype': '1.0.8802.1.1.2.1.4.2.1.3',
+    #CISCO-VTP-MIB
+    'vtpVlanState': '1.3.6.1.4.1.9.9.46.1.3.1.1.2',
+    #ENTITY-MIB
+    'entPhysicalTable': '1.3.6.1.2.1.47.1.1.1',
+    'entPhysicalEntry': '1.3.6.1.2.1.47.1.1.1.1',
+    'entPhysicalDescr': '1.3.6.1.2.1.47.1.1.1.1.2',
+    'entPhysicalVendorType': '1.3.6.1.2.1.47.1.1.1.1.3',
+    'entPhysicalContainedIn': '1.3.6.1.2.1.47.1.1.1.1.4',
+    'entPhysicalClass': '1.3.6.1.2.1.47.1.1.1.1.5',
+    'entPhysicalParentRelPos': '1.3.6.1.2.1.47.1.1.1.1.6',
+    'entPhysicalName': '1.3.6.1.2.1.47.1.1.1.1.7',
+    'entPhysicalHardwareRev': '1.3.6.1.2.1.47.1.1.1.1.8',
+    'entPhysicalFirmwareRev': '1.3.6.1.2.1.47.1.1.1.1.9',
+    'entPhysicalSoftwareRev': '1.3.6.1.2.1.47.1.1.1.1.10',
+    'entPhysicalSerialNum': '1.3.6.1.2.1.47.1.1.1.1.11',
+    'entPhysicalMfgName': '1.3.6.1.2.1.47.1.1.1.1.12',
+    'entPhysicalModelName': '1.3.6.1.2.1.47.1.1.1.1.13',
+    'entPhysicalIsFRU': '1.3.6.1.2.1.47.1.1.1.1.16',
+}
+
+def _arcs(numeric):
+    return tuple(int(arc) for arc in numeric.split('.'))
+
+def _branch(name):
+    #Subtrees and table/entry nodes, which net-snmp never names a returned variable after
+    return name in ('iso', 'mib-2', 'enterprises', 'system', 'interfaces', 'ip') or name.endswith(('Table', 'Entry', 'Objects'))
+
+OIDS = {name: _arcs(numeric) for name, numeric in NAMES.items()}
+REVERSE = {oid: name for name, oid in OIDS.items() if not _branch(name)}
+_MAX_DEPTH = max(len(oid) for oid in REVERSE)
+
+def register(name, numeric):
+    """
+    Adds a name to the translation table
+    """
+    global _MAX_DEPTH
+    oid = _arcs(numeric.strip('.'))
+    NAMES[name] = numeric.strip('.')
+    OIDS[name] = oid
+    if not _branch(name):
+        REVERSE.setdefault(oid, name)
+    _MAX_DEPTH = max(_MAX_DEPTH, len(oid))
+
+def resolve(oid):
+    """
+    Converts 'ifDescr.12', 'IF-MIB::ifDescr', '.1.3.6.1.2.1.2.2.1.2' or an arc tuple to an arc tuple
+    """
+    if isinstance(oid, tuple):
+        return oid
+    oid = oid.strip().lstrip('.')
+    if '::' in oid:
+        oid = oid.split('::', 1)[1]
+    name, _, index = oid.partition('.')
+    if name.isdigit():
+        return _arcs(oid)
+    base = OIDS.get(name)
+    if base is None:
+        raise ValueError(f'Unknown object name {name}')
+    return base + _arcs(index) if index else base
+
+def known(oid):
+    """
+    Whether resolve can turn oid into arcs without net-snmp's MIBs
+    """
+    try:
+        resolve(oid)
+    except ValueError:
+        return False
+    return True
+
+def translate(oid):
+    """
+    Splits an arc tuple into (name, index) using the longest known prefix. Below that, like
+    net-snmp with no MIB for the object, the name is the oid spelled from iso and the index its
+    last arc, so the keys match what easysnmp returns
+    """
+    depth = min(len(oid), _MAX_DEPTH)
+    while depth > 1:
+        name = REVERSE.get(oid[:depth])
+        if name:
+            return name, ".".join(map(str, oid[depth:]))
+        depth -= 1
+    if len(oid) == 1 or oid[0] != 1:
+        return "." + ".".join(map(str, oid)), ''
+    return ".".join(('iso',) + tuple(map(str, oid[1:-1]))), str(oid[-1])
+
+def to_string(oid):
+    return ".".join(map(str, oid))
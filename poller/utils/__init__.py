@@ -1,4 +1,6 @@
 from . import StringUtils
 from . import IPUtils
+from . import BERUtils
+from . import OIDUtils
 
-__all__ = ['StringUtils', 'IPUtils']
+__all__ = ['StringUtils', 'IPUtils', 'BERUtils', 'OIDUtils']
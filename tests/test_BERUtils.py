@@ -0,0 +1,69 @@
+import pytest
+
+from poller.utils import BERUtils
+
+@pytest.mark.parametrize('tag, value', [
+    (BERUtils.INTEGER, 0),
+    (BERUtils.INTEGER, 127),
+    (BERUtils.INTEGER, 128),
+    (BERUtils.INTEGER, -1),
+    (BERUtils.INTEGER, -129),
+    (BERUtils.COUNTER32, 2 ** 32 - 1),
+    (BERUtils.COUNTER64, 2 ** 64 - 1),
+    (BERUtils.TIMETICKS, 8640000),
+    (BERUtils.OCTET_STRING, b''),
+    (BERUtils.OCTET_STRING, b'x' * 300),
+    (BERUtils.OBJECT_IDENTIFIER, (1, 3, 6, 1, 4, 1, 9, 1, 1208)),
+    (BERUtils.OBJECT_IDENTIFIER, (1, 3, 6, 1, 4, 1, 2 ** 32 - 1)),
+    (BERUtils.NULL, None),
+    (BERUtils.ENDOFMIBVIEW, None),
+])
+def test_value_round_trip(tag, value):
+    encoded = BERUtils.encode_value(tag, value)
+    decoded_tag, start, end = BERUtils.decode_tlv(encoded, 0)
+    assert decoded_tag == tag
+    assert end == len(encoded)
+    assert BERUtils.decode_value(tag, encoded[start:end]) == value
+
+def test_long_form_length():
+    assert BERUtils.encode_length(127) == b'\x7f'
+    assert BERUtils.encode_length(128) == b'\x81\x80'
+    assert BERUtils.encode_length(300) == b'\x82\x01\x2c'
+
+def test_unsigned_values_keep_a_leading_zero():
+    assert BERUtils.encode_integer(2 ** 31, BERUtils.COUNTER32) == b'\x41\x05\x00\x80\x00\x00\x00'
+
+def test_request_matches_net_snmp_bytes():
+    #snmpget -v2c -c public host sysName.0 with request id 1
+    message = BERUtils.encode_request(1, 'public', BERUtils.GET_REQUEST, 1, [(1, 3, 6, 1, 2, 1, 1, 5, 0)])
+    assert message == bytes.fromhex('302602010104067075626c6963a019020101020100020100300e300c06082b060102010105000500')
+
+def test_message_round_trip():
+    varbinds = [((1, 3, 6, 1, 2, 1, 1, 5, 0), BERUtils.OCTET_STRING, b'core1'),
+            ((1, 3, 6, 1, 2, 1, 1, 3, 0), BERUtils.TIMETICKS, 100),
+            ((1, 3, 6, 1, 2, 1, 2, 2, 1, 2, 9), BERUtils.NOSUCHINSTANCE, None)]
+    message = BERUtils.encode_message(1, 'public', BERUtils.GET_RESPONSE, 4242, varbinds)
+    assert BERUtils.peek_request_id(message) == 4242
+    assert BERUtils.decode_message(message) == (1, b'public', BERUtils.GET_RESPONSE, 4242, 0, 0, varbinds)
+
+def test_getbulk_carries_repetitions_in_the_error_fields():
+    message = BERUtils.encode_request(1, 'public', BERUtils.GET_BULK_REQUEST, 7, [(1, 3, 6, 1, 2, 1, 2, 2, 1, 2)], 0, 25)
+    _, _, pdu_type, request_id, non_repeaters, max_repetitions, _ = BERUtils.decode_message(message)
+    assert (pdu_type, request_id, non_repeaters, max_repetitions) == (BERUtils.GET_BULK_REQUEST, 7, 0, 25)
+
+def test_truncated_message_raises():
+    message = BERUtils.encode_request(1, 'public', BERUtils.GET_REQUEST, 1, [(1, 3, 6, 1, 2, 1, 1, 5, 0)])
+    with pytest.raises(BERUtils.DecodeError):
+        BERUtils.decode_message(message[:-3])
+
+@pytest.mark.parametrize('tag, value, text', [
+    (BERUtils.OCTET_STRING, b'core1', 'core1'),
+    (BERUtils.OCTET_STRING, b'\xff\xfe', '\xff\xfe'),
+    (BERUtils.IPADDRESS, b'\xc0\x00\x02\x01', '192.0.2.1'),
+    (BERUtils.OBJECT_IDENTIFIER, (1, 3, 6, 1), '.1.3.6.1'),
+    (BERUtils.TIMETICKS, 100, '100'),
+    (BERUtils.NOSUCHOBJECT, None, 'NOSUCHOBJECT'),
+    (BERUtils.NULL, None, ''),
+])
+def test_format_value_like_easysnmp(tag, value, text):
+    assert BERUtils.format_value(tag, value) == text
@@ -0,0 +1,105 @@
+import time
+import asyncio
+import sqlite3
+
+import pytest
+
+from poller import Cache, Poller
+
+@pytest.fixture
+def cache(tmp_path):
+    return Cache.AttributeCache(str(tmp_path / 'cache.sqlite'), timeout=0.5)
+
+def test_store_and_lookup(cache):
+    cache.store('192.0.2.1', 'contact', 'noc')
+    assert cache.lookup('192.0.2.1', 'contact').value == 'noc'
+    assert cache.lookup('192.0.2.1', 'location') is None
+
+def test_tuples_survive_the_round_trip(cache):
+    cache.store('192.0.2.1', 'make_series_model', ('cisco', 'catalyst', '2960'))
+    assert cache.lookup('192.0.2.1', 'make_series_model').value == ('cisco', 'catalyst', '2960')
+
+def test_expired_entries_are_not_served(cache):
+    cache.ttls['contact'] = -1
+    cache.store('192.0.2.1', 'contact', 'noc')
+    assert cache.lookup('192.0.2.1', 'contact') is None
+
+def test_unchanged_detects_reboot_and_replacement(cache):
+    entry = Cache.Entry('x', time.time(), 100000, '.1.3.6.1.4.1.9.1.1')
+    assert cache.unchanged(entry, 100000, '.1.3.6.1.4.1.9.1.1')
+    assert not cache.unchanged(entry, 50, '.1.3.6.1.4.1.9.1.1')
+    assert not cache.unchanged(entry, 100000, '.1.3.6.1.4.1.9.1.2')
+
+def test_async_cached_serves_second_call_from_cache(cache):
+    calls = []
+
+    async def fetch(host, community, **kwargs):
+        calls.append(host)
+        return 'noc'
+
+    async def main():
+        first = await Poller._async_cached('contact', fetch, '192.0.2.1', 'public', cache=cache)
+        second = await Poller._async_cached('contact', fetch, '192.0.2.1', 'public', cache=cache)
+        return first, second
+
+    assert asyncio.run(main()) == ('noc', 'noc')
+    assert calls == ['192.0.2.1']
+
+def test_async_cached_keeps_the_loop_running_while_sqlite_waits(cache):
+    ticks = []
+
+    async def fetch(host, community, **kwargs):
+        return 'noc'
+
+    async def ticker():
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.05)
+
+    async def main():
+        task = asyncio.ensure_future(ticker())
+        try:
+            with pytest.raises(sqlite3.OperationalError):
+                await Poller._async_cached('contact', fetch, '192.0.2.1', 'public', cache=cache)
+        finally:
+            task.cancel()
+
+    writer = sqlite3.connect(cache.path, isolation_level=None)
+    writer.execute('BEGIN IMMEDIATE')
+    try:
+        asyncio.run(main())
+    finally:
+        writer.execute('ROLLBACK')
+    assert len(ticks) > 3
+
+def test_cached_fingerprint_polls_uptime_fresh(cache, monkeypatch):
+    uptimes = iter(['100', '200'])
+    requests = []
+
+    def poll(oids, host, community, **kwargs):
+        requests.append(list(oids))
+        uptime = next(uptimes)
+        if oids == ['sysUpTime.0']:
+            return {'sysUpTimeInstance': uptime}
+        return {'sysName.0': 'core1', 'sysUpTimeInstance': uptime, 'sysObjectID.0': '.1.3.6.1.4.1.99999'}
+
+    monkeypatch.setattr(Poller, 'poll', poll)
+    assert Poller.poll_fingerprint('192.0.2.1', 'public', cache=cache)['uptime'] == '100'
+    assert 'uptime' not in cache.lookup('192.0.2.1', 'fingerprint').value
+    assert Poller.poll_fingerprint('192.0.2.1', 'public', cache=cache)['uptime'] == '200'
+    assert requests[1] == ['sysUpTime.0']
+
+def test_async_cached_fingerprint_polls_uptime_fresh(cache, monkeypatch):
+    uptimes = iter(['100', '200'])
+
+    async def async_poll(oids, host, community, **kwargs):
+        return {'sysName.0': 'core1', 'sysUpTimeInstance': next(uptimes)}
+
+    monkeypatch.setattr(Poller, 'async_poll', async_poll)
+
+    async def main():
+        first = await Poller.async_poll_fingerprint('192.0.2.1', 'public', cache=cache)
+        second = await Poller.async_poll_fingerprint('192.0.2.1', 'public', cache=cache)
+        return first['uptime'], second['uptime']
+
+    assert asyncio.run(main()) == ('100', '200')
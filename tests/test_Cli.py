@@ -0,0 +1,40 @@
+import json
+
+from poller import Cli
+
+def test_parse_params_reads_every_flag():
+    params = Cli.parse_params(['poll', '-c', 'public', '-f', 'hosts', '-o', 'sysName.0', '-n', '50', '-s', '4', '-p',
+            '-P', '2', '-O', 'out.csv.gz', '-F', 'csv', '-z', '-R', '1.5'], oid=True)
+    assert params['community'] == 'public'
+    assert params['ip_list'] == 'hosts'
+    assert params['oid'] == 'sysName.0'
+    assert (params['concurrency'], params['per_subnet'], params['ping'], params['processes']) == (50, 4, True, 2)
+    assert params['output'] == {'path': 'out.csv.gz', 'format': 'csv', 'compress': True, 'rotate_bytes': 1572864}
+
+def test_parse_params_prompts_for_what_is_missing(monkeypatch):
+    answers = iter(['public', '192.0.2.1'])
+    monkeypatch.setattr('builtins.input', lambda prompt: next(answers))
+    params = Cli.parse_params(['pollname'])
+    assert (params['community'], params['ip'], params['oid']) == ('public', '192.0.2.1', None)
+
+def test_parse_params_gives_up_without_hosts(monkeypatch, capsys):
+    monkeypatch.setattr('builtins.input', lambda prompt: '')
+    assert Cli.parse_params(['poll', '-c', 'public', '-o', 'sysName.0'], oid=True) is None
+    assert 'Please supply' in capsys.readouterr().out
+
+def test_main_polls_one_host(capsys):
+    Cli.main(lambda oid, host, community: (oid, host, community), None, oid=True,
+            argv=['poll', '-c', 'public', '-i', '192.0.2.1', '-o', 'sysName.0'])
+    assert capsys.readouterr().out == "('sysName.0', '192.0.2.1', 'public')\n"
+
+async def _async_name(host, community):
+    return None if host.endswith('.2') else f'{host}@{community}'
+
+def test_main_runs_a_host_file_into_the_sink(tmp_path):
+    hosts = tmp_path / 'hosts'
+    hosts.write_text('192.0.2.1\n192.0.2.2\n')
+    out = tmp_path / 'out.ndjson'
+    Cli.main(None, _async_name, argv=['pollname', '-c', 'public', '-f', str(hosts), '-O', str(out)])
+    records = sorted((json.loads(line) for line in out.read_text().splitlines()), key=lambda record: record['host'])
+    assert records == [{'host': '192.0.2.1', 'status': 'ok', 'result': '192.0.2.1@public'},
+            {'host': '192.0.2.2', 'status': 'no_response', 'result': None}]
@@ -0,0 +1,70 @@
+import math
+
+import pytest
+
+from poller import Counters
+from poller.Table import Table
+
+@pytest.fixture(params=['numpy', 'array'])
+def backend(request, monkeypatch):
+    """
+    Runs a test over numpy and over the array module fallback
+    """
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(Counters, 'numpy', None)
+    return request.param
+
+def sample(uptime, rows, columns=('ifHCInOctets', 'ifInErrors')):
+    """
+    Sample from {ifIndex: (value per column)}, None for a missing value
+    """
+    table = Table(columns)
+    for index, values in rows.items():
+        for column, value in zip(columns, values):
+            table.add(column, index, None if value is None else str(value), None)
+    return Counters.Sample.from_table(table, uptime, columns)
+
+def test_rates_over_the_uptime_interval(backend):
+    rates = Counters.rates(sample(1000, {1: (0, 10)}), sample(2000, {1: (5000, 30)}))
+    assert rates.interval == 10
+    assert rates.get(1, 'ifHCInOctets') == 500
+    assert rates.get(1, 'ifInErrors') == 2
+
+def test_32_bit_counters_wrap(backend):
+    rates = Counters.rates(sample(0, {1: (0, 2 ** 32 - 10)}), sample(100, {1: (0, 10)}))
+    assert rates.get(1, 'ifInErrors') == 20
+
+def test_64_bit_counter_going_backwards_is_nan(backend):
+    rates = Counters.rates(sample(0, {1: (5000, 0)}), sample(100, {1: (10, 0)}))
+    assert math.isnan(rates.column('ifHCInOctets')[0])
+    assert rates.get(1, 'ifHCInOctets') is None
+    assert rates.get(1, 'ifInErrors') == 0
+
+def test_reboot_gives_no_rates(backend):
+    assert Counters.rates(sample(90000, {1: (5000, 0)}), sample(300, {1: (10, 0)})) is None
+
+def test_missing_values_are_nan(backend):
+    rates = Counters.rates(sample(0, {1: (None, 0)}), sample(100, {1: (10, 0)}))
+    assert rates.to_dict() == {1: {'ifInErrors': 0}}
+
+def test_rows_realign_when_interfaces_change(backend):
+    previous = sample(0, {1: (100, 0), 2: (200, 0), 3: (300, 0)})
+    current = sample(100, {3: (310, 0), 1: (101, 0), 4: (50, 0)})
+    rates = Counters.rates(previous, current)
+    assert rates.indexes == [3, 1, 4]
+    assert rates.get(3, 'ifHCInOctets') == 10
+    assert rates.get(1, 'ifHCInOctets') == 1
+    assert rates.get(4, 'ifHCInOctets') is None
+
+def test_store_returns_rates_from_the_second_sample(backend):
+    store = Counters.CounterStore()
+    assert store.update('192.0.2.1', sample(0, {1: (0, 0)})) is None
+    assert store.update('192.0.2.1', sample(100, {1: (100, 0)})).get(1, 'ifHCInOctets') == 100
+    store.discard('192.0.2.1')
+    assert len(store) == 0
+
+def test_width():
+    assert Counters.width('ifHCInOctets') == 64
+    assert Counters.width('ifInErrors') == 32
@@ -0,0 +1,74 @@
+import os
+import sys
+import socket
+import asyncio
+
+import pytest
+
+from poller import Engine, Poller
+from poller.utils import BERUtils
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+import agent
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+@pytest.fixture
+def device():
+    """
+    Runs coroutine functions against a loopback agent serving a 4 interface device, returning
+    their result and the agent
+    """
+    def run(call, **options):
+        async def main():
+            port = _free_port()
+            served = (await agent.serve(agent.build(4, **options), (port,)))[0]
+            try:
+                return await call(f'127.0.0.1:{port}'), served
+            finally:
+                served.transport.close()
+        return asyncio.run(main())
+    return run
+
+def test_get_decodes_like_easysnmp(device):
+    variables, _ = device(lambda host: Engine.snmp_get(['sysName.0', 'sysUpTime.0', 'sysObjectID.0'], host, 'public'))
+    assert [(variable.oid, variable.oid_index, variable.value) for variable in variables] == [
+            ('sysName', '0', 'bench-device'), ('sysUpTimeInstance', '', '8640000'), ('sysObjectID', '0', '.1.3.6.1.4.1.9.1.1208')]
+    assert variables[1].snmp_type == 'TICKS'
+
+def test_missing_instance_is_reported_not_raised(device):
+    variables, _ = device(lambda host: Engine.snmp_get(['sysName.1'], host, 'public'))
+    assert variables[0].snmp_type == 'NOSUCHINSTANCE'
+
+def test_walk_stays_in_the_column(device):
+    variables, _ = device(lambda host: Engine.snmp_walk('ifDescr', host, 'public'))
+    assert [variable.oid for variable in variables] == ['ifDescr'] * 4
+    assert [variable.oid_index for variable in variables] == ['1', '2', '3', '4']
+
+def test_table_collects_columns_in_one_stream(device):
+    table, served = device(lambda host: Engine.snmp_table(['ifDescr', 'ifOperStatus'], host, 'public'))
+    assert len(table) == 4
+    assert served.requests == 1
+
+def test_v1_walks_with_getnext(device):
+    variables, served = device(lambda host: Engine.snmp_walk('ifDescr', host, 'public', version=1))
+    assert len(variables) == 4
+    assert served.requests == 5
+
+def test_poller_helper_over_the_engine(device):
+    result, _ = device(lambda host: Poller.async_poll(['sysName.0', 'sysContact.0'], host, 'public'))
+    assert result == {'sysName.0': 'bench-device', 'sysContact.0': 'noc@example.net'}
+
+def test_silent_agent_times_out():
+    async def main():
+        port = _free_port()
+        served = (await agent.serve({}, (port,), loss=1))[0]
+        try:
+            await Engine.snmp_get(['sysName.0'], f'127.0.0.1:{port}', 'public', retries=0, timeout=0.2)
+        finally:
+            served.transport.close()
+    with pytest.raises(Engine.SnmpTimeout):
+        asyncio.run(main())
@@ -0,0 +1,133 @@
+import sys
+import pickle
+import asyncio
+
+import pytest
+
+from poller import Fleet, Poller
+
+#Stands in for fping: hosts under 198.51.100.0/24 are down, everything else answers
+FAKE_FPING = '''
+import sys
+import pickle
+for line in sys.stdin:
+    host = line.strip()
+    if host.startswith('198.51.100.'):
+        print(host + ' is unreachable')
+    else:
+        print(host + ' is alive (0.10 ms)')
+'''
+
+@pytest.fixture
+def fping(monkeypatch):
+    monkeypatch.setattr(Poller, '_fping_command', lambda **kwargs: [sys.executable, '-c', FAKE_FPING])
+
+async def _echo(host):
+    return host.upper()
+
+async def _async_hosts(hosts):
+    for host in hosts:
+        await asyncio.sleep(0)
+        yield host
+
+def _collect(hosts, **kwargs):
+    async def main():
+        return [item async for item in Fleet.run(_echo, hosts, **kwargs)]
+    return sorted(asyncio.run(main()), key=repr)
+
+HOSTS = ['192.0.2.1', '198.51.100.1', '192.0.2.2']
+EXPECTED = sorted([('192.0.2.1', '192.0.2.1'), ('192.0.2.2', '192.0.2.2'), ('198.51.100.1', Fleet.UNREACHABLE)], key=repr)
+
+def test_ping_stage_with_a_list(fping):
+    assert _collect(HOSTS, ping=True) == EXPECTED
+
+def test_ping_stage_with_an_async_host_source(fping):
+    assert _collect(_async_hosts(HOSTS), ping={'chunk_size': 1}) == EXPECTED
+
+def test_missing_fping_is_raised(monkeypatch):
+    monkeypatch.setattr(Poller, '_fping_command', lambda **kwargs: ['/nonexistent/fping'])
+    with pytest.raises(FileNotFoundError):
+        _collect(HOSTS, ping=True)
+
+def test_failing_host_source_is_raised():
+    def hosts():
+        yield '192.0.2.1'
+        raise OSError('host list went away')
+    with pytest.raises(OSError):
+        _collect(hosts(), concurrency=2)
+
+def test_errors_from_func_yield_none():
+    async def broken(host):
+        raise ValueError(host)
+    async def main():
+        return [item async for item in Fleet.run(broken, ['192.0.2.1'])]
+    assert asyncio.run(main()) == [('192.0.2.1', None)]
+
+def test_run_sharded_with_the_ping_stage(fping):
+    hosts = [f'192.0.2.{number}' for number in range(1, 21)] + ['198.51.100.1', '198.51.100.2']
+    results = dict(Fleet.run_sharded(_echo, hosts, processes=2, chunk_size=4, ping=True))
+    assert results == dict({host: host.upper() for host in hosts[:20]}, **{'198.51.100.1': Fleet.UNREACHABLE, '198.51.100.2': Fleet.UNREACHABLE})
+    assert all(results[host] is Fleet.UNREACHABLE for host in hosts[20:])
+
+def test_run_sharded_raises_worker_errors(monkeypatch):
+    monkeypatch.setattr(Poller, '_fping_command', lambda **kwargs: ['/nonexistent/fping'])
+    with pytest.raises(FileNotFoundError):
+        list(Fleet.run_sharded(_echo, HOSTS, processes=2, ping=True))
+
+def _peak(hosts, **kwargs):
+    """
+    Most hosts in flight at once, overall and per /24
+    """
+    flight = {}
+    peaks = {}
+
+    async def tracked(host):
+        group = host.rsplit('.', 1)[0]
+        flight[group] = flight.get(group, 0) + 1
+        flight['all'] = flight.get('all', 0) + 1
+        for key in (group, 'all'):
+            peaks[key] = max(peaks.get(key, 0), flight[key])
+        await asyncio.sleep(0.01)
+        flight[group] -= 1
+        flight['all'] -= 1
+        return host
+
+    async def main():
+        return await Fleet.collect(tracked, hosts, **kwargs)
+    results = asyncio.run(main())
+    return results, peaks
+
+def test_concurrency_and_per_group_limits():
+    hosts = [f'192.0.2.{number}' for number in range(20)] + [f'198.51.100.{number}' for number in range(20)]
+    results, peaks = _peak(hosts, concurrency=8, per_group=3)
+    assert results == {host: host for host in hosts}
+    assert peaks['all'] <= 8
+    assert peaks['192.0.2'] == 3 and peaks['198.51.100'] == 3
+
+def test_subnet_group():
+    assert str(Fleet.subnet_group('192.0.2.77')) == '192.0.2.0/24'
+    assert str(Fleet.subnet_group('2001:db8::1')) == '2001:db8::/64'
+    assert Fleet.subnet_group('router.example.net') == 'router.example.net'
+
+def test_read_hosts_skips_comments(tmp_path):
+    path = tmp_path / 'hosts'
+    path.write_text('# core\n192.0.2.1\n\n192.0.2.2  # edge\n')
+    assert list(Fleet.read_hosts(str(path))) == ['192.0.2.1', '192.0.2.2']
+
+def test_unreachable_marker():
+    assert not Fleet.UNREACHABLE
+    assert repr(Fleet.UNREACHABLE) == 'unreachable'
+    assert pickle.loads(pickle.dumps(Fleet.UNREACHABLE)) is Fleet.UNREACHABLE
+
+def test_unreachable_hosts_never_reach_func(fping):
+    polled = []
+
+    async def func(host):
+        polled.append(host)
+        return host
+
+    async def main():
+        return await Fleet.collect(func, HOSTS, ping=True)
+    results = asyncio.run(main())
+    assert results['198.51.100.1'] is Fleet.UNREACHABLE
+    assert sorted(polled) == ['192.0.2.1', '192.0.2.2']
@@ -0,0 +1,44 @@
+import ipaddress
+
+import pytest
+
+from poller.utils import IPUtils
+
+V6 = (32, 1, 13, 184) + (0,) * 11 + (1,)
+
+def test_decode_inet_v4():
+    assert IPUtils.decode_inet((1, 4, 192, 0, 2, 1)) == (ipaddress.IPv4Address('192.0.2.1'), 6)
+
+def test_decode_inet_v6():
+    assert IPUtils.decode_inet((2, 16) + V6) == (ipaddress.IPv6Address('2001:db8::1'), 18)
+
+def test_decode_inet_drops_the_zone():
+    assert IPUtils.decode_inet((4, 20) + V6 + (0, 0, 0, 3))[0] == ipaddress.IPv6Address('2001:db8::1')
+
+def test_decode_inet_skips_dns_names():
+    assert IPUtils.decode_inet((16, 3, 97, 98, 99, 7)) == (None, 5)
+
+def test_decode_index_ip_net_to_physical():
+    assert IPUtils.decode_index((12, 1, 4, 10, 0, 0, 1), IPUtils.IP_NET_TO_PHYSICAL_INDEX) == (12, ipaddress.IPv4Address('10.0.0.1'))
+
+def test_decode_index_inet_cidr_route():
+    index = (1, 4, 10, 0, 0, 0, 8, 3, 0, 0, 0, 1, 4, 192, 0, 2, 1)
+    assert IPUtils.decode_index(index, IPUtils.INET_CIDR_ROUTE_INDEX) == (
+            ipaddress.IPv4Address('10.0.0.0'), 8, (0, 0, 0), ipaddress.IPv4Address('192.0.2.1'))
+
+def test_decode_indexes_filters_family_and_skips_garbage():
+    v4 = (1, 4, 192, 0, 2, 1)
+    v6 = (2, 16) + V6
+    decoded = IPUtils.decode_indexes([v4, v6, (1, 4, 192)], family=6)
+    assert decoded == {v6: (ipaddress.IPv6Address('2001:db8::1'),)}
+
+@pytest.mark.parametrize('address, expected', [
+    ('20:01:0d:b8:00:00:00:00:00:00:00:00:00:00:00:01', '2001:db8::1'),
+    ('2001:0db8:0000:0000:0000:0000:0000:0001', '2001:db8::1'),
+])
+def test_reduce_ipv6_address(address, expected):
+    assert IPUtils.reduce_ipv6_address(address) == expected
+
+@pytest.mark.parametrize('address, valid', [('192.0.2.1', True), ('256.0.0.1', False), ('192.0.2', False), ('a.b.c.d', False)])
+def test_validate_ipv4_address(address, valid):
+    assert IPUtils.validate_ipv4_address(address) == valid
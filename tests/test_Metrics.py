@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from poller import Metrics, Timing, Poller
+
+@pytest.fixture
+def events():
+    recorded = []
+    Metrics.add_hook(recorded.append)
+    yield recorded
+    Metrics.remove_hook(recorded.append)
+
+def _request():
+    Metrics.start('192.0.2.1', 'get').finish()
+
+def test_traced_labels_budgeted_generator(events):
+    @Metrics.traced
+    @Timing.budgeted
+    def pages(count):
+        for page in range(count):
+            _request()
+            yield page
+
+    assert list(pages(2)) == [0, 1]
+    assert [event.helper for event in events] == ['pages', 'pages']
+    assert Metrics.helper() is None
+
+def test_traced_labels_budgeted_coroutine(events):
+    @Metrics.traced
+    @Timing.budgeted
+    async def fetch():
+        _request()
+
+    asyncio.run(fetch())
+    assert [event.helper for event in events] == ['fetch']
+
+def test_outer_helper_keeps_its_label(events):
+    @Metrics.traced
+    def inner():
+        _request()
+
+    @Metrics.traced
+    def outer():
+        inner()
+
+    outer()
+    assert [event.helper for event in events] == ['outer']
+
+@pytest.mark.parametrize('helper', ['iter_walk', 'iter_table'])
+def test_streaming_poller_helpers_label_requests(monkeypatch, events, helper):
+    def session_pages(*args, **kwargs):
+        _request()
+        yield [object()]
+    monkeypatch.setattr(Poller, '_session_pages', session_pages)
+    monkeypatch.setattr(Poller, '_table_rows', session_pages)
+    assert list(getattr(Poller, helper)('ifDescr', '192.0.2.1', 'public'))
+    assert [event.helper for event in events] == [helper]
+
+def test_ping_sweep_is_labelled(monkeypatch, events):
+    monkeypatch.setattr(Poller, '_fping_command', lambda **kwargs: _request() or ['true'])
+    list(Poller.ping_sweep([]))
+    assert [event.helper for event in events] == ['ping_sweep']
+
+def test_no_event_without_hooks():
+    assert Metrics.start('192.0.2.1', 'get') is None
+
+@pytest.mark.parametrize('message, error', [
+    ('circuit open for 192.0.2.1', 'circuit_open'),
+    ('deadline passed', 'deadline'),
+    ('authorizationError', 'auth'),
+    ('tooBig', 'too_big'),
+])
+def test_classify_messages(message, error):
+    assert Metrics.classify(Exception(message)) == error
+
+def test_classify_falls_back_to_exception_name():
+    assert Metrics.classify(KeyError('x')) == 'keyerror'
+
+def test_host_group():
+    assert Metrics.host_group('10.1.2.3:161') == '10.1.0.0/16'
+    assert Metrics.host_group('[2001:db8::1]:161') == '2001:db8::/48'
+    assert Metrics.host_group('router.example.net') == 'other'
+
+def test_registry_prometheus_text():
+    registry = Metrics.Registry(group=None)
+    event = Metrics.RequestEvent('192.0.2.1', 'get')
+    event.seconds = 0.02
+    event.pdus = 1
+    event.error = 'timeout'
+    registry(event)
+    text = registry.prometheus()
+    assert 'snmp_requests_total{helper="",operation="get",group="all"} 1' in text
+    assert 'snmp_request_errors_total{helper="",operation="get",group="all",error="timeout"} 1' in text
+    assert 'snmp_request_seconds_bucket{helper="",operation="get",group="all",le="0.025"} 1' in text
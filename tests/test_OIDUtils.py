@@ -0,0 +1,41 @@
+import pytest
+
+from poller.utils import OIDUtils
+
+IF_DESCR = (1, 3, 6, 1, 2, 1, 2, 2, 1, 2)
+
+@pytest.mark.parametrize('oid', ['ifDescr', 'IF-MIB::ifDescr', '.1.3.6.1.2.1.2.2.1.2', '1.3.6.1.2.1.2.2.1.2', IF_DESCR])
+def test_resolve_spellings(oid):
+    assert OIDUtils.resolve(oid) == IF_DESCR
+
+def test_resolve_keeps_the_index():
+    assert OIDUtils.resolve('ifDescr.12') == IF_DESCR + (12,)
+
+def test_unknown_names_are_left_to_net_snmp():
+    with pytest.raises(ValueError):
+        OIDUtils.resolve('hrSystemUptime.0')
+    assert not OIDUtils.known('hrSystemUptime.0')
+    assert OIDUtils.known('.1.3.6.1.2.1.25.1.1.0')
+
+@pytest.mark.parametrize('oid, expected', [
+    (IF_DESCR + (12,), ('ifDescr', '12')),
+    ((1, 3, 6, 1, 2, 1, 1, 5, 0), ('sysName', '0')),
+    #Past the longest known prefix and no MIB name: spelled from iso like easysnmp
+    ((1, 3, 6, 1, 2, 1, 25, 1, 1, 0), ('iso.3.6.1.2.1.25.1.1', '0')),
+    ((1, 3, 6, 1, 4, 1, 99999, 1, 2), ('iso.3.6.1.4.1.99999.1', '2')),
+    ((0, 0), ('.0.0', '')),
+])
+def test_translate_matches_easysnmp_keys(oid, expected):
+    assert OIDUtils.translate(oid) == expected
+
+def test_translate_never_answers_with_a_branch_name():
+    name, index = OIDUtils.translate(OIDUtils.resolve('ifEntry') + (99, 1))
+    assert name not in ('ifEntry', 'ifTable', 'interfaces', 'mib-2', 'iso')
+
+def test_register_extends_both_directions():
+    OIDUtils.register('testObject', '.1.3.6.1.4.1.99998.7')
+    oid = OIDUtils.resolve('testObject.5')
+    assert OIDUtils.translate(oid) == ('testObject', '5')
+
+def test_to_string():
+    assert OIDUtils.to_string(IF_DESCR) == '1.3.6.1.2.1.2.2.1.2'
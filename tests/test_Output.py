@@ -0,0 +1,53 @@
+import json
+import pickle
+
+import pytest
+
+from poller import Fleet, Output
+
+@pytest.mark.parametrize('result, expected', [
+    ({'sysName.0': 'core1'}, 'ok'),
+    (0, 'ok'),
+    ([], 'ok'),
+    ({}, 'ok'),
+    ('', 'ok'),
+    (None, 'no_response'),
+    (Fleet.UNREACHABLE, 'unreachable'),
+    (pickle.loads(pickle.dumps(Fleet.UNREACHABLE)), 'unreachable'),
+])
+def test_status(result, expected):
+    assert Output.status(result) == expected
+
+def _records(path):
+    with open(path) as lines:
+        return [json.loads(line) for line in lines]
+
+def test_ndjson_keeps_falsy_results(tmp_path):
+    path = str(tmp_path / 'out.ndjson')
+    with Output.open_sink(path) as sink:
+        sink.write_all([('a', 0), ('b', []), ('c', None), ('d', Fleet.UNREACHABLE)])
+    assert _records(path) == [
+        {'host': 'a', 'status': 'ok', 'result': 0},
+        {'host': 'b', 'status': 'ok', 'result': []},
+        {'host': 'c', 'status': 'no_response', 'result': None},
+        {'host': 'd', 'status': 'unreachable', 'result': None},
+    ]
+
+def test_csv_writes_a_row_for_every_host(tmp_path):
+    path = str(tmp_path / 'out.csv')
+    with Output.open_sink(path) as sink:
+        sink.write_all([('a', {'ifDescr': ['eth0']}), ('b', 0), ('c', {}), ('d', None)])
+    with open(path) as rows:
+        assert rows.read().splitlines() == ['host,status,key,value', 'a,ok,ifDescr.0,eth0', 'b,ok,,0', 'c,ok,,', 'd,no_response,,']
+
+def test_binary_round_trip(tmp_path):
+    path = str(tmp_path / 'out.bin.gz')
+    with Output.open_sink(path) as sink:
+        sink.write_all([('a', 0), ('b', None)])
+    assert list(Output.read_binary(path)) == [
+        {'host': 'a', 'status': 'ok', 'result': 0},
+        {'host': 'b', 'status': 'no_response', 'result': None},
+    ]
+
+def test_plain_flattens_to_dotted_keys():
+    assert list(Output.flatten(Output.plain({'a': {'b': (1, 2)}}))) == [('a.b.0', 1), ('a.b.1', 2)]
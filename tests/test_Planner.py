@@ -0,0 +1,79 @@
+from contextlib import contextmanager
+
+import pytest
+
+from poller import Planner, SessionPool
+
+class _Variable:
+    def __init__(self, value, snmp_type='OCTETSTR'):
+        self.value = value
+        self.snmp_type = snmp_type
+
+@pytest.fixture
+def agent(monkeypatch):
+    """
+    Stands in for SessionPool.session: answers GETs of up to limit oids and raises tooBig above it
+    """
+    requests = []
+
+    class Session:
+        limit = 2
+
+        def get(self, oids):
+            requests.append(list(oids))
+            if len(oids) > self.limit:
+                raise Exception('tooBig')
+            return [_Variable('missing', 'NOSUCHINSTANCE') if oid == 'sysLocation.0' else _Variable(oid.upper()) for oid in oids]
+
+    @contextmanager
+    def session(host, community, **kwargs):
+        yield Session()
+
+    monkeypatch.setattr(SessionPool, 'session', session)
+    return requests
+
+def test_too_big_splits_until_the_answers_fit(agent):
+    oids = ['sysDescr.0', 'sysObjectID.0', 'sysUpTime.0', 'sysContact.0', 'sysName.0']
+    values = Planner._get(oids, '192.0.2.1', 'public')
+    assert values == {oid: oid.upper() for oid in oids}
+    assert agent == [oids, oids[:2], oids[2:], oids[2:3], oids[3:]]
+
+def test_exceptions_read_as_missing(agent):
+    assert Planner._get(['sysName.0', 'sysLocation.0'], '192.0.2.1', 'public') == {'sysName.0': 'SYSNAME.0', 'sysLocation.0': None}
+
+def test_single_too_big_oid_is_given_up(agent, monkeypatch):
+    monkeypatch.setattr(Planner, '_values', lambda oids, variables: (_ for _ in ()).throw(Exception('tooBig')))
+    assert Planner._get(['sysDescr.0'], '192.0.2.1', 'public') == {'sysDescr.0': None}
+
+def test_v1_no_such_name_drops_the_named_oid():
+    assert Planner._retry(['sysName.0', 'hrSystemUptime.0', 'sysContact.0'], Exception('noSuchName at index 2')) == [['sysName.0', 'sysContact.0']]
+
+def test_other_errors_are_not_retried():
+    assert Planner._retry(['sysName.0', 'sysContact.0'], Exception('timeout')) is None
+
+def test_pack_respects_varbind_limit_and_dedupes():
+    oids = [f'ifDescr.{index}' for index in range(10)] + ['ifDescr.0']
+    pdus = Planner.pack(oids, max_varbinds=4)
+    assert [len(pdu) for pdu in pdus] == [4, 4, 2]
+    assert sum(pdus, []) == oids[:10]
+
+def test_pack_respects_message_size():
+    pdus = Planner.pack(['sysDescr.0', 'sysContact.0', 'sysName.0', 'sysLocation.0'], max_size=600)
+    assert all(sum(Planner._varbind_size(oid) for oid in pdu) + Planner._overhead <= 600 for pdu in pdus)
+    assert len(pdus) == 2
+
+def test_plan_survives_a_failed_first_get(monkeypatch):
+    plan = Planner.Plan(['sysDescr.0', 'sysName.0'], max_varbinds=1)
+
+    def get(oids, host, community, **kwargs):
+        if oids == ['sysDescr.0']:
+            raise Exception('timeout')
+        return {oid: 'core1' for oid in oids}
+
+    monkeypatch.setattr(Planner, '_get', get)
+    assert plan.run('192.0.2.1', 'public') == {'sysDescr.0': None, 'sysName.0': 'core1'}
+
+def test_plan_returns_none_when_nothing_answers(monkeypatch):
+    plan = Planner.Plan(['sysDescr.0', 'sysName.0'], max_varbinds=1)
+    monkeypatch.setattr(Planner, '_get', lambda oids, host, community, **kwargs: (_ for _ in ()).throw(Exception('timeout')))
+    assert plan.run('192.0.2.1', 'public') is None
@@ -0,0 +1,100 @@
+import asyncio
+
+from poller import Engine, Poller
+from poller.utils import BERUtils, OIDUtils
+
+IF_DESCR = (1, 3, 6, 1, 2, 1, 2, 2, 1, 2)
+IF_OPER_STATUS = (1, 3, 6, 1, 2, 1, 2, 2, 1, 8)
+
+class _Variable:
+    def __init__(self, oid, oid_index, value, snmp_type='OCTETSTR'):
+        self.oid = oid
+        self.oid_index = oid_index
+        self.value = value
+        self.snmp_type = snmp_type
+
+class _Session:
+    """
+    Answers get_bulk from {(name, index): value}, in the order easysnmp names them
+    """
+    def __init__(self, rows):
+        self.rows = sorted((OIDUtils.resolve(f'{name}.{index}'), name, index, value) for (name, index), value in rows.items())
+        self.requests = 0
+
+    def get_bulk(self, oids, non_repeaters, max_repetitions):
+        self.requests += 1
+        cursors = list(oids)
+        response = []
+        for _ in range(max_repetitions):
+            for position, cursor in enumerate(cursors):
+                variable = self._next(cursor)
+                response.append(variable)
+                cursors[position] = ".".join((variable.oid, variable.oid_index)) if variable.oid_index else variable.oid
+        return response
+
+    def _next(self, cursor):
+        arcs = OIDUtils.resolve(cursor)
+        for numeric, name, index, value in self.rows:
+            if numeric > arcs:
+                return _Variable(name, str(index), value)
+        return _Variable(cursor, '', '', 'ENDOFMIBVIEW')
+
+def test_session_table_accepts_numeric_columns():
+    session = _Session({('ifDescr', 1): 'eth0', ('ifDescr', 2): 'eth1', ('ifOperStatus', 1): '1', ('ifOperStatus', 2): '2'})
+    table = Poller._session_table(session, ['.1.3.6.1.2.1.2.2.1.2', 'ifOperStatus'], 2)
+    assert dict(table.rows()) == {1: {'.1.3.6.1.2.1.2.2.1.2': 'eth0', 'ifOperStatus': '1'},
+            2: {'.1.3.6.1.2.1.2.2.1.2': 'eth1', 'ifOperStatus': '2'}}
+
+def test_session_rows_complete_in_index_order():
+    session = _Session({('ifDescr', 1): 'eth0', ('ifDescr', 2): 'eth1', ('ifOperStatus', 1): '1'})
+    rows = Poller._flat(Poller._session_rows(session, ['ifDescr', 'ifOperStatus'], 1))
+    assert rows == [((1,), ['eth0', '1']), ((2,), ['eth1', None])]
+
+class _Engine:
+    def __init__(self, responses):
+        self.responses = responses
+
+    async def column_stream(self, columns, host, community, max_repetitions=25, **kwargs):
+        for batch, ended in self.responses:
+            yield [(position, Engine.Varbind(numeric, BERUtils.OCTET_STRING, raw)) for position, numeric, raw in batch], ended
+
+def test_engine_rows_wait_for_columns_left_out_of_a_short_response(monkeypatch):
+    #The second response was cut short before ifOperStatus.2, which is still walking
+    monkeypatch.setattr(Engine, 'get_engine', lambda: _Engine([
+        ([(0, IF_DESCR + (1,), b'eth0'), (1, IF_OPER_STATUS + (1,), b'1')], set()),
+        ([(0, IF_DESCR + (2,), b'eth1')], set()),
+        ([(1, IF_OPER_STATUS + (2,), b'2')], {0, 1}),
+    ]))
+    async def main():
+        return await Poller._async_flat(Poller._engine_rows(['ifDescr', 'ifOperStatus'], '192.0.2.1', 'public', 25))
+    assert asyncio.run(main()) == [((1,), [b'eth0', b'1']), ((2,), [b'eth1', b'2'])]
+
+def _interface_helpers(monkeypatch, sync):
+    calls = []
+    def fake(name, value):
+        def helper(*args, **kwargs):
+            calls.append(name)
+            return value
+        async def async_helper(*args, **kwargs):
+            return helper(*args, **kwargs)
+        return helper if sync else async_helper
+    prefix = '' if sync else 'async_'
+    monkeypatch.setattr(Poller, f'{prefix}poll_interface_ips', fake('ips', {'3': '192.0.2.1'}))
+    monkeypatch.setattr(Poller, '_sparse_table' if sync else '_async_sparse_table', fake('sparse', None))
+    monkeypatch.setattr(Poller, f'{prefix}poll_ifDescr', fake('ifDescr', {'ifDescr.3': 'eth0'}))
+    monkeypatch.setattr(Poller, f'{prefix}poll_ifOperStatus', fake('ifOperStatus', {'ifOperStatus.3': '1'}))
+    monkeypatch.setattr(Poller, f'{prefix}poll_ifAdminStatus', fake('ifAdminStatus', {'ifAdminStatus.3': '1'}))
+    return calls
+
+EXPECTED_INTERFACES = [{'interface': 'eth0', 'v4_ip': '192.0.2.1', 'oper_status': '1', 'admin_status': '1'}]
+
+def test_v1_sparse_fallback_walks_the_address_table_once(monkeypatch):
+    calls = _interface_helpers(monkeypatch, sync=False)
+    result = asyncio.run(Poller.async_poll_interfaces('192.0.2.1', 'public', version=1))
+    assert result == EXPECTED_INTERFACES
+    assert calls.count('ips') == 1
+
+def test_v1_sparse_fallback_walks_the_address_table_once_sync(monkeypatch):
+    calls = _interface_helpers(monkeypatch, sync=True)
+    assert Poller.poll_interfaces('192.0.2.1', 'public', version=1) == EXPECTED_INTERFACES
+    assert calls.count('ips') == 1
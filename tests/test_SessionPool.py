@@ -0,0 +1,72 @@
+import easysnmp
+import pytest
+
+from poller import SessionPool, Timing
+
+class _Session:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(SessionPool.easysnmp, 'Session', _Session)
+    return SessionPool.SessionPool(max_sessions=2, idle_ttl=60)
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(SessionPool.time, 'monotonic', lambda: now[0])
+    return now
+
+def _lend(pool, host, **kwargs):
+    with pool.session(host, 'public', **kwargs) as session:
+        return session
+
+def test_sessions_are_reused_per_host_and_credentials(pool):
+    first = _lend(pool, '192.0.2.1')
+    assert _lend(pool, '192.0.2.1') is first
+    assert _lend(pool, '192.0.2.1', version=1) is not first
+    assert _lend(pool, '192.0.2.2') is not first
+
+def test_concurrent_borrowers_get_their_own(pool):
+    with pool.session('192.0.2.1', 'public') as first:
+        with pool.session('192.0.2.1', 'public') as second:
+            assert first is not second
+    assert len(pool) == 2
+
+def test_least_recently_used_is_evicted(pool):
+    first = _lend(pool, '192.0.2.1')
+    second = _lend(pool, '192.0.2.2')
+    assert _lend(pool, '192.0.2.1') is first
+    _lend(pool, '192.0.2.3')
+    assert len(pool) == 2
+    assert _lend(pool, '192.0.2.1') is first
+    assert _lend(pool, '192.0.2.2') is not second
+
+def test_idle_sessions_expire(pool, clock):
+    first = _lend(pool, '192.0.2.1')
+    clock[0] += 61
+    assert _lend(pool, '192.0.2.1') is not first
+
+def test_broken_session_is_discarded(pool):
+    with pytest.raises(RuntimeError):
+        with pool.session('192.0.2.1', 'public') as session:
+            broken = session
+            raise RuntimeError('socket closed')
+    assert len(pool) == 0
+    assert _lend(pool, '192.0.2.1') is not broken
+
+def test_timeout_keeps_the_session_and_counts_a_failure(pool, monkeypatch):
+    monkeypatch.setattr(Timing, 'tracker', Timing.HostTracker(failures=1))
+    with pytest.raises(easysnmp.EasySNMPTimeoutError):
+        with pool.session('192.0.2.1', 'public') as session:
+            timed_out = session
+            raise easysnmp.EasySNMPTimeoutError('timeout')
+    assert Timing.tracker.is_open('192.0.2.1')
+    assert _lend(pool, '192.0.2.1') is timed_out
+
+def test_open_circuit_refuses_adaptive_sessions(pool, monkeypatch):
+    monkeypatch.setattr(Timing, 'tracker', Timing.HostTracker(failures=1))
+    Timing.tracker.failure('192.0.2.1')
+    with pytest.raises(easysnmp.EasySNMPTimeoutError):
+        _lend(pool, '192.0.2.1', timeout=None)
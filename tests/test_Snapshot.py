@@ -0,0 +1,113 @@
+import time
+
+import pytest
+
+from poller import Poller, Snapshot
+from poller.Table import Table
+
+def _state(uptime=1000, table_change=5, spin_lock=7, if_number=2):
+    return Snapshot.InterfaceState(uptime, table_change, spin_lock, if_number)
+
+def _last_change(values):
+    table = Table(['ifLastChange'])
+    for index, value in values.items():
+        table.add('ifLastChange', index, str(value))
+    return table
+
+def test_snapshot_is_current_while_indicators_hold():
+    store = Snapshot.SnapshotStore()
+    snapshot = Snapshot.InterfaceSnapshot(_state(), {}, _last_change({1: 0}))
+    assert store.current(snapshot, _state(uptime=2000))
+    assert not store.current(snapshot, _state(uptime=500))
+    assert not store.current(snapshot, _state(table_change=6))
+    assert not store.current(snapshot, _state(spin_lock=8))
+    assert not store.current(snapshot, _state(uptime=None))
+    assert not store.current(None, _state())
+
+def test_old_snapshots_are_rebuilt():
+    store = Snapshot.SnapshotStore(max_age=60)
+    snapshot = Snapshot.InterfaceSnapshot(_state(), {}, _last_change({1: 0}), taken=time.monotonic() - 61)
+    assert not store.current(snapshot, _state())
+
+def test_changed_rows():
+    snapshot = Snapshot.InterfaceSnapshot(_state(), {}, _last_change({1: 0, 2: 0}))
+    assert snapshot.changed_rows(_last_change({1: 0, 2: 900})) == [2]
+    assert snapshot.changed_rows(_last_change({1: 0})) is None
+    assert snapshot.changed_rows(None) is None
+
+def test_store_is_keyed_by_host_and_family():
+    store = Snapshot.SnapshotStore()
+    snapshot = Snapshot.InterfaceSnapshot(_state(), {}, _last_change({}))
+    store.store('192.0.2.1', False, snapshot)
+    store.store('192.0.2.1', True, snapshot)
+    assert store.lookup('192.0.2.1') is snapshot
+    assert len(store) == 2
+    store.discard('192.0.2.1')
+    assert len(store) == 0
+
+class _Device:
+    """
+    Serves the GETs and table walks poll_interfaces makes, recording them
+    """
+    def __init__(self):
+        self.uptime = 1000
+        self.rows = {1: {'ifDescr': 'eth0', 'ifOperStatus': '1', 'ifAdminStatus': '1', 'ifLastChange': '0'},
+                2: {'ifDescr': 'eth1', 'ifOperStatus': '1', 'ifAdminStatus': '1', 'ifLastChange': '0'}}
+        self.requests = []
+
+    def poll(self, oids, host, community, **kwargs):
+        self.requests.append(('get', tuple(oids)))
+        if oids == Poller._interface_state_oids:
+            return {'sysUpTimeInstance': str(self.uptime), 'ifTableLastChange.0': '5', 'ipAddressSpinLock.0': '7', 'ifNumber.0': str(len(self.rows))}
+        result = {}
+        for oid in oids:
+            column, _, index = oid.partition('.')
+            result[oid] = self.rows[int(index)][column]
+        return result
+
+    def poll_table(self, columns, host, community, **kwargs):
+        self.requests.append(('table', tuple(columns)))
+        table = Table(columns)
+        for index, row in self.rows.items():
+            for column in columns:
+                table.add(column, index, row[column])
+        return table
+
+    def poll_interface_ips(self, host, community, **kwargs):
+        self.requests.append(('ips',))
+        return {'1': '192.0.2.1', '2': '192.0.2.2'}
+
+@pytest.fixture
+def device(monkeypatch):
+    device = _Device()
+    for name in ('poll', 'poll_table', 'poll_interface_ips'):
+        monkeypatch.setattr(Poller, name, getattr(device, name))
+    return device
+
+def _statuses(result):
+    return {interface['interface']: interface['oper_status'] for interface in result}
+
+def test_incremental_poll_refetches_only_moved_rows(device):
+    store = Snapshot.SnapshotStore()
+    assert _statuses(Poller.poll_interfaces('192.0.2.1', 'public', snapshots=store)) == {'eth0': '1', 'eth1': '1'}
+    assert ('ips',) in device.requests
+
+    device.requests.clear()
+    device.uptime += 3000
+    assert _statuses(Poller.poll_interfaces('192.0.2.1', 'public', snapshots=store)) == {'eth0': '1', 'eth1': '1'}
+    assert device.requests == [('get', tuple(Poller._interface_state_oids)), ('table', ('ifLastChange',))]
+
+    device.requests.clear()
+    device.uptime += 3000
+    device.rows[2].update(ifOperStatus='2', ifLastChange='3500')
+    assert _statuses(Poller.poll_interfaces('192.0.2.1', 'public', snapshots=store)) == {'eth0': '1', 'eth1': '2'}
+    assert device.requests[2:] == [('get', ('ifDescr.2', 'ifOperStatus.2', 'ifAdminStatus.2'))]
+
+def test_reboot_rebuilds_the_snapshot(device):
+    store = Snapshot.SnapshotStore()
+    Poller.poll_interfaces('192.0.2.1', 'public', snapshots=store)
+    device.requests.clear()
+    device.uptime = 10
+    Poller.poll_interfaces('192.0.2.1', 'public', snapshots=store)
+    assert ('ips',) in device.requests
+    assert store.lookup('192.0.2.1').state.uptime == 10
@@ -0,0 +1,80 @@
+import pytest
+
+from poller import Engine, Poller
+from poller.Table import Table, make_index, parse_index
+from poller.utils import BERUtils
+
+def _interfaces():
+    table = Table(['ifDescr', 'ifOperStatus', 'ifAdminStatus'])
+    for index, descr, oper, admin in ((1, b'eth0', 1, 1), (2, b'eth1', 2, 1), (10, b'lo', 1, 1)):
+        table.add('ifDescr', index, descr, BERUtils.OCTET_STRING)
+        table.add('ifOperStatus', index, oper, BERUtils.INTEGER)
+        table.add('ifAdminStatus', index, admin, BERUtils.INTEGER)
+    return table
+
+def test_values_render_only_when_read():
+    table = _interfaces()
+    assert table.raw(2, 'ifDescr') == b'eth1'
+    assert table.get(2, 'ifDescr') == 'eth1'
+    assert table.get(2, 'ifOperStatus') == '2'
+
+def test_lookups_of_missing_rows_and_columns():
+    table = _interfaces()
+    assert table.get(3, 'ifDescr', 'none') == 'none'
+    assert table.get(1, 'ifAlias') is None
+    assert table.row(3) is None
+    assert 10 in table and 3 not in table
+    with pytest.raises(KeyError):
+        table[3]
+
+def test_rows_and_columns():
+    table = _interfaces()
+    assert len(table) == 3
+    assert list(table) == [1, 2, 10]
+    assert table[1] == {'ifDescr': 'eth0', 'ifOperStatus': '1', 'ifAdminStatus': '1'}
+    assert list(table.column('ifDescr')) == [(1, 'eth0'), (2, 'eth1'), (10, 'lo')]
+
+def test_sparse_columns_leave_gaps():
+    table = Table(['ifDescr'])
+    table.add('ifDescr', 1, 'eth0')
+    table.add('ifAlias', 2, 'uplink')
+    assert table.columns == ['ifDescr', 'ifAlias']
+    assert table.raw_column('ifDescr') == ['eth0', None]
+    assert table.to_dict() == {'ifDescr.1': 'eth0', 'ifAlias.2': 'uplink'}
+
+def test_exception_values_count_as_present():
+    table = Table(['ifDescr'])
+    table.add('ifDescr', 1, b'eth0', BERUtils.OCTET_STRING)
+    table.add('ifDescr', 2, None, BERUtils.NOSUCHINSTANCE)
+    assert table.get(2, 'ifDescr') == 'NOSUCHINSTANCE'
+    assert table.get(1, 'ifDescr') == 'eth0'
+
+def test_multi_part_indexes():
+    assert make_index((5,)) == 5
+    assert make_index((1, 4, 192, 0, 2, 1)) == (1, 4, 192, 0, 2, 1)
+    assert parse_index('5') == 5
+    assert parse_index('1.4.192.0.2.1') == (1, 4, 192, 0, 2, 1)
+    table = Table(['ipAddressIfIndex'])
+    table.add('ipAddressIfIndex', (1, 4, 192, 0, 2, 1), '3')
+    assert table.to_dict() == {'ipAddressIfIndex.1.4.192.0.2.1': '3'}
+
+def test_from_varbinds_sorts_into_columns():
+    descr = (1, 3, 6, 1, 2, 1, 2, 2, 1, 2)
+    oper = (1, 3, 6, 1, 2, 1, 2, 2, 1, 8)
+    varbinds = [Engine.Varbind(descr + (1,), BERUtils.OCTET_STRING, b'eth0'), Engine.Varbind(oper + (1,), BERUtils.INTEGER, 1),
+            Engine.Varbind((1, 3, 6, 1, 2, 1, 1, 5, 0), BERUtils.OCTET_STRING, b'core1')]
+    table = Table.from_varbinds(varbinds, [('ifDescr', descr), ('ifOperStatus', oper)])
+    assert table.to_dict() == {'ifDescr.1': 'eth0', 'ifOperStatus.1': '1'}
+
+def test_from_variables_keeps_asked_columns():
+    class Variable:
+        def __init__(self, oid, oid_index, value):
+            self.oid, self.oid_index, self.value = oid, oid_index, value
+    table = Table.from_variables([Variable('ifDescr', '1', 'eth0'), Variable('ifSpeed', '1', '1000')], ['ifDescr'])
+    assert table.to_dict() == {'ifDescr.1': 'eth0'}
+
+def test_join_interfaces_keeps_rows_with_addresses():
+    joined = Poller._join_interfaces({'1': '192.0.2.1', '3': '192.0.2.3', '10': '127.0.0.1'}, _interfaces(), 'v4_ip')
+    assert joined == [{'interface': 'eth0', 'v4_ip': '192.0.2.1', 'oper_status': '1', 'admin_status': '1'},
+            {'interface': 'lo', 'v4_ip': '127.0.0.1', 'oper_status': '1', 'admin_status': '1'}]
+    assert Poller._join_interfaces({}, _interfaces(), 'v4_ip') == []
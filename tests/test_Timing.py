@@ -0,0 +1,78 @@
+import pytest
+
+from poller import Timing
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(Timing.time, 'monotonic', lambda: now[0])
+    return now
+
+def test_unmeasured_host_gets_initial_timeout():
+    assert Timing.HostTracker(initial_timeout=1.5).timeout('192.0.2.1') == 1.5
+
+def test_rto_follows_rfc_6298():
+    tracker = Timing.HostTracker(min_timeout=0, granularity=0)
+    tracker.observe('h', 0.2)
+    assert tracker.timeout('h') == pytest.approx(0.2 + 4 * 0.1)
+    tracker.observe('h', 0.4)
+    #rttvar = 3/4 * 0.1 + 1/4 * |0.2 - 0.4|, srtt = 7/8 * 0.2 + 1/8 * 0.4
+    assert tracker.timeout('h') == pytest.approx(0.225 + 4 * 0.125)
+
+def test_rto_is_clamped():
+    tracker = Timing.HostTracker(min_timeout=0.2, max_timeout=2)
+    tracker.observe('fast', 0.001)
+    tracker.observe('slow', 5)
+    assert tracker.timeout('fast') == 0.2
+    assert tracker.timeout('slow') == 2
+
+def test_circuit_opens_after_consecutive_failures(clock):
+    tracker = Timing.HostTracker(failures=3, backoff=30)
+    tracker.failure('h')
+    tracker.failure('h')
+    assert tracker.allow('h')
+    tracker.failure('h')
+    assert tracker.is_open('h')
+    assert not tracker.allow('h')
+    clock[0] += 29
+    assert not tracker.allow('h')
+
+def test_one_probe_after_backoff_then_close_on_success(clock):
+    tracker = Timing.HostTracker(failures=1, backoff=30)
+    tracker.failure('h')
+    clock[0] += 30
+    assert tracker.allow('h')
+    assert not tracker.allow('h')
+    tracker.success('h')
+    assert not tracker.is_open('h')
+    assert tracker.allow('h')
+
+def test_failed_probe_doubles_the_backoff(clock):
+    tracker = Timing.HostTracker(failures=1, backoff=30, max_backoff=45)
+    tracker.failure('h')
+    clock[0] += 30
+    assert tracker.allow('h')
+    tracker.failure('h')
+    clock[0] += 44
+    assert not tracker.allow('h')
+    clock[0] += 1
+    assert tracker.allow('h')
+
+def test_success_resets_the_failure_count():
+    tracker = Timing.HostTracker(failures=2)
+    tracker.failure('h')
+    tracker.success('h')
+    tracker.failure('h')
+    assert not tracker.is_open('h')
+
+def test_oldest_host_is_evicted():
+    tracker = Timing.HostTracker(max_hosts=2)
+    for host in ('a', 'b', 'c'):
+        tracker.observe(host, 0.1)
+    assert len(tracker) == 2
+    assert tracker.timeout('a') == tracker.initial_timeout
+
+def test_fit_shrinks_to_the_deadline(clock):
+    timeout, retries = Timing.fit(1, 3, Timing.Deadline(1.1))
+    assert timeout * (retries + 1) <= 1.1
+    assert Timing.fit(1, 3, Timing.Deadline(expires=clock[0])) is None